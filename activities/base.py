@@ -1,6 +1,13 @@
 from abc import ABC, abstractmethod
-from playwright.async_api import Page
+from typing import Dict, Optional, Tuple
+from playwright.async_api import Locator, Page
+from utils import direct_actions, metrics
+from utils.direct_actions import DirectAction
+from utils.game_state import GameStateProbe
+from utils.jobs import job_queue
 from utils.logger import logger
+from utils.navigation import wait_ready
+from utils.scheduler import ResourceReading, parse_duration
 
 class BaseActivity(ABC):
     @property
@@ -9,11 +16,119 @@ class BaseActivity(ABC):
         """The URL path this activity handles (e.g., '/home')."""
         pass
 
+    @property
+    def url_path(self) -> str:
+        """The page execute_activity opens before running the activity; defaults to path."""
+        return self.path
+
+    @property
+    def ready_selector(self) -> Optional[str]:
+        """
+        Selector that is visible once the activity's page is usable.
+        Navigation resolves as soon as it shows; None falls back to networkidle.
+        """
+        return None
+
+    @property
+    def resource(self) -> Optional[str]:
+        """The game counter this activity spends ('energy', 'kisses', ...), if any."""
+        return None
+
+    @property
+    def depends_on(self) -> Tuple[str, ...]:
+        """Activity paths that must finish first when they run in the same cycle."""
+        return ()
+
+    @property
+    def shared_resources(self) -> Tuple[str, ...]:
+        """
+        Names the activity holds exclusively while it runs; activities sharing
+        one never overlap. Defaults to the game counter it spends.
+        """
+        return (self.resource,) if self.resource else ()
+
+    @property
+    def direct_actions(self) -> Dict[str, DirectAction]:
+        """Actions this activity can send straight to the game instead of clicking through the UI."""
+        return {}
+
+    async def run_direct(self, page: Page, name: str, **params) -> Optional[dict]:
+        """
+        Sends the declared action `name` if direct actions are enabled.
+        Returns the game's reply, or None when the caller should use the UI.
+        """
+        action = self.direct_actions.get(name)
+        if action is None or not direct_actions.settings.enabled:
+            return None
+        return await direct_actions.perform(page, action, **params)
+
+    def should_yield(self, page: Page) -> bool:
+        """
+        Checked by long loops at safe points (between fights): True when an
+        ad-hoc job is queued for the domain, so the loop should stop and let
+        it run. The scheduler brings the activity back for what it left.
+        """
+        if job_queue.preempt_requested(page):
+            logger.info("Yielding to queued ad-hoc job", activity=self.path)
+            job_queue.note_yield(page)
+            return True
+        return False
+
+    def record_fights(self, page: Page, count: int = 1):
+        """Counts fights for /metrics; each spends one unit of the activity's resource."""
+        domain = job_queue.domain_of(page) or "unknown"
+        metrics.fights.inc(domain, self.path, amount=count)
+        if self.resource:
+            metrics.resources_spent.inc(domain, self.resource, amount=count)
+
+    async def wait_until_ready(self, page: Page) -> bool:
+        """Waits for ready_selector (or networkidle). Returns True if it had to fall back."""
+        return await wait_ready(page, self.ready_selector)
+
     @abstractmethod
-    async def execute(self, page: Page):
-        """Execute the activity on the given page."""
+    async def execute(self, page: Page) -> Optional[ResourceReading]:
+        """
+        Execute the activity on the given page.
+        Returns the resource counter left afterwards, if the activity spends one,
+        so the scheduler can predict when it is worth running again.
+        """
         pass
 
+    def known_resource(self, page: Page) -> Optional[ResourceReading]:
+        """The activity's counter as last reported by the game's JSON responses; None if unknown or stale."""
+        probe = GameStateProbe.get(page)
+        if probe and self.resource:
+            return probe.state.reading(self.resource)
+        return None
+
+    async def current_resource(self, page: Page, bar: Locator) -> Optional[ResourceReading]:
+        """known_resource, falling back to reading `bar` from the DOM."""
+        reading = self.known_resource(page)
+        if reading is not None:
+            return reading
+        return await self.read_resource(bar)
+
+    async def read_resource(self, bar: Locator) -> Optional[ResourceReading]:
+        """Reads a game counter bar: current value, maximum and regeneration countdown."""
+        try:
+            current_text = await bar.locator('span[energy=""]').first.inner_text(timeout=5000)
+            current = int(current_text.replace(',', '').strip())
+
+            maximum = None
+            max_locator = bar.locator('span[energy-max]')
+            if await max_locator.count() > 0:
+                maximum = int((await max_locator.first.inner_text()).replace(',', '').strip())
+
+            next_tick = None
+            timer_locator = bar.locator('span[rel="increment_txt"]')
+            if await timer_locator.count() > 0:
+                next_tick = parse_duration(await timer_locator.first.inner_text())
+
+            return ResourceReading(current=current, maximum=maximum, next_tick_seconds=next_tick)
+        except Exception as e:
+            logger.debug(f"Resource counter not readable: {e}")
+            return None
+
     async def handle_age_gate(self, page: Page):
         """Detects and accepts age verification popups."""
         try:
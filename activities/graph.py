@@ -0,0 +1,123 @@
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Set
+from playwright.async_api import Page
+from activities.registry import ActivityRegistry
+from utils.game_state import GameStateProbe
+from utils.logger import logger
+
+@dataclass
+class ActivityNode:
+    path: str
+    depends_on: Set[str] = field(default_factory=set)  # Paths in the same run that must finish first
+    resources: Set[str] = field(default_factory=set)  # Held exclusively while the activity runs
+
+def build_graph(paths: List[str]) -> List[ActivityNode]:
+    """
+    One node per distinct path, in run order. Dependencies on activities
+    outside the run are dropped; a cycle among the rest raises ValueError.
+    """
+    nodes = []
+    for path in dict.fromkeys(paths):
+        activity = ActivityRegistry.get_activity(path)
+        depends_on = set(activity.depends_on) if activity else set()
+        resources = set(activity.shared_resources) if activity else set()
+        nodes.append(ActivityNode(path, depends_on & set(paths) - {path}, resources))
+
+    done: Set[str] = set()
+    remaining = list(nodes)
+    while remaining:
+        ready = [n for n in remaining if n.depends_on <= done]
+        if not ready:
+            raise ValueError(f"Activity dependency cycle among {[n.path for n in remaining]}")
+        done.update(n.path for n in ready)
+        remaining = [n for n in remaining if n not in ready]
+    return nodes
+
+class PagePool:
+    """
+    Pages of one browser context for concurrent activities. The first is
+    the session's own page; up to `limit` - 1 more are opened on demand and
+    closed by close().
+    """
+
+    def __init__(self, primary: Page, limit: int = 1):
+        self.primary = primary
+        self.limit = max(1, limit)
+        self._idle: List[Page] = [primary]
+        self._extra: List[Page] = []
+        self._slots = asyncio.Semaphore(self.limit)
+
+    @asynccontextmanager
+    async def page(self):
+        async with self._slots:
+            page = self._idle.pop(0) if self._idle else await self._open()
+            try:
+                yield page
+            finally:
+                self._idle.append(page)
+
+    async def _open(self) -> Page:
+        page = await self.primary.context.new_page()
+        page.set_default_timeout(60000)
+        # Counters reported on any page update the domain's one game state
+        probe = GameStateProbe.get(self.primary)
+        if probe:
+            probe.attach(page)
+        self._extra.append(page)
+        return page
+
+    async def close(self):
+        probe = GameStateProbe.get(self.primary)
+        for page in self._extra:
+            if probe:
+                probe.detach(page)
+            try:
+                await page.close()
+            except Exception as e:
+                logger.debug(f"Closing extra page failed: {e}")
+        self._idle = [self.primary]
+        self._extra = []
+
+async def run_graph(nodes: List[ActivityNode], pages: PagePool, run: Callable[[str, Page], Awaitable]):
+    """
+    Runs every node on a page from `pages` as soon as its dependencies have
+    finished and its shared resources are free; resources are taken in
+    sorted order, and waiters are served in run order. After the first
+    failure no further node starts, and the failure is raised once the
+    running ones finish.
+    """
+    finished: Dict[str, asyncio.Event] = {n.path: asyncio.Event() for n in nodes}
+    locks: Dict[str, asyncio.Lock] = {r: asyncio.Lock() for n in nodes for r in n.resources}
+    failure: List[BaseException] = []
+
+    async def run_node(node: ActivityNode):
+        try:
+            for dependency in node.depends_on:
+                await finished[dependency].wait()
+            async with _holding([locks[r] for r in sorted(node.resources)]):
+                async with pages.page() as page:
+                    if failure:
+                        return
+                    await run(node.path, page)
+        except Exception as e:
+            failure.append(e)
+        finally:
+            finished[node.path].set()
+
+    await asyncio.gather(*(run_node(n) for n in nodes))
+    if failure:
+        raise failure[0]
+
+@asynccontextmanager
+async def _holding(locks: List[asyncio.Lock]):
+    acquired = []
+    try:
+        for lock in locks:
+            await lock.acquire()
+            acquired.append(lock)
+        yield
+    finally:
+        for lock in reversed(acquired):
+            lock.release()
@@ -1,33 +1,17 @@
 from activities.base import BaseActivity
+from utils.direct_actions import DirectAction
 from activities.registry import ActivityRegistry
+from utils.game_state import GameStateProbe
 from utils.human import HumanUtils
+from utils.navigation import navigate
+from utils.config_loader import load_villains
 from playwright.async_api import Page
 import structlog
-import yaml
-import os
-import asyncio
 
 logger = structlog.get_logger()
 
 @ActivityRegistry.register
 class BattleActivity(BaseActivity):
-    def __init__(self):
-        super().__init__()
-        self.villain_config = self.load_villain_config()
-
-    def load_villain_config(self):
-        config_path = os.path.join(os.getcwd(), 'config', 'villains.yaml')
-        if not os.path.exists(config_path):
-            logger.warning(f"Villains config not found at {config_path}")
-            return {}
-        try:
-            with open(config_path, 'r') as f:
-                config = yaml.safe_load(f)
-                return config if config else {}
-        except Exception as e:
-            logger.error(f"Failed to load villains.yaml: {e}")
-            return {}
-
     def get_domain(self, url: str) -> str:
         """Extracts the domain key from the URL."""
         url_lower = url.lower()
@@ -54,10 +38,34 @@ class BattleActivity(BaseActivity):
         except Exception:
             return False
 
-    async def perform_fight(self, page: Page):
-        """Clicks the 'Fight!' button and handles the post-battle modal."""
+    @property
+    def direct_actions(self):
+        return {"fight": DirectAction("/ajax/troll_fight", expected_errors=("no_energy",))}
+
+    async def perform_fight(self, page: Page, troll_id=None) -> bool:
+        """
+        Fights the troll directly if enabled, else clicks 'Fight!' and handles the post-battle modal.
+        Returns False when the game refused the fight for lack of energy.
+        """
+        if troll_id is not None:
+            reply = await self.run_direct(page, "fight", id_opponent=troll_id)
+            if reply is not None:
+                logger.info("Fight sent directly", outcome=reply.get("outcome"), error=reply.get("error"))
+                if reply.get("success"):
+                    self.record_fights(page)
+                    return True
+                # The page is not reloaded after direct fights, so its energy bar is stale;
+                # the refusal is the only sign the energy ran out
+                probe = GameStateProbe.get(page)
+                if probe:
+                    probe.observe({"energy": 0})
+                return False
+
+        probe = GameStateProbe.get(page)
+        version = probe.state.version if probe else 0
         fight_btn = page.locator('button:has-text("Fight!")')
-        await HumanUtils.human_click(page, fight_btn)
+        await HumanUtils.human_click(page, fight_btn, submits=True)
+        self.record_fights(page)
 
         # Handle the Victory/Defeat Modal
         try:
@@ -69,18 +77,35 @@ class BattleActivity(BaseActivity):
         except Exception as e:
             logger.warning("Error handling post-battle modal", error=str(e))
 
+        # Let the fight's JSON response land so get_energy reads the new value from memory
+        if probe and await probe.wait_for_update(version):
+            logger.info("Fight outcome", outcome=probe.state.last_outcome)
+        return True
+
     @property
     def path(self) -> str:
         return "/troll-pre-battle.html"
 
+    @property
+    def ready_selector(self) -> str:
+        return '#fight_energy_bar span[energy=""]'
+
+    @property
+    def resource(self) -> str:
+        return "energy"
+
     async def get_energy(self, page: Page) -> int:
+        reading = self.known_resource(page)
+        if reading is not None:
+            return reading.current
+
         # 1. Wait for the container first (it loads before the text)
         try:
             await page.wait_for_selector('.energy_counter', state='visible', timeout=10000)
         except:
             logger.warning("Energy container not found. reloading...")
-            await page.reload()
-            await page.wait_for_load_state("networkidle")
+            await page.reload(wait_until="commit")
+            await self.wait_until_ready(page)
 
         # 2. Attempt to find the specific value span
         try:
@@ -110,8 +135,8 @@ class BattleActivity(BaseActivity):
         logger.info("Domain detected", url=page.url, domain=domain_key)
         base_url = "/".join(page.url.split("/")[:3])
 
-        # b. Load the config/villains.yaml file
-        config = self.load_villain_config()
+        # b. Take config/villains.yaml from the current config snapshot (reloaded when the file changes)
+        config = load_villains()
         if not config:
             logger.warning("Villains config is empty or not found")
             return
@@ -123,8 +148,8 @@ class BattleActivity(BaseActivity):
             return
 
         # d. Iterate through the priority list
-        villains_map = domain_data.get("villains", {})
-        target_list = domain_data.get("priority", [])
+        villains_map = domain_data.ids
+        target_list = domain_data.priority
 
         if not target_list:
             logger.warning(f"No priority list found for {domain_key} in villains.yaml")
@@ -147,24 +172,23 @@ class BattleActivity(BaseActivity):
 
             if page.url != target_url:
                 logger.info("Navigating to target", url=target_url)
-                for attempt in range(3):
-                    try:
-                        await page.goto(target_url, wait_until='networkidle')
-                        break
-                    except Exception as e:
-                        logger.warning(f"Navigation to {target_url} failed (Attempt {attempt+1}/3). Retrying...")
-                        await asyncio.sleep(10)
-                        if attempt == 2: raise e
+                await navigate(page, target_url, ready=self.ready_selector)
                 await HumanUtils.random_jitter()
 
             # Drain energy on this target as long as possible
             while energy > 0:
+                if self.should_yield(page):
+                    return await self.current_resource(page, page.locator('#fight_energy_bar'))
                 if await self.is_fight_possible(page):
                     logger.info("Target Acquired: Engagement possible", domain=domain_key, villain=villain_name, troll_id=villain_id)
-                    await self.perform_fight(page)
-                    energy = await self.get_energy(page)
+                    if await self.perform_fight(page, villain_id):
+                        energy = await self.get_energy(page)
+                    else:
+                        logger.info("Fight refused, out of energy", villain=villain_name)
+                        energy = 0
                 else:
                     logger.info("Target has no reward or fight not possible. Moving to next target.", villain=villain_name)
                     break
 
         logger.info("Battle activity completed")
+        return await self.current_resource(page, page.locator('#fight_energy_bar'))
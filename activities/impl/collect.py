@@ -1,6 +1,8 @@
 from activities.base import BaseActivity
+from utils.direct_actions import DirectAction
 from activities.registry import ActivityRegistry
 from utils.human import HumanUtils
+from utils.navigation import navigate
 from playwright.async_api import Page
 import structlog
 
@@ -12,15 +14,31 @@ class CollectActivity(BaseActivity):
     def path(self) -> str:
         return "/collect"
 
+    @property
+    def url_path(self) -> str:
+        # Collecting happens on the home page
+        return "/home.html"
+
+    @property
+    def direct_actions(self):
+        return {"collect": DirectAction("/ajax/collect", expected_errors=("nothing_to_collect",))}
+
+    @property
+    def ready_selector(self) -> str:
+        # The collect button only exists when there is something to collect
+        return "#collect_all, div[title='DarkKnight']"
+
     async def execute(self, page: Page):
         logger.info("Collect activity started", url=page.url)
-        # Navigate to home.html as per logic
-        domain = "/".join(page.url.split("/")[:3])
-        await page.goto(f"{domain}/home.html")
+        # execute_activity has already opened home.html; only the URL-driven runner has not
+        if not page.url.endswith("/home.html"):
+            domain = "/".join(page.url.split("/")[:3])
+            await navigate(page, f"{domain}/home.html", ready=self.ready_selector)
 
         collect_btn = page.locator("#collect_all")
         if await collect_btn.is_visible():
-            await HumanUtils.human_click(page, collect_btn)
+            if await self.run_direct(page, "collect") is None:
+                await HumanUtils.human_click(page, collect_btn, submits=True)
             await HumanUtils.random_jitter()
             logger.info("Collected all items")
         else:
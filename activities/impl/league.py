@@ -1,6 +1,9 @@
 from activities.base import BaseActivity
 from activities.registry import ActivityRegistry
 from utils.human import HumanUtils
+from utils.navigation import navigate
+from utils.direct_actions import DirectAction
+from utils.table import extract_rows, parse_number
 from playwright.async_api import Page
 import structlog
 import urllib.parse
@@ -13,15 +16,34 @@ class LeagueActivity(BaseActivity):
     def path(self) -> str:
         return "/leagues.html"
 
+    @property
+    def ready_selector(self) -> str:
+        return '.go_pre_battle'
+
+    @property
+    def resource(self) -> str:
+        return "challenge_points"
+
+    @property
+    def direct_actions(self):
+        return {"x3": DirectAction("/ajax/league_fight", expected_errors=("no_challenge_points",))}
+
+    # Opponent rows are the elements that directly hold a power column
+    ROW_SELECTOR = "*:has(> div.data-column[column='power'])"
+    COLUMNS = {"power": "div.data-column[column='power']", "level": "div.data-column[column='level']"}
+
     async def execute(self, page: Page):
         logger.info("League activity started", url=page.url)
 
         domain_url = "/".join(page.url.split("/")[:3])
         league_url = f"{domain_url}/leagues.html"
+        fought = set()  # Opponents hit with a direct x3; the table may still list them
 
         while True:
+            if self.should_yield(page):
+                break
             if page.url != league_url:
-                await page.goto(league_url, wait_until='networkidle')
+                await navigate(page, league_url, ready=self.ready_selector)
 
             # Stale Element Protection: Wait for points and go_pre_battle buttons
             try:
@@ -32,12 +54,16 @@ class LeagueActivity(BaseActivity):
                 break
 
             # Guard Logic
-            try:
-                points_text = await page.locator('.challenge_points span[energy=""]').inner_text()
-                points = int(points_text.replace(',', '').strip())
-            except Exception:
-                logger.warning("Could not determine challenge points, assuming 0")
-                points = 0
+            reading = self.known_resource(page)
+            if reading is not None:
+                points = reading.current
+            else:
+                try:
+                    points_text = await page.locator('.challenge_points span[energy=""]').inner_text()
+                    points = int(points_text.replace(',', '').strip())
+                except Exception:
+                    logger.warning("Could not determine challenge points, assuming 0")
+                    points = 0
 
             if points < 3:
                 logger.info("Not enough Challenge Points (need 3 for x3 attack)", current=points)
@@ -45,37 +71,36 @@ class LeagueActivity(BaseActivity):
 
             # Smart Targeting
             try:
-                power_locators = page.locator("div.data-column[column='power']")
-                count = await power_locators.count()
-
-                if count == 0:
+                rows = await extract_rows(page, self.ROW_SELECTOR, self.COLUMNS, action_selector=".go_pre_battle",
+                                          attributes=["data-opponent"])
+                if not rows:
                     logger.warning("No opponents found in league table")
                     break
 
-                min_power = float('inf')
-                best_index = -1
-
-                for i in range(count):
-                    power_text = await power_locators.nth(i).inner_text()
-                    try:
-                        power = int(power_text.replace(',', '').strip())
-                        logger.info("Checking league opponent", index=i, power=power)
-                        if power < min_power:
-                            min_power = power
-                            best_index = i
-                    except ValueError:
-                        continue
-
-                if best_index != -1:
-                    logger.info("Targeting lowest power opponent", power=min_power, index=best_index, current_points=points)
-                    target_power_locator = power_locators.nth(best_index)
-                    target_row = target_power_locator.locator("xpath=./ancestor::*[contains(@class, 'row') or contains(@class, 'container') or contains(@class, 'opponent')][1]")
-                    go_btn = target_row.locator(".go_pre_battle")
-
-                    if await go_btn.is_visible():
-                        await HumanUtils.human_click(page, go_btn)
-                    else:
-                        await HumanUtils.human_click(page, page.locator(".go_pre_battle").nth(best_index))
+                candidates = [r for r in rows if r.number("power") is not None
+                              and parse_number(r.attributes.get("data-opponent")) not in fought]
+                if candidates:
+                    target = min(candidates, key=lambda r: r.number("power"))
+                    logger.info("Targeting lowest power opponent", power=target.number("power"),
+                                level=target.number("level"), index=target.index, current_points=points,
+                                opponents=len(rows))
+
+                    opponent_id = parse_number(target.attributes.get("data-opponent"))
+                    if opponent_id is not None:
+                        reply = await self.run_direct(page, "x3", id_opponent=opponent_id, battles=3)
+                        if reply is not None:
+                            logger.info("League x3 sent directly", outcome=reply.get("outcome"), error=reply.get("error"))
+                            if not reply["success"]:
+                                break
+                            self.record_fights(page, 3)
+                            fought.add(opponent_id)
+                            await HumanUtils.random_jitter()
+                            # The table on screen predates the fight; reload it before picking again
+                            await navigate(page, league_url, ready=self.ready_selector)
+                            continue
+
+                    go_btn = target.action or page.locator(".go_pre_battle").nth(target.index)
+                    await HumanUtils.human_click(page, go_btn)
                     await HumanUtils.random_jitter()
                 else:
                     break
@@ -87,7 +112,8 @@ class LeagueActivity(BaseActivity):
             x3_battle_btn = page.locator(".league-multiple-battle-button")
             try:
                 await x3_battle_btn.wait_for(state="visible", timeout=10000)
-                await HumanUtils.human_click(page, x3_battle_btn)
+                await HumanUtils.human_click(page, x3_battle_btn, submits=True)
+                self.record_fights(page, 3)
                 await HumanUtils.random_jitter()
             except Exception:
                 logger.error("League x3 battle button not found")
@@ -105,3 +131,4 @@ class LeagueActivity(BaseActivity):
                 break
 
         logger.info("League activity completed")
+        return await self.current_resource(page, page.locator('.challenge_points'))
@@ -1,23 +1,94 @@
+from typing import Optional, Tuple
 from activities.base import BaseActivity
 from activities.registry import ActivityRegistry
+from activities.scoring import HeroStats, OpponentStats, Scorer, ScorerRegistry
+from utils.config_loader import load_config
 from utils.human import HumanUtils
+from utils.table import extract_rows, parse_number
 from playwright.async_api import Page
 import structlog
 import urllib.parse
 
 logger = structlog.get_logger()
 
+# Reads the hero's own level and damage (outside the opponent cards) in one evaluation
+_HERO_STATS_JS = """
+() => {
+    const own = selector => [...document.querySelectorAll(selector)]
+        .find(el => !el.closest('.season_arena_opponent_container'));
+    const text = el => el ? el.innerText : null;
+    return {
+        level: text(own('.player_level, .hero_level, .level')),
+        damage: text(own("[data-hero-carac='damage']")),
+    };
+}
+"""
+
 @ActivityRegistry.register
 class SeasonActivity(BaseActivity):
+    OPPONENT_SELECTOR = ".season_arena_opponent_container"
+    COLUMNS = {
+        "level": ".level",
+        "damage": "[data-hero-carac='damage']",
+        "reward": ".slot_victory_points",
+    }
+
+    DEFAULT_SCORER = "expected_reward"
+
+    def scoring(self) -> Tuple[Scorer, float]:
+        """
+        The scorer and minimum score from the current config, read on every run
+        so reloads apply. Opponents scoring at or below the minimum are not worth a kiss.
+        """
+        season_cfg = load_config().get("season", {}) or {}
+        name = season_cfg.get("scoring", self.DEFAULT_SCORER)
+        try:
+            scorer = ScorerRegistry.get(name)
+        except ValueError as e:
+            logger.warning("Unknown season scorer, using the default", scoring=name, default=self.DEFAULT_SCORER, error=str(e))
+            scorer = ScorerRegistry.get(self.DEFAULT_SCORER)
+        return scorer, season_cfg.get("min_score", 0.0)
+
     @property
     def path(self) -> str:
         return "/season-arena.html"
 
+    @property
+    def resource(self) -> str:
+        return "kisses"
+
+    async def read_hero_stats(self, page: Page) -> Optional[HeroStats]:
+        raw = await page.evaluate(_HERO_STATS_JS)
+        level, damage = parse_number(raw["level"]), parse_number(raw["damage"])
+        if level is None or damage is None:
+            return None
+        return HeroStats(level=level, damage=damage)
+
+    async def read_opponents(self, page: Page):
+        """All opponents' stats in one round trip, paired with their perform buttons."""
+        rows = await extract_rows(page, self.OPPONENT_SELECTOR, self.COLUMNS, action_selector=".opponent_perform_button")
+        opponents = []
+        for row in rows:
+            level, damage = row.number("level"), row.number("damage")
+            if level is None or damage is None or row.action is None:
+                continue
+            opponents.append((OpponentStats(row.index, level, damage, row.number("reward")), row.action))
+        return opponents
+
+    @property
+    def ready_selector(self) -> str:
+        return '.opponent_perform_button'
+
     async def execute(self, page: Page):
         logger.info("Season activity started", url=page.url)
+        scorer, min_score = self.scoring()
+        # Hero stats do not change between fights; read them once per cycle
+        hero = None
 
         while True:
-            await page.wait_for_load_state('networkidle')
+            if self.should_yield(page):
+                break
+            await self.wait_until_ready(page)
 
             # Stale Element Protection: Wait for kiss bar and attack buttons
             try:
@@ -28,13 +99,17 @@ class SeasonActivity(BaseActivity):
                 break
 
             # Guard Logic: Check kisses
-            try:
-                kiss_bar = page.locator('div.energy_counter_bar').filter(has=page.locator('.hudKiss_mix_icn'))
-                kisses_text = await kiss_bar.locator('span[energy=""]').inner_text()
-                kisses = int(kisses_text.replace(',', '').strip())
-            except Exception:
-                logger.warning("Could not determine kisses, assuming 0")
-                kisses = 0
+            reading = self.known_resource(page)
+            if reading is not None:
+                kisses = reading.current
+            else:
+                try:
+                    kiss_bar = page.locator('div.energy_counter_bar').filter(has=page.locator('.hudKiss_mix_icn'))
+                    kisses_text = await kiss_bar.locator('span[energy=""]').inner_text()
+                    kisses = int(kisses_text.replace(',', '').strip())
+                except Exception:
+                    logger.warning("Could not determine kisses, assuming 0")
+                    kisses = 0
 
             if kisses <= 0:
                 logger.info("No Kisses Available", kisses=kisses)
@@ -42,39 +117,30 @@ class SeasonActivity(BaseActivity):
 
             # Smart Targeting
             try:
-                # Get my hero stats
-                my_stats_locator = page.locator("[data-hero-carac='damage']").filter(has_not=page.locator(".season_arena_opponent_container")).first
-                my_damage = int((await my_stats_locator.inner_text()).replace(',', '').strip())
-
-                # Find my level - usually nearby damage or in a specific player info div
-                my_level_locator = page.locator(".player_level, .hero_level, .level").filter(has_not=page.locator(".season_arena_opponent_container")).first
-                my_level = int((await my_level_locator.inner_text()).replace(',', '').strip())
-
-                logger.info("My Hero Stats", damage=my_damage, level=my_level, current_kisses=kisses)
-
-                opponents = await page.locator(".season_arena_opponent_container").all()
-                target_found = False
-                for opponent in opponents:
-                    opp_damage_text = await opponent.locator("[data-hero-carac='damage']").inner_text()
-                    opp_damage = int(opp_damage_text.replace(',', '').strip())
-
-                    opp_level_text = await opponent.locator(".level").inner_text()
-                    opp_level = int(opp_level_text.replace(',', '').strip())
-
-                    logger.info("Checking opponent", damage=opp_damage, level=opp_level)
-
-                    if opp_level < my_level:
-                        logger.info("Target found: Opponent level is lower than mine", opp_level=opp_level, my_level=my_level)
-                        fight_btn = opponent.locator(".opponent_perform_button")
-                        await HumanUtils.human_click(page, fight_btn)
-                        await HumanUtils.random_jitter()
-                        target_found = True
+                if hero is None:
+                    hero = await self.read_hero_stats(page)
+                    if hero is None:
+                        logger.warning("Could not read hero stats")
                         break
+                    logger.info("My Hero Stats", damage=hero.damage, level=hero.level, current_kisses=kisses)
+
+                scored = [(scorer(hero, opponent), opponent, button) for opponent, button in await self.read_opponents(page)]
+                for score, opponent, _ in scored:
+                    logger.info("Checking opponent", index=opponent.index, damage=opponent.damage,
+                                level=opponent.level, reward=opponent.reward, score=round(score, 3))
 
-                if not target_found:
+                # max() keeps the first of equally scored opponents
+                best = max(scored, key=lambda item: item[0], default=None)
+                if best is None or best[0] <= min_score:
                     logger.info("No suitable opponent found")
                     break
 
+                score, target, fight_btn = best
+                logger.info("Target found", index=target.index, level=target.level, score=round(score, 3))
+                await HumanUtils.human_click(page, fight_btn, submits=True)
+                self.record_fights(page)
+                await HumanUtils.random_jitter()
+
             except Exception as e:
                 logger.error("Error during smart targeting", error=str(e))
                 break
@@ -93,3 +159,5 @@ class SeasonActivity(BaseActivity):
             await page.wait_for_selector('.season_arena_opponent_container', state='visible', timeout=15000)
 
         logger.info("Season activity completed")
+        kiss_bar = page.locator('div.energy_counter_bar').filter(has=page.locator('.hudKiss_mix_icn'))
+        return await self.current_resource(page, kiss_bar)
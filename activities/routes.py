@@ -0,0 +1,84 @@
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+from activities.base import BaseActivity
+from activities.registry import TASK_MAPPING, ActivityRegistry
+from utils.config_loader import ConfigSnapshot, config_service
+
+@dataclass(frozen=True)
+class DomainRoute:
+    """A configured domain as the router needs it."""
+    settings: Mapping
+    disabled: FrozenSet[str]
+
+    @property
+    def enabled(self) -> bool:
+        return self.settings.get("enabled", True)
+
+def host_key(url: str) -> str:
+    """The lower-cased host[:port] of a URL; a bare host (no scheme) is taken as is."""
+    return (urlsplit(url).netloc if "://" in url else url.split("/", 1)[0]).lower()
+
+def _path(url_path: str) -> str:
+    path = url_path.split("?", 1)[0].split("#", 1)[0]
+    return path.rstrip("/") or "/"
+
+class RouteTable:
+    """
+    Page URL -> (domain settings, activity), compiled from one config
+    snapshot. Hosts and paths are dict lookups; a page on a subdomain of a
+    configured host (or with a query string) resolves to the same entry.
+    """
+
+    def __init__(self, domains: Iterable[Mapping], activities: Mapping[str, BaseActivity]):
+        self.hosts: Dict[str, DomainRoute] = {}
+        for d in domains:
+            host = host_key(d.get("url", ""))
+            # The first domain listed for a host wins, as the old linear scan did
+            if host and host not in self.hosts:
+                self.hosts[host] = DomainRoute(d, frozenset(d.get("disabled_activities") or ()))
+        self.activities = dict(activities)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: ConfigSnapshot) -> "RouteTable":
+        return cls(snapshot.data.get("domains", ()), registered_activities())
+
+    def domain_for(self, host: str) -> Optional[DomainRoute]:
+        """Exact host first, then each parent of it (one lookup per label)."""
+        host = host.lower()
+        while host:
+            route = self.hosts.get(host)
+            if route:
+                return route
+            _, _, host = host.partition(".")
+        return None
+
+    def activity_for(self, path: str) -> Optional[BaseActivity]:
+        return self.activities.get(_path(path))
+
+    def resolve(self, url: str) -> Tuple[Optional[DomainRoute], str, Optional[BaseActivity]]:
+        parts = urlsplit(url)
+        path = _path(parts.path)
+        return self.domain_for(parts.netloc), path, self.activities.get(path)
+
+def registered_activities() -> Dict[str, BaseActivity]:
+    """
+    Every registered path plus the TASK_MAPPING aliases, which share the
+    instance registered for their class.
+    """
+    activities = dict(ActivityRegistry._registry)
+    by_class = {type(a): a for a in activities.values()}
+    for alias, activity_class in TASK_MAPPING.items():
+        if alias not in activities and activity_class:
+            activities[alias] = by_class.get(activity_class) or activity_class()
+    return activities
+
+_compiled: Tuple[Optional[ConfigSnapshot], Optional[RouteTable]] = (None, None)
+
+def route_table() -> RouteTable:
+    """The table for the current config; recompiled after a config reload."""
+    global _compiled
+    snapshot = config_service().snapshot
+    if _compiled[0] is not snapshot:
+        _compiled = (snapshot, RouteTable.from_snapshot(snapshot))
+    return _compiled[1]
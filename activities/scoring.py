@@ -0,0 +1,55 @@
+import math
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+@dataclass
+class HeroStats:
+    level: int
+    damage: int
+
+@dataclass
+class OpponentStats:
+    index: int
+    level: int
+    damage: int
+    reward: Optional[int] = None  # Points shown for a win, if the page shows them
+
+# Maps (hero, opponent) to a score; the highest-scoring opponent is fought
+Scorer = Callable[[HeroStats, OpponentStats], float]
+
+class ScorerRegistry:
+    _registry: Dict[str, Scorer] = {}
+
+    @classmethod
+    def register(cls, name: str):
+        """Function decorator registering a scorer under `name`."""
+        def decorator(func: Scorer) -> Scorer:
+            cls._registry[name] = func
+            return func
+        return decorator
+
+    @classmethod
+    def get(cls, name: str) -> Scorer:
+        if name not in cls._registry:
+            raise ValueError(f"Unknown scorer '{name}', expected one of {sorted(cls._registry)}")
+        return cls._registry[name]
+
+def win_probability(hero: HeroStats, opponent: OpponentStats) -> float:
+    """
+    Rough chance of winning: a logistic curve on the damage ratio, shifted by
+    the level difference (each level is worth about 2% of damage).
+    """
+    ratio = hero.damage / max(opponent.damage, 1)
+    edge = (ratio - 1) + 0.02 * (hero.level - opponent.level)
+    return 1 / (1 + math.exp(-8 * edge))
+
+@ScorerRegistry.register("expected_reward")
+def expected_reward(hero: HeroStats, opponent: OpponentStats) -> float:
+    """Expected points per kiss; every fight costs one kiss."""
+    reward = opponent.reward if opponent.reward is not None else 1
+    return reward * win_probability(hero, opponent)
+
+@ScorerRegistry.register("lower_level")
+def lower_level(hero: HeroStats, opponent: OpponentStats) -> float:
+    """The original rule: any opponent below the hero's level, first one wins ties."""
+    return 1.0 if opponent.level < hero.level else 0.0
@@ -0,0 +1,64 @@
+import argparse
+import asyncio
+import json
+
+from benchmark.harness import quiet_logs, run_benchmark
+
+def main():
+    parser = argparse.ArgumentParser(description="Run orchestrator cycles against the local fake game server.")
+    parser.add_argument("--domains", type=int, default=4, help="Number of fake domains")
+    parser.add_argument("--cycles", type=int, default=1, help="Number of full cycles to run")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Latency added to every response")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Random extra latency per response")
+    parser.add_argument("--jitter-scale", type=float, default=0.0,
+                        help="Multiplier for HumanUtils delays (1 = production timing)")
+    parser.add_argument("--wait-strategy", choices=["ready", "networkidle", "both"], default="ready",
+                        help="Navigation readiness; 'both' runs each and reports the time saved per navigation")
+    parser.add_argument("--beacons", type=int, default=6, help="Analytics requests each fake page sends after load")
+    parser.add_argument("--no-blocking", action="store_true", help="Disable the request blocking policy")
+    parser.add_argument("--no-asset-cache", action="store_true", help="Disable the shared static asset cache")
+    parser.add_argument("--no-context-pool", action="store_true", help="Rebuild every domain's context each cycle")
+    parser.add_argument("--direct-actions", action="store_true",
+                        help="Send fights, league x3 and collects as action requests instead of UI clicks")
+    parser.add_argument("--max-pages", type=int, default=1,
+                        help="Pages per domain for running independent activities concurrently")
+    parser.add_argument("--headed", action="store_true", help="Show the browser")
+    parser.add_argument("--verbose", action="store_true", help="Keep bot INFO logs")
+    parser.add_argument("--json", help="Write the raw samples to this file")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        quiet_logs()
+
+    strategies = ["networkidle", "ready"] if args.wait_strategy == "both" else [args.wait_strategy]
+    reports = []
+    for strategy in strategies:
+        report = asyncio.run(run_benchmark(
+            domains=args.domains,
+            cycles=args.cycles,
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            jitter_scale=args.jitter_scale,
+            block_requests=not args.no_blocking,
+            headless=not args.headed,
+            wait_strategy=strategy,
+            beacons=args.beacons,
+            asset_cache=not args.no_asset_cache,
+            context_pool=not args.no_context_pool,
+            direct=args.direct_actions,
+            max_pages=args.max_pages,
+        ))
+        print(report.summary())
+        print()
+        reports.append(report)
+
+    if len(reports) == 2:
+        saved = reports[0].navigation_stats.average_seconds - reports[1].navigation_stats.average_seconds
+        print(f"Readiness selectors save {saved:.3f}s per navigation on average")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([r.to_dict() for r in reports], f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,491 @@
+"""
+Local stand-in for the game sites.
+
+Serves the handful of pages the activities touch (home, troll battle, season
+arena, leagues) with the same selectors as the live sites, working resource
+counters, the login iframe and injectable latency. Every domain is served by
+the same app; the Host header selects the per-domain game state, so domains
+are reached as e.g. http://manga.localhost:<port>.
+"""
+import asyncio
+import hashlib
+import random
+import time
+from dataclasses import dataclass, field
+from string import Template
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, Response
+
+SESSION_COOKIE = "fake_session"
+AGE_COOKIE = "age_verified"
+
+@dataclass
+class Counter:
+    """A regenerating game resource (energy, kisses, challenge points)."""
+    value: int
+    maximum: int
+    regen_seconds: float
+    updated_at: float = field(default_factory=time.time)
+
+    def current(self) -> int:
+        if self.value >= self.maximum:
+            return self.value
+        gained = int((time.time() - self.updated_at) // self.regen_seconds)
+        return min(self.maximum, self.value + gained)
+
+    def seconds_to_next(self) -> int:
+        if self.current() >= self.maximum:
+            return 0
+        elapsed = (time.time() - self.updated_at) % self.regen_seconds
+        return int(self.regen_seconds - elapsed)
+
+    def spend(self, amount: int = 1) -> bool:
+        now_value = self.current()
+        if now_value < amount:
+            return False
+        # Keep the partial regeneration progress when spending
+        if now_value < self.maximum:
+            progress = (time.time() - self.updated_at) % self.regen_seconds
+            self.updated_at = time.time() - progress
+        else:
+            self.updated_at = time.time()
+        self.value = now_value - amount
+        return True
+
+@dataclass
+class Opponent:
+    id: int
+    level: int
+    damage: int
+    power: int
+    reward: int = 0
+
+@dataclass
+class DomainGame:
+    """Game state for a single fake domain."""
+    name: str
+    seed: int = 0
+    hero_level: int = 30
+    hero_damage: int = 1200
+    energy: Counter = field(default_factory=lambda: Counter(5, 20, 360))
+    kisses: Counter = field(default_factory=lambda: Counter(3, 10, 1800))
+    challenge_points: Counter = field(default_factory=lambda: Counter(6, 15, 2100))
+    collectible: bool = True
+    reward_trolls: List[int] = field(default_factory=lambda: [1, 2, 3])
+    league_size: int = 20
+    sessions: set = field(default_factory=set)
+    season_opponents: List[Opponent] = field(default_factory=list)
+    league_opponents: List[Opponent] = field(default_factory=list)
+    fights: int = 0
+
+    def __post_init__(self):
+        self.rng = random.Random(f"{self.name}:{self.seed}")
+        self.roll_season_opponents()
+        self.league_opponents = [self._opponent(i) for i in range(1, self.league_size + 1)]
+
+    def _opponent(self, opponent_id: int) -> Opponent:
+        level = self.hero_level + self.rng.randint(-5, 5)
+        damage = self.hero_damage + self.rng.randint(-300, 300)
+        return Opponent(opponent_id, level, damage, damage * 10 + self.rng.randint(0, 999), self.rng.randint(10, 40))
+
+    def roll_season_opponents(self):
+        self.season_opponents = [self._opponent(i) for i in range(1, 4)]
+
+    def resources(self) -> dict:
+        return {
+            "energy": self.energy.current(),
+            "kisses": self.kisses.current(),
+            "challenge_points": self.challenge_points.current(),
+        }
+
+class FakeGame:
+    """Holds the per-domain game state served by the fake app."""
+
+    def __init__(self, domains: Optional[List[str]] = None, seed: int = 0):
+        self.seed = seed
+        self.domains: Dict[str, DomainGame] = {}
+        for name in domains or []:
+            self.add_domain(name)
+
+    def add_domain(self, name: str) -> DomainGame:
+        self.domains[name] = DomainGame(name=name, seed=self.seed)
+        return self.domains[name]
+
+    def for_host(self, host: str) -> DomainGame:
+        name = host.split(".")[0]
+        if name not in self.domains:
+            self.add_domain(name)
+        return self.domains[name]
+
+    def reset_counters(self):
+        """Restores starting resources so every benchmark cycle does the same work."""
+        for name, domain in self.domains.items():
+            sessions = domain.sessions
+            self.domains[name] = DomainGame(name=name, seed=self.seed)
+            self.domains[name].sessions = sessions
+
+LAYOUT = Template("""<!doctype html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>$title</title>
+<link rel="stylesheet" href="/assets/css/game.css">
+<link rel="preload" href="/assets/fonts/game.woff2" as="font" type="font/woff2" crossorigin>
+<script src="/assets/js/game.js"></script>
+<script src="/analytics/track.js" async></script>
+</head>
+<body>
+<div id="header">$header</div>
+<div id="content">$content</div>
+<div id="common-popups">$age_gate</div>
+<div class="popup_container" id="popup" style="display:none">
+  <div class="popup_body"></div>
+  <button class="orange_button_L" onclick="closePopup()">OK</button>
+</div>
+<img src="/assets/img/background.png" alt="">
+<img src="/assets/img/avatar.png" alt="">
+<script>
+async function post(url, body) {
+  const response = await fetch(url, {
+    method: 'POST',
+    headers: {'Content-Type': 'application/json'},
+    body: JSON.stringify(body || {})
+  });
+  return response.json();
+}
+function showPopup(text) {
+  const popup = document.getElementById('popup');
+  popup.querySelector('.popup_body').textContent = text;
+  popup.style.display = 'block';
+}
+function closePopup() {
+  document.getElementById('popup').style.display = 'none';
+  if (window.afterPopup) { window.afterPopup(); }
+}
+function setCounter(selector, value) {
+  const node = document.querySelector(selector);
+  if (node) { node.textContent = value.toLocaleString('en-US'); }
+}
+$script
+</script>
+</body>
+</html>
+""")
+
+AGE_GATE = """<div class="age-verification">
+  <p>This game is for adults only.</p>
+  <button onclick="document.cookie='age_verified=1; path=/'; this.parentNode.style.display='none'">Enter</button>
+</div>"""
+
+AUTH_PAGE = """<!doctype html>
+<html>
+<body>
+<form method="post" action="/auth/login">
+  <label for="email">E-mail</label>
+  <input id="email" type="email" name="email">
+  <label for="password">Password</label>
+  <input id="password" type="password" name="password">
+  <button type="submit">Play Now</button>
+</form>
+</body>
+</html>
+"""
+
+def _format(value: int) -> str:
+    return f"{value:,}"
+
+def _energy_bar(css_class: str, icon: str, counter: Counter) -> str:
+    seconds = counter.seconds_to_next()
+    return (
+        f'<div class="{css_class}">'
+        f'<span class="{icon}"></span>'
+        f'<span energy="">{_format(counter.current())}</span>/'
+        f'<span energy-max="">{_format(counter.maximum)}</span>'
+        f'<span rel="increment_txt" data-seconds="{seconds}">{seconds // 60}m {seconds % 60}s</span>'
+        f'</div>'
+    )
+
+def _header(game: DomainGame, logged_in: bool) -> str:
+    if not logged_in:
+        return '<a href="#" id="login_link" onclick="openAuth(); return false;">Login</a>'
+    return f'<div class="hero_info" title="DarkKnight">DarkKnight</div><span class="hero_level">{game.hero_level}</span>'
+
+def _page(title: str, game: DomainGame, logged_in: bool, content: str = "", script: str = "",
+          age_gate: bool = False) -> HTMLResponse:
+    html = LAYOUT.substitute(
+        title=title,
+        header=_header(game, logged_in),
+        content=content,
+        age_gate=AGE_GATE if age_gate else "",
+        script=script,
+    )
+    return HTMLResponse(html)
+
+def _asset_bytes(name: str, size: int) -> bytes:
+    """Deterministic filler content so asset sizes and hashes are stable."""
+    seed = hashlib.sha256(name.encode()).digest()
+    return (seed * (size // len(seed) + 1))[:size]
+
+def create_app(game: Optional[FakeGame] = None, latency_ms: float = 0, jitter_ms: float = 0,
+               asset_kb: int = 256, beacons: int = 0, beacon_interval_ms: int = 300) -> FastAPI:
+    """
+    Builds the fake game app. latency_ms/jitter_ms delay every response to
+    imitate a remote site; asset_kb controls the size of the JS bundle.
+    beacons makes every page send that many analytics requests after load,
+    which keeps the network busy like the live sites' trackers do.
+    """
+    game = game or FakeGame()
+    app = FastAPI(title="Fake Game Server")
+    app.state.game = game
+    app.state.latency_ms = latency_ms
+    app.state.jitter_ms = jitter_ms
+
+    @app.middleware("http")
+    async def inject_latency(request: Request, call_next):
+        delay = app.state.latency_ms + random.uniform(0, app.state.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        return await call_next(request)
+
+    def domain_for(request: Request) -> DomainGame:
+        return game.for_host(request.url.hostname or "default")
+
+    def is_logged_in(request: Request, domain: DomainGame) -> bool:
+        return request.cookies.get(SESSION_COOKIE) in domain.sessions
+
+    @app.get("/", response_class=HTMLResponse)
+    async def landing(request: Request):
+        domain = domain_for(request)
+        logged_in = is_logged_in(request, domain)
+        return _page("Welcome", domain, logged_in, '<a href="/home.html">Play</a>',
+                     script=LOGIN_SCRIPT, age_gate=not logged_in and AGE_COOKIE not in request.cookies)
+
+    @app.get("/home.html", response_class=HTMLResponse)
+    async def home(request: Request):
+        domain = domain_for(request)
+        logged_in = is_logged_in(request, domain)
+        content = ""
+        if logged_in and domain.collectible:
+            content = '<button id="collect_all" onclick="collectAll()">Collect all</button>'
+        return _page("Home", domain, logged_in, content, script=LOGIN_SCRIPT + HOME_SCRIPT,
+                     age_gate=not logged_in and AGE_COOKIE not in request.cookies)
+
+    @app.get("/auth.html", response_class=HTMLResponse)
+    async def auth_page():
+        return HTMLResponse(AUTH_PAGE)
+
+    @app.post("/auth/login")
+    async def auth_login(request: Request):
+        domain = domain_for(request)
+        token = hashlib.sha256(f"{domain.name}:{time.time()}:{random.random()}".encode()).hexdigest()
+        domain.sessions.add(token)
+        response = HTMLResponse("<script>window.top.location.href = '/home.html';</script>")
+        response.set_cookie(SESSION_COOKIE, token, max_age=86400, path="/")
+        return response
+
+    @app.get("/troll-pre-battle.html", response_class=HTMLResponse)
+    async def troll_pre_battle(request: Request, id_opponent: int = 1):
+        domain = domain_for(request)
+        if not is_logged_in(request, domain):
+            return RedirectResponse("/home.html")
+        girl = '<div class="girl_ico"></div>' if id_opponent in domain.reward_trolls else ""
+        content = (
+            f'<div id="fight_energy_bar">{_energy_bar("energy_counter", "hudEnergy_mix_icn", domain.energy)}</div>'
+            f'<div class="troll" data-id="{id_opponent}">{girl}'
+            f'<button class="blue_button_L" onclick="fight({id_opponent})">Fight!</button></div>'
+        )
+        return _page("Troll Battle", domain, True, content, script=TROLL_SCRIPT)
+
+    @app.get("/season-arena.html", response_class=HTMLResponse)
+    async def season_arena(request: Request):
+        domain = domain_for(request)
+        if not is_logged_in(request, domain):
+            return RedirectResponse("/home.html")
+        opponents = "".join(
+            f'<div class="season_arena_opponent_container" data-opponent="{o.id}">'
+            f'<span class="level">{o.level}</span>'
+            f'<span data-hero-carac="damage">{_format(o.damage)}</span>'
+            f'<div class="slot_victory_points">{o.reward}</div>'
+            f'<button class="opponent_perform_button" onclick="seasonFight({o.id})">Perform</button>'
+            f'</div>'
+            for o in domain.season_opponents
+        )
+        content = (
+            _energy_bar("energy_counter_bar", "hudKiss_mix_icn", domain.kisses)
+            + f'<div class="season_hero"><span class="player_level">{domain.hero_level}</span>'
+            f'<span data-hero-carac="damage">{_format(domain.hero_damage)}</span></div>'
+            + f'<div class="season_arena_opponents">{opponents}</div>'
+        )
+        return _page("Season Arena", domain, True, content, script=SEASON_SCRIPT)
+
+    @app.get("/leagues.html", response_class=HTMLResponse)
+    async def leagues(request: Request):
+        domain = domain_for(request)
+        if not is_logged_in(request, domain):
+            return RedirectResponse("/home.html")
+        rows = "".join(
+            f'<div class="data-row body-row" data-opponent="{o.id}">'
+            f'<div class="data-column" column="level">{o.level}</div>'
+            f'<div class="data-column" column="power">{_format(o.power)}</div>'
+            f'<div class="data-column" column="team"><button class="go_pre_battle" '
+            f'onclick="location.href=\'/leagues-pre-battle.html?id_opponent={o.id}\'">Go</button></div>'
+            f'</div>'
+            for o in domain.league_opponents
+        )
+        content = (
+            f'<div class="challenge_points">{_energy_bar("energy_counter", "hudChallenge_mix_icn", domain.challenge_points)}</div>'
+            f'<div class="league_table">{rows}</div>'
+        )
+        return _page("Leagues", domain, True, content)
+
+    @app.get("/leagues-pre-battle.html", response_class=HTMLResponse)
+    async def league_pre_battle(request: Request, id_opponent: int = 1):
+        domain = domain_for(request)
+        if not is_logged_in(request, domain):
+            return RedirectResponse("/home.html")
+        content = (
+            f'<button class="league-single-battle-button" onclick="leagueFight({id_opponent}, 1)">x1</button>'
+            f'<button class="league-multiple-battle-button" onclick="leagueFight({id_opponent}, 3)">x3</button>'
+        )
+        return _page("League Battle", domain, True, content, script=LEAGUE_SCRIPT)
+
+    @app.post("/ajax/collect")
+    async def ajax_collect(request: Request):
+        domain = domain_for(request)
+        if not is_logged_in(request, domain):
+            return JSONResponse({"success": False, "error": "not_logged_in"}, status_code=403)
+        collected = domain.collectible
+        domain.collectible = False
+        if not collected:
+            return {"success": False, "error": "nothing_to_collect", "resources": domain.resources()}
+        return {"success": True, "resources": domain.resources()}
+
+    @app.post("/ajax/troll_fight")
+    async def ajax_troll_fight(request: Request):
+        domain = domain_for(request)
+        if not is_logged_in(request, domain):
+            return JSONResponse({"success": False, "error": "not_logged_in"}, status_code=403)
+        if not domain.energy.spend(1):
+            return {"success": False, "error": "no_energy", "resources": domain.resources()}
+        domain.fights += 1
+        return {"success": True, "outcome": "victory", "resources": domain.resources(),
+                "energy_regen_seconds": domain.energy.seconds_to_next()}
+
+    @app.post("/ajax/season_fight")
+    async def ajax_season_fight(request: Request):
+        domain = domain_for(request)
+        if not is_logged_in(request, domain):
+            return JSONResponse({"success": False, "error": "not_logged_in"}, status_code=403)
+        if not domain.kisses.spend(1):
+            return {"success": False, "error": "no_kisses", "resources": domain.resources()}
+        domain.fights += 1
+        domain.roll_season_opponents()
+        return {"success": True, "outcome": "victory", "resources": domain.resources(),
+                "kisses_regen_seconds": domain.kisses.seconds_to_next()}
+
+    @app.post("/ajax/league_fight")
+    async def ajax_league_fight(request: Request):
+        domain = domain_for(request)
+        if not is_logged_in(request, domain):
+            return JSONResponse({"success": False, "error": "not_logged_in"}, status_code=403)
+        payload = await request.json()
+        battles = int(payload.get("battles", 1))
+        if not domain.challenge_points.spend(battles):
+            return {"success": False, "error": "no_challenge_points", "resources": domain.resources()}
+        domain.fights += battles
+        return {"success": True, "outcome": "victory", "battles": battles, "resources": domain.resources(),
+                "challenge_points_regen_seconds": domain.challenge_points.seconds_to_next()}
+
+    @app.get("/analytics/track.js")
+    async def analytics_script():
+        script = TRACKER_SCRIPT.substitute(beacons=beacons, interval=beacon_interval_ms) if beacons else ""
+        return Response(script, media_type="application/javascript")
+
+    @app.post("/analytics/collect")
+    async def analytics_collect():
+        return Response(status_code=204)
+
+    @app.get("/assets/js/{name}")
+    async def asset_js(request: Request, name: str):
+        body = b"/* fake game bundle */\n" + _asset_bytes(name, asset_kb * 512).hex().encode()
+        return _static(request, body, "application/javascript")
+
+    @app.get("/assets/css/{name}")
+    async def asset_css(request: Request, name: str):
+        body = b"body { font-family: sans-serif; }\n/*" + _asset_bytes(name, 16 * 1024).hex().encode() + b"*/"
+        return _static(request, body, "text/css")
+
+    @app.get("/assets/fonts/{name}")
+    async def asset_font(request: Request, name: str):
+        body = _asset_bytes(name, 48 * 1024)
+        return _static(request, body, "font/woff2")
+
+    @app.get("/assets/img/{name}")
+    async def asset_img(request: Request, name: str):
+        body = _asset_bytes(name, 64 * 1024)
+        return _static(request, body, "image/png")
+
+    return app
+
+def _static(request: Request, body: bytes, media_type: str) -> Response:
+    """Serves a static asset with cache headers, answering conditional requests with 304."""
+    headers = {
+        "Cache-Control": "public, max-age=86400",
+        "ETag": f'"{hashlib.sha256(body).hexdigest()[:16]}"',
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type=media_type, headers=headers)
+
+TRACKER_SCRIPT = Template("""
+(function () {
+  let sent = 0;
+  const timer = setInterval(function () {
+    fetch('/analytics/collect?n=' + sent, {method: 'POST', keepalive: true});
+    if (++sent >= $beacons) { clearInterval(timer); }
+  }, $interval);
+})();
+""")
+
+LOGIN_SCRIPT = """
+function openAuth() {
+  if (document.getElementById('authentication-iframe')) { return; }
+  const frame = document.createElement('iframe');
+  frame.id = 'authentication-iframe';
+  frame.src = '/auth.html';
+  document.getElementById('header').appendChild(frame);
+}
+"""
+
+HOME_SCRIPT = """
+async function collectAll() {
+  const button = document.getElementById('collect_all');
+  await post('/ajax/collect');
+  button.style.display = 'none';
+}
+"""
+
+TROLL_SCRIPT = """
+async function fight(id) {
+  const data = await post('/ajax/troll_fight', {id_opponent: id});
+  setCounter('#fight_energy_bar span[energy=""]', data.resources.energy);
+  showPopup(data.success ? 'Victory!' : 'Not enough energy');
+}
+"""
+
+SEASON_SCRIPT = """
+async function seasonFight(id) {
+  const data = await post('/ajax/season_fight', {id_opponent: id});
+  showPopup(data.success ? 'Victory!' : 'Not enough kisses');
+  window.afterPopup = function () { location.reload(); };
+}
+"""
+
+LEAGUE_SCRIPT = """
+async function leagueFight(id, battles) {
+  const data = await post('/ajax/league_fight', {id_opponent: id, battles: battles});
+  showPopup(data.success ? 'Victory!' : 'Not enough challenge points');
+}
+"""
@@ -0,0 +1,353 @@
+"""
+End-to-end cycle benchmark.
+
+Starts the fake game server, points a throw-away config at N fake domains and
+drives the real orchestrator path (main.run_domain_sequence ->
+AsyncSessionManager -> ActivityRegistry -> activities/impl) against it,
+recording wall time, navigations and CPU/RSS per activity and per cycle.
+"""
+import asyncio
+import logging
+import os
+import shutil
+import socket
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+import uvicorn
+import yaml
+
+import main
+from benchmark.fake_server import FakeGame, create_app
+from utils import blocking, direct_actions, navigation, procstats
+from utils.asset_cache import AssetCache
+from utils.config_loader import load_config
+from utils.human import HumanUtils
+from utils.session_manager import AsyncSessionManager
+from utils.session_store import session_store
+from utils.state import state_manager
+
+BASE_DOMAINS = ["manga", "comic", "stars", "hero"]
+
+VILLAINS = {
+    "manga": {"villains": {"jeshtar": 1, "troll_hound": 3}, "priority": ["jeshtar", "troll_hound"]},
+    "comic": {"villains": {"clown": 1}, "priority": ["clown"]},
+    "stars": {"villains": {"fanboy": 1}, "priority": ["fanboy"]},
+    "hero": {"villains": {"henchman": 1}, "priority": ["henchman"]},
+}
+
+@dataclass
+class ActivitySample:
+    cycle: int
+    domain: str
+    activity: str
+    wall_seconds: float
+    navigations: int
+    cpu_seconds: float
+    rss_bytes: int
+    ok: bool
+
+@dataclass
+class CycleSample:
+    cycle: int
+    wall_seconds: float
+    navigations: int
+    cpu_seconds: float
+    rss_bytes: int
+
+@dataclass
+class BenchmarkReport:
+    domains: int
+    latency_ms: float
+    wait_strategy: str = "ready"
+    navigation_stats: navigation.NavigationStats = field(default_factory=navigation.NavigationStats)
+    activities: List[ActivitySample] = field(default_factory=list)
+    cycles: List[CycleSample] = field(default_factory=list)
+    blocking: Dict[str, Dict[str, dict]] = field(default_factory=dict)
+    asset_cache: Optional[dict] = None
+    direct_actions: Optional[dict] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def summary(self) -> str:
+        lines = [
+            f"Benchmark: {self.domains} domain(s), {len(self.cycles)} cycle(s), latency {self.latency_ms}ms, "
+            f"wait strategy {self.wait_strategy}",
+            f"Navigations: {self.navigation_stats.count}, avg {self.navigation_stats.average_seconds:.3f}s, "
+            f"networkidle fallbacks {self.navigation_stats.fallbacks}",
+            "",
+        ]
+        lines.append(f"{'activity':<26}{'runs':>6}{'fail':>6}{'wall avg s':>12}{'wall max s':>12}{'navs avg':>10}{'cpu avg s':>11}{'rss max MB':>12}")
+        by_activity: Dict[str, List[ActivitySample]] = {}
+        for sample in self.activities:
+            by_activity.setdefault(sample.activity, []).append(sample)
+        for activity, samples in by_activity.items():
+            lines.append(
+                f"{activity:<26}{len(samples):>6}{sum(not s.ok for s in samples):>6}"
+                f"{statistics.mean(s.wall_seconds for s in samples):>12.2f}"
+                f"{max(s.wall_seconds for s in samples):>12.2f}"
+                f"{statistics.mean(s.navigations for s in samples):>10.1f}"
+                f"{statistics.mean(s.cpu_seconds for s in samples):>11.2f}"
+                f"{max(s.rss_bytes for s in samples) / 2**20:>12.1f}"
+            )
+        lines.append("")
+        lines.append(f"{'cycle':<26}{'wall s':>12}{'navs':>10}{'cpu s':>11}{'rss MB':>12}")
+        for cycle in self.cycles:
+            lines.append(
+                f"{cycle.cycle:<26}{cycle.wall_seconds:>12.2f}{cycle.navigations:>10}"
+                f"{cycle.cpu_seconds:>11.2f}{cycle.rss_bytes / 2**20:>12.1f}"
+            )
+        if self.blocking:
+            lines.append("")
+            columns = ("requests_allowed", "bytes_allowed", "requests_blocked", "bytes_blocked")
+            lines.append(f"{'requests (all domains)':<26}{'allowed':>10}{'KB':>10}{'blocked':>10}{'~KB':>10}")
+            totals: Dict[str, List[int]] = {}
+            for activities in self.blocking.values():
+                for activity, c in activities.items():
+                    row = totals.setdefault(activity, [0] * len(columns))
+                    for i, column in enumerate(columns):
+                        row[i] += c[column]
+            for activity, (allowed, allowed_bytes, blocked, blocked_bytes) in totals.items():
+                lines.append(f"{activity:<26}{allowed:>10}{allowed_bytes / 1024:>10.1f}{blocked:>10}{blocked_bytes / 1024:>10.1f}")
+        if self.asset_cache:
+            c = self.asset_cache
+            lines.append("")
+            lines.append(
+                f"Asset cache: {c['hits']} hits, {c['revalidations']} revalidations, {c['misses']} misses, "
+                f"{c['bytes_saved'] / 1024:.1f} KB saved, {c['stored_bytes'] / 1024:.1f} KB stored"
+            )
+        if self.direct_actions:
+            lines.append("")
+            for path in sorted(set(self.direct_actions["direct"]) | set(self.direct_actions["fallbacks"])):
+                lines.append(
+                    f"Direct {path}: {self.direct_actions['direct'].get(path, 0)} sent, "
+                    f"{self.direct_actions['fallbacks'].get(path, 0)} fell back to the UI"
+                )
+        return "\n".join(lines)
+
+def fake_domain_names(count: int) -> List[str]:
+    """manga, comic, stars, hero, manga1, comic1, ... so BattleActivity.get_domain still resolves."""
+    return [
+        BASE_DOMAINS[i % len(BASE_DOMAINS)] + (str(i // len(BASE_DOMAINS)) if i >= len(BASE_DOMAINS) else "")
+        for i in range(count)
+    ]
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _write_workspace(path: str, names: List[str], port: int, block_requests: bool, headless: bool,
+                     context_pool: bool = True, max_pages: int = 1):
+    activity_order = ["/collect", "/troll-pre-battle.html", "/season-arena.html", "/leagues.html"]
+    config = {
+        "domains": [
+            {"name": name, "url": f"http://{name}.localhost:{port}", "enabled": True, "activity_order": activity_order}
+            for name in names
+        ],
+        "browser": {"headless": headless, "context_pool": {"enabled": context_pool}},
+        "performance": {
+            "block_images": block_requests,
+            "max_pages_per_domain": max_pages,
+            "blocking": {
+                "resource_types": ["image", "font", "media"] if block_requests else [],
+                "hosts": [],
+                "url_patterns": ["**/analytics/**"] if block_requests else [],
+            },
+        },
+        "global_settings": {
+            "check_interval_seconds": 30,
+            "activity_order": activity_order,
+            "storage_state_path": "storage_state.json",
+            "login_url": f"http://{names[0]}.localhost:{port}/home.html",
+        },
+    }
+    os.makedirs(os.path.join(path, "config"))
+    with open(os.path.join(path, "config", "config.yaml"), "w") as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+    with open(os.path.join(path, "config", "villains.yaml"), "w") as f:
+        yaml.safe_dump(VILLAINS, f, sort_keys=False)
+
+class _Recorder:
+    """Wraps the orchestrator entry points to collect per-activity samples."""
+
+    def __init__(self, report: BenchmarkReport):
+        self.report = report
+        self.cycle = 0
+        self.navigations: Dict[object, int] = {}
+
+    def total_navigations(self) -> int:
+        return sum(self.navigations.values())
+
+    def track(self, page):
+        """Counts the page's main-frame navigations; pages already tracked (warm or reused) are left alone."""
+        if page in self.navigations:
+            return
+        self.navigations[page] = 0
+
+        def on_navigated(frame):
+            if frame == page.main_frame:
+                self.navigations[page] += 1
+
+        page.on("framenavigated", on_navigated)
+
+    def _wrap_start(self, original):
+        recorder = self
+
+        async def start(session, *args, **kwargs):
+            page = await original(session, *args, **kwargs)
+            recorder.track(page)
+            return page
+        return start
+
+    def _wrap_execute(self, original):
+        recorder = self
+
+        async def execute_activity(domain_name, domain_cfg, activity_path, page):
+            # Extra pages opened for concurrent activities
+            recorder.track(page)
+            before = procstats.sample()
+            navigations = recorder.navigations.get(page, 0)
+            started = time.perf_counter()
+            ok = True
+            try:
+                return await original(domain_name, domain_cfg, activity_path, page)
+            except Exception:
+                ok = False
+                raise
+            finally:
+                after = procstats.sample()
+                recorder.report.activities.append(ActivitySample(
+                    cycle=recorder.cycle,
+                    domain=domain_name,
+                    activity=activity_path,
+                    wall_seconds=time.perf_counter() - started,
+                    navigations=recorder.navigations.get(page, 0) - navigations,
+                    cpu_seconds=after.cpu_seconds - before.cpu_seconds,
+                    rss_bytes=after.rss_bytes,
+                    ok=ok,
+                ))
+        return execute_activity
+
+    @contextmanager
+    def installed(self):
+        original_execute = main.execute_activity
+        original_start = AsyncSessionManager.start
+        main.execute_activity = self._wrap_execute(original_execute)
+        AsyncSessionManager.start = self._wrap_start(original_start)
+        try:
+            yield self
+        finally:
+            main.execute_activity = original_execute
+            AsyncSessionManager.start = original_start
+
+async def run_benchmark(domains: int = 4, cycles: int = 1, latency_ms: float = 0, jitter_ms: float = 0,
+                        jitter_scale: float = 0.0, block_requests: bool = True, headless: bool = True,
+                        wait_strategy: str = "ready", beacons: int = 6, asset_cache: bool = True,
+                        context_pool: bool = True, direct: bool = False, max_pages: int = 1) -> BenchmarkReport:
+    """
+    Runs `cycles` full orchestrator cycles against `domains` fake domains.
+    jitter_scale scales HumanUtils delays (0 removes them, 1 keeps production timing).
+    wait_strategy selects readiness selectors or networkidle for every navigation;
+    beacons is the number of analytics requests each fake page sends after load;
+    block_requests applies the blocking policy (images, fonts, media, analytics);
+    asset_cache serves JS/CSS from a fresh on-disk cache shared by all domains and cycles;
+    context_pool keeps each domain's context warm so later cycles skip launch and login;
+    direct sends fights, league x3 and collects as action requests instead of UI clicks;
+    max_pages lets each domain run that many independent activities at once.
+    """
+    names = fake_domain_names(domains)
+    game = FakeGame(names)
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(game, latency_ms=latency_ms, jitter_ms=jitter_ms, beacons=beacons),
+        host="127.0.0.1", port=port, log_level="warning",
+    ))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        if server_task.done():
+            raise RuntimeError("Fake game server failed to start")
+        await asyncio.sleep(0.05)
+
+    report = BenchmarkReport(domains=domains, latency_ms=latency_ms, wait_strategy=wait_strategy)
+    recorder = _Recorder(report)
+    original_cwd = os.getcwd()
+    original_scale = HumanUtils.time_scale
+    original_settings = navigation.settings
+    original_stats = navigation.stats
+    original_blocking_stats = blocking.stats
+    original_cache = AsyncSessionManager.asset_cache
+    original_sessions = session_store.records
+    original_direct = (direct_actions.settings, direct_actions.stats)
+    original_env = {key: os.environ.get(key) for key in ("GAME_USERNAME", "GAME_PASSWORD")}
+    workspace = tempfile.mkdtemp(prefix="game-bot-bench-")
+    try:
+        _write_workspace(workspace, names, port, block_requests, headless, context_pool, max_pages)
+        os.chdir(workspace)
+        # The fake server accepts any credentials; never send the real ones to it
+        os.environ["GAME_USERNAME"] = "bench@example.com"
+        os.environ["GAME_PASSWORD"] = "bench"
+        HumanUtils.time_scale = jitter_scale
+        navigation.settings = navigation.NavigationSettings(wait_strategy, original_settings.ready_timeout_ms)
+        navigation.stats = report.navigation_stats
+        blocking.stats = blocking.BlockingStats()
+        AsyncSessionManager.asset_cache = AssetCache(os.path.join(workspace, ".asset_cache")) if asset_cache else None
+        # Session files land in the workspace; start without the real domains' cached records
+        session_store.records = {}
+        direct_actions.settings = direct_actions.DirectActionSettings(direct, original_direct[0].timeout_ms)
+        direct_actions.stats = direct_actions.DirectActionStats()
+
+        global_cfg = load_config()
+        domain_cfgs = global_cfg["domains"]
+        for name in names:
+            state_manager.register(name)
+
+        with recorder.installed():
+            for cycle in range(1, cycles + 1):
+                game.reset_counters()
+                recorder.cycle = cycle
+                before = procstats.sample()
+                navigations = recorder.total_navigations()
+                started = time.perf_counter()
+                await asyncio.gather(*(main.run_domain_sequence(d, global_cfg) for d in domain_cfgs))
+                after = procstats.sample()
+                report.cycles.append(CycleSample(
+                    cycle=cycle,
+                    wall_seconds=time.perf_counter() - started,
+                    navigations=recorder.total_navigations() - navigations,
+                    cpu_seconds=after.cpu_seconds - before.cpu_seconds,
+                    rss_bytes=after.rss_bytes,
+                ))
+    finally:
+        await AsyncSessionManager.shutdown()
+        server.should_exit = True
+        await server_task
+        HumanUtils.time_scale = original_scale
+        navigation.settings = original_settings
+        navigation.stats = original_stats
+        report.blocking = blocking.stats.as_dict()
+        blocking.stats = original_blocking_stats
+        if AsyncSessionManager.asset_cache:
+            report.asset_cache = asdict(AsyncSessionManager.asset_cache.stats)
+        AsyncSessionManager.asset_cache = original_cache
+        session_store.records = original_sessions
+        if direct:
+            report.direct_actions = asdict(direct_actions.stats)
+        direct_actions.settings, direct_actions.stats = original_direct
+        for key, value in original_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        os.chdir(original_cwd)
+        shutil.rmtree(workspace, ignore_errors=True)
+    return report
+
+def quiet_logs():
+    """Keeps bot INFO logs out of the benchmark output."""
+    logging.getLogger().setLevel(logging.WARNING)
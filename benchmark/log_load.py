@@ -0,0 +1,118 @@
+"""
+Event-loop stall under log load.
+
+Logs a burst of records from coroutines while a probe task measures how late
+the event loop wakes it up, once with records written inline (the old
+FileHandler + stdout setup) and once through the background writer. Console
+output goes to a file that takes `sink_latency_ms` per write, standing in for
+a terminal, pipe or container log driver that does not keep up.
+
+    python -m benchmark.log_load --lines 5000 --sink-latency-ms 0.2
+"""
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import List, TextIO
+
+import structlog
+
+from utils import logger as logger_module
+from utils.logger import LogSettings, setup_logger
+
+@dataclass
+class LogLoadReport:
+    background: bool
+    lines: int
+    seconds: float
+    lag_p50_ms: float
+    lag_p99_ms: float
+    lag_max_ms: float
+    dropped: int = 0  # Records the background writer's full queue turned away
+
+    def row(self) -> str:
+        mode = "background" if self.background else "inline"
+        return (f"{mode:<12}{self.lines:>8}{self.seconds:>10.2f}"
+                f"{self.lag_p50_ms:>10.2f}{self.lag_p99_ms:>10.2f}{self.lag_max_ms:>10.2f}{self.dropped:>9}")
+
+class _SlowStream:
+    def __init__(self, stream: TextIO, latency: float):
+        self.stream = stream
+        self.latency = latency
+
+    def write(self, text: str):
+        time.sleep(self.latency)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+async def _probe(lags: List[float], stop: asyncio.Event, interval: float):
+    """Records by how much each `interval` sleep overshoots: the time the loop was busy elsewhere."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - started - interval))
+
+async def _emit(lines: int, batch: int):
+    log = structlog.get_logger()
+    for i in range(lines):
+        log.info("Checking opponent", index=i, damage=1234, level=42, reward=7, score=0.5)
+        if i % batch == batch - 1:
+            # Activities yield between opponents; the probe can only run here
+            await asyncio.sleep(0)
+
+async def measure(lines: int = 5000, background: bool = True, batch: int = 50,
+                  sink_latency_ms: float = 0.2, interval: float = 0.002) -> LogLoadReport:
+    workspace = tempfile.mkdtemp(prefix="game-bot-logs-")
+    console = open(os.path.join(workspace, "console.log"), "w")
+    try:
+        setup_logger(LogSettings(directory=workspace, background=background, compress=False),
+                     stream=_SlowStream(console, sink_latency_ms / 1000))
+        lags: List[float] = []
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe(lags, stop, interval))
+        await asyncio.sleep(interval)
+        started = time.perf_counter()
+        await _emit(lines, batch)
+        seconds = time.perf_counter() - started
+        stop.set()
+        await probe
+        dropped = sum(getattr(h, "dropped", 0) for h in logging.getLogger().handlers)
+        logger_module.stop_logging()
+    finally:
+        console.close()
+        shutil.rmtree(workspace, ignore_errors=True)
+        # Back to the configured pipeline
+        setup_logger()
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    return LogLoadReport(
+        background=background,
+        lines=lines,
+        seconds=seconds,
+        lag_p50_ms=statistics.median(lags_ms),
+        lag_p99_ms=lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))],
+        lag_max_ms=lags_ms[-1],
+        dropped=dropped,
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure event-loop stall while logging, inline vs background writer.")
+    parser.add_argument("--lines", type=int, default=5000, help="Records to log")
+    parser.add_argument("--batch", type=int, default=50, help="Records logged between yields to the loop")
+    parser.add_argument("--sink-latency-ms", type=float, default=0.2, help="Time the console takes per write")
+    args = parser.parse_args()
+
+    reports = [asyncio.run(measure(args.lines, background, args.batch, args.sink_latency_ms))
+               for background in (False, True)]
+    print(f"{'writer':<12}{'lines':>8}{'wall s':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'dropped':>9}")
+    for report in reports:
+        print(report.row())
+
+if __name__ == "__main__":
+    main()
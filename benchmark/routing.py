@@ -0,0 +1,82 @@
+"""
+Cost of resolving a page URL to its domain settings and activity.
+
+Compares the compiled RouteTable with the linear scan run_activity used to
+do (every configured domain's URL parsed and substring-matched per call)
+for a config with `domains` entries. Lookups hit hosts spread over the
+whole list, with query strings and aliases mixed in.
+
+    python -m benchmark.routing --domains 100 500 1000
+"""
+import argparse
+import time
+from dataclasses import dataclass
+from typing import List, Mapping, Optional
+from urllib.parse import urlparse
+
+from activities.registry import ActivityRegistry
+from activities.routes import RouteTable, registered_activities
+
+PATHS = ["/troll-pre-battle.html?id_opponent=3", "/leagues.html", "/season-arena.html", "/battle", "/home", "/unknown"]
+
+@dataclass
+class RoutingReport:
+    domains: int
+    lookups: int
+    build_ms: float
+    scan_us: float
+    table_us: float
+
+    def row(self) -> str:
+        return (f"{self.domains:>8}{self.lookups:>10}{self.build_ms:>10.2f}"
+                f"{self.scan_us:>12.2f}{self.table_us:>12.3f}{self.scan_us / self.table_us:>9.0f}x")
+
+def _linear_lookup(domains: List[Mapping], url: str):
+    """What run_activity did before the route table, minus the config reload."""
+    parsed_url = urlparse(url)
+    domain_settings: Optional[Mapping] = None
+    for d in domains:
+        config_url = d.get("url", "")
+        config_netloc = urlparse(config_url).netloc if "://" in config_url else config_url
+        if config_netloc and config_netloc in parsed_url.netloc:
+            domain_settings = d
+            break
+    return domain_settings, ActivityRegistry.get_activity(parsed_url.path)
+
+def _urls(domains: int, lookups: int) -> List[str]:
+    # A stride coprime with the domain count visits hosts all over the list
+    return [f"https://www.game{(i * 7919) % domains}.example{PATHS[i % len(PATHS)]}" for i in range(lookups)]
+
+def measure(domains: int = 500, lookups: int = 20000) -> RoutingReport:
+    config = [{"name": f"game{i}", "url": f"https://www.game{i}.example", "enabled": True,
+               "disabled_activities": ["/season-arena.html"]} for i in range(domains)]
+    urls = _urls(domains, lookups)
+
+    started = time.perf_counter()
+    table = RouteTable(config, registered_activities())
+    build = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for url in urls:
+        _linear_lookup(config, url)
+    scan = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for url in urls:
+        table.resolve(url)
+    lookup = time.perf_counter() - started
+
+    return RoutingReport(domains, lookups, build * 1000, scan / lookups * 1e6, lookup / lookups * 1e6)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure URL -> domain/activity lookup cost, linear scan vs route table.")
+    parser.add_argument("--domains", type=int, nargs="+", default=[10, 100, 500, 1000], help="Configured domain counts")
+    parser.add_argument("--lookups", type=int, default=20000, help="URLs resolved per measurement")
+    args = parser.parse_args()
+
+    print(f"{'domains':>8}{'lookups':>10}{'build ms':>10}{'scan us':>12}{'table us':>12}{'speedup':>10}")
+    for domains in args.domains:
+        print(measure(domains, args.lookups).row())
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,48 @@
 import asyncio
-import random
 import signal
 from datetime import datetime
+from typing import Dict, Optional
 import structlog
 import uvicorn
 from playwright.async_api import Page
 
-from utils.config_loader import load_config
+from utils import metrics, tracing
+from utils.config_loader import ConfigSnapshot, config_service, load_config
 from utils.state import state_manager
-from utils.logger import logger
+from utils.scheduler import scheduler
+from utils.session_store import session_store
+from utils.accounts import Account, expand_accounts
+from utils.admission import AdmissionController, AdmissionSettings
+from utils.retry import RetryPolicy, RetrySettings, is_retryable
+from utils.breaker import OPEN, CircuitBreaker
+from utils.jobs import job_queue
+from utils.logger import LogSettings, logger, setup_logger
 from utils.session_manager import AsyncSessionManager
 from activities.registry import ActivityRegistry
-from utils.session import ensure_authenticated, login
+from activities.graph import PagePool, build_graph, run_graph
+from utils.session import ensure_authenticated, is_logged_out, login, AUTH_READY_SELECTOR
+from utils.navigation import navigate
+from utils.blocking import RequestBlocker
 from utils.human import HumanUtils
 from utils.api import app
+from utils.asset_cache import AssetCache
+from utils.sharding import ShardCoordinator, ShardingSettings, publish_status, receive_commands
 import os
 import time
 
+# Activities running right now per domain; they may run side by side on PagePool pages
+_in_flight: Dict[str, int] = {}
+
 async def execute_activity(domain_name: str, domain_cfg: dict, activity_path: str, page: Page):
     """
-    Retrieves and executes an activity, updating SharedState.
+    Retrieves and executes an activity, updating SharedState and the scheduler.
     """
     activity = ActivityRegistry.get_activity(activity_path)
     if not activity:
         logger.warning("Activity not found in registry", activity=activity_path, domain=domain_name)
         return
 
-    full_url = f"{domain_cfg['url'].rstrip('/')}{activity.path}"
+    full_url = f"{domain_cfg['url'].rstrip('/')}{activity.url_path}"
 
     # Update state to Busy
     await state_manager.update_status(
@@ -35,54 +51,82 @@ async def execute_activity(domain_name: str, domain_cfg: dict, activity_path: st
         status="Busy",
         last_run_time=datetime.now()
     )
+    _in_flight[domain_name] = _in_flight.get(domain_name, 0) + 1
 
+    blocker = RequestBlocker.get(page.context)
+    started = time.perf_counter()
+    outcome = "error"
     try:
         logger.info("Executing activity", domain=domain_name, activity=activity_path, url=full_url)
-        # Note: /collect is handled specially in its implementation
-        if activity.path != "/collect":
-            for attempt in range(3):
-                try:
-                    await page.goto(full_url, wait_until='networkidle')
-                    break
-                except Exception as e:
-                    logger.warning(f"Navigation to {full_url} failed (Attempt {attempt+1}/3). Retrying...")
-                    await asyncio.sleep(10)
-                    if attempt == 2: raise e
-        await activity.execute(page)
+        if blocker:
+            await blocker.enter(activity.path)
+        job_queue.take_yielded(page)  # Left over from an earlier activity on this page
+        with tracing.span(activity_path, "activity", domain=domain_name):
+            await navigate(page, full_url, ready=activity.ready_selector)
+            reading = await activity.execute(page)
+        scheduler.record(domain_name, activity_path, reading, yielded=job_queue.take_yielded(page))
+        outcome = "ok"
         logger.info("Activity completed successfully", domain=domain_name, activity=activity_path)
+        return reading
     except Exception as e:
         logger.error("Activity execution failed", domain=domain_name, activity=activity_path, error=str(e))
+        scheduler.record_failure(domain_name, activity_path)
         raise e
     finally:
-        # Update state back to Idle
-        await state_manager.update_status(domain_name, status="Idle")
+        metrics.activity_seconds.observe(time.perf_counter() - started, domain_name, activity_path, outcome)
+        if blocker:
+            await blocker.leave(activity.path)
+        # Back to Idle once the domain's last running activity is done
+        _in_flight[domain_name] -= 1
+        if not _in_flight[domain_name]:
+            del _in_flight[domain_name]
+            await state_manager.update_status(domain_name, status="Idle")
 
-async def run_domain_sequence(domain_cfg: dict, global_cfg: dict):
-    """
-    Runs a single activity sequence for a specific domain.
-    """
-    domain_name = domain_cfg["name"]
+async def run_jobs(domain_name: str, domain_cfg: dict, page: Page):
+    """Runs the domain's queued ad-hoc jobs on `page`, highest priority first."""
+    while True:
+        job = job_queue.pop(domain_name)
+        if job is None:
+            break
+        await state_manager.update_status(domain_name, queued_jobs=job_queue.pending(domain_name))
+        logger.info("Running ad-hoc job", domain=domain_name, activity=job.activity, job_id=job.id, priority=job.priority)
+        if not ActivityRegistry.get_activity(job.activity):
+            job_queue.finish(job, "Unknown activity")
+            continue
+        try:
+            await execute_activity(domain_name, domain_cfg, job.activity, page)
+            job_queue.finish(job)
+        except Exception as e:
+            # The job reports its own failure; the scheduled activities go on
+            job_queue.finish(job, str(e))
+        await HumanUtils.random_jitter()
+    await publish_job_count(domain_name)
+
+async def publish_job_count(domain_name: str):
+    pending = job_queue.pending(domain_name)
+    await state_manager.update_status(domain_name, is_adhoc_pending=pending > 0, queued_jobs=pending)
+
+def get_activity_order(domain_cfg: dict, global_cfg: dict) -> list:
     activity_order = domain_cfg.get("activity_order") or global_cfg.get("global_settings", {}).get("activity_order", [])
     if not activity_order:
         activity_order = ["/collect", "/troll-pre-battle.html", "/season-arena.html", "/leagues.html"]
+    return activity_order
 
-    try:
-        logger.info("Starting domain sequence", domain=domain_name)
-        session = AsyncSessionManager()
-        page = await session.start()
-        page.set_default_timeout(60000)
+def current_domain_cfg(domain_name: str, snapshot: ConfigSnapshot) -> Optional[dict]:
+    """The domain's entry in a config snapshot, or None if it was removed or disabled."""
+    for d in expand_accounts(snapshot.enabled_domains()):
+        if d["name"] == domain_name:
+            return d
+    return None
 
-        # Navigation and Authentication check
+async def prepare_session(page: Page, domain_name: str, domain_cfg: dict) -> bool:
+    """
+    Lands on the domain and makes sure the session is logged in.
+    Returns False if login failed.
+    """
+    with tracing.span("prepare session", "session", domain=domain_name):
         try:
-            for attempt in range(3):
-                try:
-                    await page.goto(domain_cfg["url"], wait_until='networkidle', timeout=30000)
-                    break
-                except Exception as e:
-                    logger.warning(f"Navigation to {domain_cfg['url']} failed (Attempt {attempt+1}/3). Retrying...")
-                    await asyncio.sleep(10)
-                    if attempt == 2: raise e
-
+            await navigate(page, domain_cfg["url"], ready="body", timeout=30000)
             if page.url == "about:blank":
                 raise Exception("Landed on about:blank")
         except Exception as e:
@@ -91,53 +135,219 @@ async def run_domain_sequence(domain_cfg: dict, global_cfg: dict):
 
         # Authentication Gating
         home_url = f"{domain_cfg['url'].rstrip('/')}/home.html"
-        for attempt in range(3):
-            try:
-                await page.goto(home_url, wait_until='networkidle')
-                break
-            except Exception as e:
-                logger.warning(f"Navigation to {home_url} failed (Attempt {attempt+1}/3). Retrying...")
-                await asyncio.sleep(10)
-                if attempt == 2: raise e
+        await navigate(page, home_url, ready=AUTH_READY_SELECTOR)
 
+        account = Account.of(domain_cfg)
         if await page.locator("//div[@title='DarkKnight']").is_visible(timeout=5000):
             logger.info("Active session detected", domain=domain_name)
+            await session_store.save(page.context, account.domain, account.name)
             await state_manager.update_status(domain_name, is_authenticated=True)
         else:
             logger.info("Attempting login", domain=domain_name)
-            is_logged_in = await login(page, domain_cfg["url"])
+            is_logged_in = await login(page, domain_cfg["url"], domain_name, account=account)
             if is_logged_in:
                 await state_manager.update_status(domain_name, is_authenticated=True)
             else:
                 logger.error("Login failed", domain=domain_name)
-                return
+                return False
+        return True
 
-        # Execute scheduled activities
-        logger.info("Executing activity sequence", domain=domain_name, order=activity_order)
-        for activity_path in activity_order:
-            if activity_path in domain_cfg.get("disabled_activities", []):
-                logger.info("Activity disabled", domain=domain_name, activity=activity_path)
-                continue
+async def run_domain_sequence(domain_cfg: dict, global_cfg: dict, activities: list = None):
+    """
+    Runs a single activity sequence for a specific domain.
+    If activities is given, only those (e.g. the ones the scheduler found due) are run.
+    """
+    domain_name = domain_cfg["name"]
+    activity_order = activities if activities is not None else get_activity_order(domain_cfg, global_cfg)
+    account = Account.of(domain_cfg)
+    breaker = CircuitBreaker.for_domain(account.domain)
+    session = None
+    page = None
+    retry_policy = None
+    failed = False
+
+    with tracing.cycle(domain_name):
+        try:
+            logger.info("Starting domain sequence", domain=domain_name)
+            session = AsyncSessionManager()
+            with tracing.span("open context", "session"):
+                page = await session.start(domain_name, account)
+            page.set_default_timeout(60000)
+            # Navigations and clicks of this cycle share one retry budget
+            retry_policy = RetryPolicy(RetrySettings.from_config(global_cfg, domain_cfg), domain_name)
+            retry_policy.attach(page.context)
+            # Lets long activity loops see jobs queued for this domain and yield to them
+            job_queue.bind(page.context, domain_name)
 
-            # Check for ad-hoc requests
             status = await state_manager.get_domain_status(domain_name)
-            if status and status.is_adhoc_pending:
-                adhoc_activity = status.current_activity
-                logger.info("Ad-hoc activity pending, executing", domain=domain_name, activity=adhoc_activity)
-                await execute_activity(domain_name, domain_cfg, adhoc_activity, page)
-                await state_manager.update_status(domain_name, is_adhoc_pending=False)
-                await HumanUtils.random_jitter()
+            if session.warm and status and status.is_authenticated:
+                # The pooled context is already logged in and on the domain: start on the first activity
+                logger.info("Warm authenticated context, skipping landing and auth check", domain=domain_name)
+            elif session_store.is_known_good(account.domain, account.name):
+                # The stored cookies were seen logged in recently: the first activity's page doubles as the check
+                logger.info("Stored session known-good, skipping landing and auth check", domain=domain_name)
+                await state_manager.update_status(domain_name, is_authenticated=True)
+            elif not await prepare_session(page, domain_name, domain_cfg):
+                job_queue.fail_pending(domain_name, "Login failed")
+                await publish_job_count(domain_name)
+                await session_store.invalidate(account.domain, account.name)
+                return
+
+            # Execute scheduled activities; independent ones run side by side on extra pages
+            disabled = domain_cfg.get("disabled_activities", [])
+            for activity_path in activity_order:
+                if activity_path in disabled:
+                    logger.info("Activity disabled", domain=domain_name, activity=activity_path)
+            nodes = build_graph([a for a in activity_order if a not in disabled])
+            pages = PagePool(page, global_cfg.get("performance", {}).get("max_pages_per_domain", 1))
 
-            await execute_activity(domain_name, domain_cfg, activity_path, page)
-            await HumanUtils.random_jitter() # Anti-ban: sleep between activities
+            async def run(activity_path: str, activity_page: Page):
+                # Activities may run side by side, so each gets its own row in the trace
+                with tracing.span(activity_path, "graph", lane=f"{domain_name} {activity_path}"):
+                    await execute_activity(domain_name, domain_cfg, activity_path, activity_page)
+                    await HumanUtils.random_jitter() # Anti-ban: sleep between activities
 
-        logger.info("Domain sequence complete", domain=domain_name)
+            # Queued ad-hoc jobs go before the scheduled activities. They run on the
+            # primary page outside the graph, so a job never spends a resource that a
+            # node on another page is spending at the same time.
+            await run_jobs(domain_name, domain_cfg, page)
+            logger.info("Executing activity sequence", domain=domain_name, order=[n.path for n in nodes],
+                        max_pages=pages.limit)
+            try:
+                await run_graph(nodes, pages, run)
+            finally:
+                await pages.close()
+            # Jobs that arrived while the graph ran (long activities yield to them)
+            await run_jobs(domain_name, domain_cfg, page)
 
+            # A completed sequence proves the session; keep its refreshed cookies
+            await session_store.save(page.context, account.domain, account.name)
+            breaker.record_success()
+            logger.info("Domain sequence complete", domain=domain_name)
+
+        except Exception as e:
+            logger.error("Error in domain sequence", domain=domain_name, error=str(e))
+            failed = True
+            # Only failures that look like the site being unreachable count towards its breaker
+            if is_retryable(e, "navigation"):
+                breaker.record_failure()
+            job_queue.fail_pending(domain_name, f"Domain cycle failed: {e}")
+            await publish_job_count(domain_name)
+            # Only a logged-out page means the stored session went bad; other failures
+            # (timeouts, navigation errors, activity bugs) keep it known-good
+            if page and await is_logged_out(page):
+                logger.warning("Session logged out, next cycle checks authentication", domain=domain_name)
+                await session_store.invalidate(account.domain, account.name)
+                await state_manager.update_status(domain_name, status="Error", is_authenticated=False)
+            else:
+                await state_manager.update_status(domain_name, status="Error")
+        finally:
+            if retry_policy:
+                retry_policy.detach(page.context)
+                job_queue.unbind(page.context)
+            if session:
+                with tracing.span("close context", "session"):
+                    await session.stop(failed=failed)
+
+async def prewarm_domain(domain_cfg: dict):
+    """Opens a domain's context and logs it in, ahead of its first scheduled cycle."""
+    domain_name = domain_cfg["name"]
+    session = AsyncSessionManager()
+    failed = False
+    try:
+        page = await session.start(domain_name, Account.of(domain_cfg))
+        page.set_default_timeout(60000)
+        retry_policy = RetryPolicy(RetrySettings.from_config(load_config(), domain_cfg), domain_name)
+        retry_policy.attach(page.context)
+        try:
+            if not await prepare_session(page, domain_name, domain_cfg):
+                failed = True
+        finally:
+            retry_policy.detach(page.context)
     except Exception as e:
-        logger.error("Error in domain sequence", domain=domain_name, error=str(e))
-        await state_manager.update_status(domain_name, status="Error")
+        logger.warning("Session pre-warm failed", domain=domain_name, error=str(e))
+        failed = True
     finally:
-        await session.stop()
+        await session.stop(failed=failed)
+
+async def prewarm_sessions(domain_cfgs: list):
+    """
+    Logs in every domain whose stored session is not known-good, as many at
+    once on the shared browser as browser.max_contexts allows, so no worker
+    pays for a login in its first cycle.
+    """
+    expired = []
+    for d in domain_cfgs:
+        account = Account.of(d)
+        if not session_store.is_known_good(account.domain, account.name):
+            expired.append(d)
+    if not expired:
+        return
+    logger.info("Pre-warming sessions", domains=[d["name"] for d in expired])
+    await asyncio.gather(*(prewarm_domain(d) for d in expired))
+
+async def domain_worker(domain_cfg: dict, global_cfg: dict, admission: Optional[AdmissionController] = None):
+    """
+    Runs a domain's due activities, then sleeps until the scheduler predicts
+    the next one has resources to spend. With an admission controller each
+    cycle waits for its turn to start. After a config reload the next cycle
+    uses the domain's new settings, or the worker stops if it was disabled.
+    """
+    domain_name = domain_cfg["name"]
+    job_queue.serve(domain_name)
+    try:
+        await _domain_loop(domain_cfg, global_cfg, admission)
+    finally:
+        job_queue.unserve(domain_name)
+        await publish_job_count(domain_name)
+
+async def _domain_loop(domain_cfg: dict, global_cfg: dict, admission: Optional[AdmissionController]):
+    domain_name = domain_cfg["name"]
+    breaker = CircuitBreaker.for_domain(Account.of(domain_cfg).domain)
+    config_version = config_service().snapshot.version
+
+    while True:
+        snapshot = config_service().snapshot
+        if snapshot.version != config_version:
+            # The config was reloaded; pick up this domain's new activity order and disabled activities
+            config_version = snapshot.version
+            fresh_cfg = current_domain_cfg(domain_name, snapshot)
+            if fresh_cfg is None:
+                logger.info("Domain disabled in config, stopping worker", domain=domain_name)
+                await AsyncSessionManager.discard(domain_name)
+                return
+            domain_cfg, global_cfg = fresh_cfg, snapshot.data
+        disabled = domain_cfg.get("disabled_activities", [])
+        activity_order = [a for a in get_activity_order(domain_cfg, global_cfg) if a not in disabled]
+        try:
+            due = scheduler.due_activities(domain_name, activity_order)
+            jobs = job_queue.pending(domain_name)
+            if (due or jobs) and not await breaker.allow(domain_cfg["url"]):
+                logger.info("Site circuit breaker open, skipping cycle", domain=domain_name,
+                            probe_in=f"{breaker.seconds_until_probe():.0f}s")
+                # Do not hold a browser context for a site that is down
+                await AsyncSessionManager.discard(domain_name)
+            elif due or jobs:
+                if admission:
+                    await admission.admit(domain_name)
+                await run_domain_sequence(domain_cfg, global_cfg, activities=due)
+                # Activities that never ran (navigation or login failed) retry after the back-off
+                for activity_path in scheduler.due_activities(domain_name, due):
+                    scheduler.record_failure(domain_name, activity_path)
+            else:
+                logger.info("No activity due", domain=domain_name)
+        except Exception as e:
+            logger.error("Domain worker encountered an error", domain=domain_name, error=str(e))
+
+        probe_at = datetime.fromtimestamp(breaker.opened_until) if breaker.state == OPEN else None
+        await state_manager.update_status(domain_name, next_due=scheduler.schedule_for(domain_name, activity_order),
+                                          breaker=breaker.state, breaker_probe_at=probe_at)
+        delay = max(scheduler.seconds_until_wake(domain_name, activity_order), breaker.seconds_until_probe())
+        logger.info("Domain sleeping until next due activity", domain=domain_name, sleep=f"{delay:.0f}s")
+        if breaker.state == OPEN:
+            await asyncio.sleep(delay)
+        elif await job_queue.wait(domain_name, delay):
+            logger.info("Ad-hoc job queued, waking domain", domain=domain_name)
 
 async def run_api():
     """
@@ -147,58 +357,157 @@ async def run_api():
     server = uvicorn.Server(config)
     await server.serve()
 
+async def run_domains(domain_cfgs: list, global_cfg: dict, owned_names: Optional[set] = None,
+                      changed: Optional[asyncio.Event] = None):
+    """
+    Pre-warms sessions and runs a worker per domain until cancelled. Cycle
+    starts are spaced and held back under load by an admission controller.
+    Config changes are watched for; a domain enabled later gets a worker,
+    limited to `owned_names` when given (a shard only runs its own domains).
+    Setting `changed` rechecks the enabled domains, e.g. after a name is
+    added to `owned_names`.
+    """
+    # Jobs queued during the pre-warm wait for the first cycle
+    for d in domain_cfgs:
+        job_queue.serve(d["name"])
+    if global_cfg.get("global_settings", {}).get("session_store", {}).get("prewarm", True):
+        await prewarm_sessions(domain_cfgs)
+
+    admission = AdmissionController(AdmissionSettings.from_config(global_cfg))
+    workers = {d["name"]: asyncio.create_task(domain_worker(d, global_cfg, admission)) for d in domain_cfgs}
+    service = config_service()
+    changed = changed or asyncio.Event()
+    unsubscribe = service.on_change(lambda snapshot: changed.set())
+    reload_seconds = global_cfg.get("global_settings", {}).get("config_reload_seconds", 5)
+    watcher = asyncio.create_task(service.watch(reload_seconds)) if reload_seconds else None
+    try:
+        while True:
+            await changed.wait()
+            changed.clear()
+            # Workers stop themselves when their domain is disabled; start the newly enabled ones
+            snapshot = service.snapshot
+            for d in expand_accounts(snapshot.enabled_domains()):
+                name = d["name"]
+                if (owned_names is not None and name not in owned_names) or (name in workers and not workers[name].done()):
+                    continue
+                logger.info("Domain enabled in config, starting worker", domain=name)
+                state_manager.register(name)
+                job_queue.serve(name)
+                workers[name] = asyncio.create_task(domain_worker(d, snapshot.data, admission))
+    finally:
+        unsubscribe()
+        if watcher:
+            watcher.cancel()
+        for task in workers.values():
+            task.cancel()
+
+async def watch_shard_domains(coordinator: ShardCoordinator, global_cfg: dict):
+    """Coordinator side of config reloads: domains enabled later are assigned to a shard."""
+    service = config_service()
+    unsubscribe = service.on_change(
+        lambda snapshot: coordinator.sync_domains([d["name"] for d in expand_accounts(snapshot.enabled_domains())])
+    )
+    reload_seconds = global_cfg.get("global_settings", {}).get("config_reload_seconds", 5)
+    try:
+        if reload_seconds:
+            await service.watch(reload_seconds)
+    finally:
+        unsubscribe()
+
+def shard_process(shard_id: int, domain_names: list, status_queue, command_queue, settings: ShardingSettings):
+    """
+    Entry point of a shard worker process: runs the given domains on its own
+    browser, reports their status to the coordinator and applies its commands.
+    """
+    global_cfg = load_config()
+    # Rotation is per process; each worker gets its own file
+    log_settings = LogSettings.from_config(global_cfg)
+    name, ext = os.path.splitext(log_settings.file)
+    log_settings.file = f"{name}-shard{shard_id}{ext}"
+    setup_logger(log_settings)
+    structlog.contextvars.bind_contextvars(shard=shard_id)
+    domain_cfgs = [d for d in expand_accounts(global_cfg.get("domains", [])) if d["name"] in domain_names]
+    scheduler.owned_domains = set(domain_names)
+    # The asset cache index is rewritten whole; give each process its own
+    if AsyncSessionManager.asset_cache:
+        cache = AsyncSessionManager.asset_cache
+        AsyncSessionManager.asset_cache = AssetCache(
+            directory=os.path.join(cache.directory, f"shard-{shard_id}"),
+            max_bytes=cache.max_bytes,
+            extensions=cache.extensions,
+        )
+
+    async def main():
+        owned, changed = set(domain_names), asyncio.Event()
+
+        def adopt(name: str):
+            # A domain enabled by a config reload; its worker starts once this process sees the reload too
+            owned.add(name)
+            domain_names.append(name)
+            scheduler.owned_domains.add(name)
+            changed.set()
+
+        runner = asyncio.create_task(run_domains(domain_cfgs, global_cfg, owned, changed))
+        publisher = asyncio.create_task(
+            publish_status(shard_id, domain_names, status_queue, settings.status_interval_seconds,
+                           settings.metrics_interval_seconds)
+        )
+        commands = asyncio.create_task(receive_commands(command_queue, runner.cancel, adopt))
+        try:
+            await runner
+        except asyncio.CancelledError:
+            logger.info("Shard worker stopping")
+        finally:
+            publisher.cancel()
+            commands.cancel()
+            await AsyncSessionManager.shutdown()
+            await scheduler.flush()
+            tracing.shutdown()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
 async def orchestrator():
     """
-    Main entry point for the bot orchestrator.
+    Main entry point for the bot orchestrator. With orchestrator.workers > 1
+    the domains are split across that many worker processes, and this
+    process only serves the API and supervises them.
     """
     global_cfg = load_config()
-    enabled_domains = [d for d in global_cfg.get("domains", []) if d.get("enabled", True)]
+    # One worker per (domain, account); browser contexts are capped by browser.max_contexts
+    enabled_domains = expand_accounts([d for d in global_cfg.get("domains", []) if d.get("enabled", True)])
+    sharding = ShardingSettings.from_config(global_cfg)
 
-    logger.info("Initializing Master Orchestrator")
+    logger.info("Initializing Master Orchestrator", workers=sharding.workers)
 
     # Start API task
     api_task = asyncio.create_task(run_api())
 
+    if sharding.workers > 1:
+        coordinator = ShardCoordinator(shard_process, [d["name"] for d in enabled_domains], sharding)
+        main_task = asyncio.gather(coordinator.run(), watch_shard_domains(coordinator, global_cfg))
+    else:
+        main_task = asyncio.create_task(run_domains(enabled_domains, global_cfg))
+
     # Signal handling
-    tasks_to_cancel = [api_task]
     loop = asyncio.get_running_loop()
     for sig in (signal.SIGINT, signal.SIGTERM):
         try:
-            loop.add_signal_handler(sig, lambda: [t.cancel() for t in tasks_to_cancel])
+            loop.add_signal_handler(sig, lambda: [t.cancel() for t in (api_task, main_task)])
         except NotImplementedError:
             pass
 
     try:
-        while True:
-            try:
-                logger.info("Starting global activity iteration")
-
-                # Run Activity Sequence for all domains with staggered starts
-                worker_tasks = []
-                for d in enabled_domains:
-                    task = asyncio.create_task(run_domain_sequence(d, global_cfg))
-                    worker_tasks.append(task)
-
-                    # Stagger starts to prevent network congestion
-                    delay = random.uniform(10, 20)
-                    logger.info("Staggering domain start", domain=d["name"], delay=f"{delay:.2f}s")
-                    await asyncio.sleep(delay)
-
-                await asyncio.gather(*worker_tasks)
-
-                logger.info("All activities completed. Entering 30-minute cooldown.")
-            except Exception as e:
-                logger.error("Orchestrator encountered an error in this cycle", error=str(e))
-
-            for i in range(1, 7):
-                await asyncio.sleep(300)
-                logger.info("Heartbeat: Orchestrator waiting...", minutes_elapsed=i*5, total_wait="30m")
-
+        await main_task
     except asyncio.CancelledError:
         logger.info("Orchestrator tasks cancelled")
     finally:
         api_task.cancel()
         await AsyncSessionManager.shutdown()
+        await scheduler.flush()
+        tracing.shutdown()
         logger.info("Orchestrator shut down complete.")
 
 if __name__ == "__main__":
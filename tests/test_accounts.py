@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+from utils.accounts import Account, ContextLimiter, expand_accounts
+
+DOMAINS = [
+    {"name": "manga", "url": "https://www.mangarpg.com", "activity_order": ["/collect"]},
+    {
+        "name": "comic",
+        "url": "https://www.comicrpg.com",
+        "activity_order": ["/collect", "/leagues.html"],
+        "accounts": [
+            {"name": "main"},
+            {"name": "alt", "username_env": "ALT_USER", "password_env": "ALT_PASS", "activity_order": ["/collect"]},
+            {"name": "off", "enabled": False},
+        ],
+    },
+]
+
+def test_expand_accounts():
+    manga, main, alt = expand_accounts(DOMAINS)
+    assert manga["name"] == "manga" and Account.of(manga) == Account("manga")
+    assert (main["name"], main["domain"], main["account"]) == ("comic:main", "comic", "main")
+    assert main["activity_order"] == ["/collect", "/leagues.html"]
+    assert alt["activity_order"] == ["/collect"]
+    assert "accounts" not in alt
+
+def test_account_credentials(monkeypatch):
+    monkeypatch.setenv("ALT_USER", "alt@example.com")
+    monkeypatch.setenv("ALT_PASS", "secret")
+    alt = Account.of(expand_accounts(DOMAINS)[2])
+    assert alt.credentials() == ("alt@example.com", "secret")
+    assert alt.key == "comic:alt"
+
+@pytest.mark.asyncio
+async def test_limiter_serves_domains_round_robin():
+    limiter = ContextLimiter(1)
+    await limiter.acquire("comic")
+    order = []
+
+    async def account(domain, name):
+        await limiter.acquire(domain)
+        order.append(name)
+        await asyncio.sleep(0)
+        limiter.release()
+
+    tasks = [asyncio.create_task(account(d, n)) for d, n in
+             [("comic", "c1"), ("comic", "c2"), ("comic", "c3"), ("manga", "m1"), ("stars", "s1")]]
+    await asyncio.sleep(0.01)
+    assert limiter.waiting == 5
+    limiter.release()
+    await asyncio.gather(*tasks)
+    assert order == ["c1", "m1", "s1", "c2", "c3"]
+    assert limiter.in_use == 0
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_gives_up_its_place():
+    limiter = ContextLimiter(1)
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire("comic"))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.sleep(0)
+    assert limiter.waiting == 0
+    limiter.release()
+    assert limiter.in_use == 0
+    assert ContextLimiter(None).available()
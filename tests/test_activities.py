@@ -106,3 +106,13 @@ async def test_run_activity_unconfigured_domain():
     with patch.object(HomeActivity, 'execute', mock_execute):
         await run_activity(page)
         mock_execute.assert_not_called()
+
+def test_season_scoring_follows_current_config(monkeypatch):
+    from activities.impl import season
+    from activities.scoring import expected_reward, lower_level
+    activity = SeasonActivity()
+    monkeypatch.setattr(season, "load_config", lambda: {"season": {"scoring": "lower_level", "min_score": 0.5}})
+    assert activity.scoring() == (lower_level, 0.5)
+    # An unknown scorer falls back to the default instead of failing the run
+    monkeypatch.setattr(season, "load_config", lambda: {"season": {"scoring": "missing"}})
+    assert activity.scoring() == (expected_reward, 0.0)
@@ -0,0 +1,128 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from activities.graph import ActivityNode, PagePool, build_graph, run_graph
+from activities.registry import ActivityRegistry
+
+def make_pool(limit):
+    primary = MagicMock(name="primary")
+    primary.context.new_page = AsyncMock(side_effect=lambda: MagicMock(close=AsyncMock()))
+    return PagePool(primary, limit)
+
+def test_build_graph_uses_declared_dependencies_and_resources(monkeypatch):
+    monkeypatch.setitem(ActivityRegistry._registry, "/a", MagicMock(depends_on=("/b", "/missing"), shared_resources=("energy",)))
+    monkeypatch.setitem(ActivityRegistry._registry, "/b", MagicMock(depends_on=(), shared_resources=()))
+
+    a, b = build_graph(["/a", "/b", "/a"])
+    assert (a.path, a.depends_on, a.resources) == ("/a", {"/b"}, {"energy"})
+    assert b.depends_on == set()
+
+    monkeypatch.setitem(ActivityRegistry._registry, "/b", MagicMock(depends_on=("/a",), shared_resources=()))
+    with pytest.raises(ValueError):
+        build_graph(["/a", "/b"])
+
+def test_builtin_activities_declare_their_counters():
+    nodes = {n.path: n for n in build_graph(["/collect", "/troll-pre-battle.html", "/season-arena.html", "/leagues.html"])}
+    assert nodes["/collect"].resources == set()
+    assert nodes["/troll-pre-battle.html"].resources == {"energy"}
+    assert nodes["/leagues.html"].resources == {"challenge_points"}
+
+@pytest.mark.asyncio
+async def test_independent_activities_overlap_on_separate_pages():
+    pool = make_pool(2)
+    running, peak, pages = set(), [0], {}
+
+    async def run(path, page):
+        running.add(path)
+        peak[0] = max(peak[0], len(running))
+        pages[path] = page
+        await asyncio.sleep(0.01)
+        running.discard(path)
+
+    await run_graph([ActivityNode("/a"), ActivityNode("/b"), ActivityNode("/c")], pool, run)
+    assert peak[0] == 2
+    assert pages["/a"] is pool.primary and pages["/b"] is not pool.primary
+    assert pool.primary.context.new_page.call_count == 1
+
+    await pool.close()
+    pages["/b"].close.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_dependencies_and_shared_resources_serialize():
+    order = []
+
+    async def run(path, page):
+        order.append(f"start {path}")
+        await asyncio.sleep(0.01)
+        order.append(f"end {path}")
+
+    nodes = [
+        ActivityNode("/fight1", resources={"energy"}),
+        ActivityNode("/fight2", resources={"energy"}),
+        ActivityNode("/after", depends_on={"/fight1"}),
+    ]
+    await run_graph(nodes, make_pool(3), run)
+    assert order.index("end /fight1") < order.index("start /fight2")
+    assert order.index("end /fight1") < order.index("start /after")
+
+@pytest.mark.asyncio
+async def test_failure_stops_later_activities():
+    ran = []
+
+    async def run(path, page):
+        ran.append(path)
+        if path == "/a":
+            raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await run_graph([ActivityNode("/a"), ActivityNode("/b"), ActivityNode("/c", depends_on={"/a"})], make_pool(1), run)
+    assert ran == ["/a"]
+
+@pytest.mark.asyncio
+async def test_domain_stays_busy_until_its_last_activity_finishes(monkeypatch):
+    import main
+    from utils.state import SharedState
+    monkeypatch.setattr(SharedState, "_instance", None)
+    state = SharedState()
+    state.register("manga")
+    monkeypatch.setattr(main, "state_manager", state)
+    monkeypatch.setattr(main, "navigate", AsyncMock())
+    monkeypatch.setattr(main.scheduler, "record", MagicMock())
+    releases = {"/a": asyncio.Event(), "/b": asyncio.Event()}
+    for path, release in releases.items():
+        async def execute(page, release=release):
+            await release.wait()
+        activity = MagicMock(path=path, url_path=path, ready_selector=None, execute=execute)
+        monkeypatch.setitem(ActivityRegistry._registry, path, activity)
+
+    page = MagicMock()
+    runs = [asyncio.create_task(main.execute_activity("manga", {"url": "https://x"}, path, page)) for path in releases]
+    await asyncio.sleep(0)
+    releases["/a"].set()
+    await runs[0]
+    assert state.domains["manga"].status == "Busy"
+    releases["/b"].set()
+    await runs[1]
+    assert state.domains["manga"].status == "Idle"
+
+@pytest.mark.asyncio
+async def test_activity_that_yielded_is_rescheduled_as_such(monkeypatch):
+    import main
+    from utils.state import SharedState
+    monkeypatch.setattr(SharedState, "_instance", None)
+    state = SharedState()
+    state.register("manga")
+    monkeypatch.setattr(main, "state_manager", state)
+    monkeypatch.setattr(main, "navigate", AsyncMock())
+    record = MagicMock()
+    monkeypatch.setattr(main.scheduler, "record", record)
+
+    async def execute(page):
+        main.job_queue.note_yield(page)
+    monkeypatch.setitem(ActivityRegistry._registry, "/a", MagicMock(path="/a", url_path="/a", ready_selector=None, execute=execute))
+    monkeypatch.setitem(ActivityRegistry._registry, "/b", MagicMock(path="/b", url_path="/b", ready_selector=None, execute=AsyncMock()))
+
+    page = MagicMock()
+    await main.execute_activity("manga", {"url": "https://x"}, "/a", page)
+    await main.execute_activity("manga", {"url": "https://x"}, "/b", page)
+    assert [c.kwargs["yielded"] for c in record.call_args_list] == [True, False]
@@ -0,0 +1,65 @@
+import asyncio
+import pytest
+from utils import admission, navigation, procstats
+from utils.admission import AdmissionController, AdmissionSettings
+
+@pytest.fixture
+def nav(monkeypatch):
+    stats = navigation.NavigationStats()
+    monkeypatch.setattr(navigation, "stats", stats)
+    return stats
+
+@pytest.fixture
+def idle_host(monkeypatch):
+    monkeypatch.setattr(procstats, "host_cpu_times", lambda: None)
+    monkeypatch.setattr(procstats, "sample", lambda: procstats.ProcSample(rss_bytes=100 * 2**20))
+
+def controller(**overrides):
+    settings = {"min_spacing_seconds": 0.02, "max_spacing_seconds": 0.03, "poll_seconds": 0.01, **overrides}
+    return AdmissionController(AdmissionSettings(**settings))
+
+def test_settings_from_config():
+    settings = AdmissionSettings.from_config({"performance": {"admission": {"max_cpu_percent": None, "unknown": 1}}})
+    assert settings.max_cpu_percent is None and settings.max_rss_mb == 2048
+
+def test_overload_reasons(nav, monkeypatch):
+    readings = iter([(0, 100), (95, 200)])
+    monkeypatch.setattr(procstats, "host_cpu_times", lambda: next(readings))
+    monkeypatch.setattr(procstats, "sample", lambda: procstats.ProcSample(rss_bytes=3000 * 2**20))
+    nav.in_flight = 4
+    nav.record(12, fell_back=True)
+    nav.record(14, fell_back=True)
+
+    assert controller().overload() == ["cpu 95%", "rss 3000MB", "4 navigations in flight", "navigations averaging 13.0s"]
+
+def test_slow_navigations_age_out(nav, monkeypatch):
+    clock = iter([100.0, 100.0, 130.0, 165.0])
+    monkeypatch.setattr(navigation.time, "monotonic", lambda: next(clock))
+    nav.record(15, fell_back=True)
+    assert nav.recent_seconds == 15
+    # Nothing navigated for longer than the window: the burst no longer holds admissions back
+    nav.record(3, fell_back=False)
+    assert nav.recent_seconds == 3
+
+@pytest.mark.asyncio
+async def test_starts_are_spaced(nav, idle_host):
+    gate = controller()
+    assert await gate.admit("manga") < 0.01
+    waited = await asyncio.gather(gate.admit("comic"), gate.admit("stars"))
+    assert 0.02 <= waited[0] and 0.04 <= waited[1]
+    assert gate.admitted == 3
+
+@pytest.mark.asyncio
+async def test_waits_for_load_to_drop(nav, idle_host):
+    gate = controller(max_inflight_navigations=1, max_wait_seconds=5)
+    nav.in_flight = 1
+    waiting = asyncio.create_task(gate.admit("manga"))
+    await asyncio.sleep(0.05)
+    assert not waiting.done()
+    nav.in_flight = 0
+    assert await waiting >= 0.05
+
+    # A signal that never clears only delays the start by max_wait_seconds
+    nav.in_flight = 1
+    stuck = controller(max_inflight_navigations=1, max_wait_seconds=0.05)
+    assert await stuck.admit("comic") >= 0.05
@@ -0,0 +1,62 @@
+import json
+import pytest
+from utils import api
+from utils.state import SharedState
+
+@pytest.fixture
+def state(monkeypatch):
+    monkeypatch.setattr(SharedState, "_instance", None)
+    state = SharedState()
+    for name in ("a", "b"):
+        state.register(name)
+    monkeypatch.setattr(api, "state_manager", state)
+    return state
+
+def parse(event: str):
+    lines = dict(line.split(": ", 1) for line in event.strip().splitlines())
+    return lines["event"], json.loads(lines["data"])
+
+@pytest.mark.asyncio
+async def test_stream_sends_snapshot_then_deltas(state):
+    subscription = state.subscribe()
+    events = api.status_events(subscription, ["a"], keepalive=0.01)
+
+    kind, data = parse(await anext(events))
+    assert kind == "snapshot" and list(data["domains"]) == ["a"]
+
+    await state.update_many({"a": {"status": "Busy"}, "b": {"status": "Error"}})
+    kind, data = parse(await anext(events))
+    assert kind == "status" and data["domains"] == {"a": {"status": "Busy", "version": data["version"]}}
+
+    # Changes to other domains are filtered out; idle streams keep the connection alive
+    await state.update_status("b", status="Idle")
+    assert await anext(events) == ": keepalive\n\n"
+
+    await events.aclose()
+    assert subscription not in state._subscribers
+
+@pytest.mark.asyncio
+async def test_stream_ends_for_slow_client(state):
+    subscription = state.subscribe(maxsize=1)
+    events = api.status_events(subscription)
+    await anext(events)
+    await state.update_status("a", queued_jobs=1)
+    await state.update_status("a", queued_jobs=2)
+
+    assert parse(await anext(events))[0] == "dropped"
+    with pytest.raises(StopAsyncIteration):
+        await anext(events)
+
+@pytest.mark.asyncio
+async def test_trigger_queues_only_on_running_domains(state, monkeypatch):
+    from fastapi import HTTPException
+    from utils.jobs import JobQueue
+    jobs = JobQueue()
+    jobs.serve("a")
+    monkeypatch.setattr(api, "job_queue", jobs)
+
+    result = await api.trigger_activity("collect")
+    assert result["domains"] == ["a"] and jobs.pending("b") == 0
+    with pytest.raises(HTTPException) as raised:
+        await api.trigger_activity("collect", domain="b")
+    assert raised.value.status_code == 409
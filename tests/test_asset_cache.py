@@ -0,0 +1,107 @@
+import asyncio
+import os
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from utils.asset_cache import AssetCache, freshness_lifetime, is_storable
+
+HEADERS = {"cache-control": "public, max-age=600", "etag": '"abc"', "content-type": "application/javascript",
+           "content-length": "5", "content-encoding": "gzip"}
+
+def make_route(url, status=200, body=b"hello", headers=None):
+    route = MagicMock()
+    route.request.url = url
+    route.request.method = "GET"
+    route.request.headers = {}
+    response = MagicMock()
+    response.status = status
+    response.headers = headers if headers is not None else HEADERS
+    response.body = AsyncMock(return_value=body)
+    route.fetch = AsyncMock(return_value=response)
+    route.fulfill = AsyncMock()
+    route.fallback = AsyncMock()
+    return route
+
+def test_freshness_and_storability():
+    assert freshness_lifetime({"cache-control": "max-age=60"}) == 60
+    assert freshness_lifetime({"cache-control": "no-cache, max-age=60"}) is None
+    assert is_storable(200, {"cache-control": "max-age=60"})
+    assert is_storable(200, {"etag": '"x"'})
+    assert not is_storable(200, {"cache-control": "no-store, max-age=60"})
+    assert not is_storable(200, {"cache-control": "max-age=60", "vary": "Cookie"})
+    assert not is_storable(404, {"cache-control": "max-age=60"})
+    assert not is_storable(200, {})
+
+@pytest.mark.asyncio
+async def test_miss_then_hit(tmp_path):
+    cache = AssetCache(str(tmp_path))
+    url = "https://www.mangarpg.com/js/game.js"
+
+    await cache._handle(make_route(url))
+    assert cache.stats.misses == 1 and cache.stats.stores == 1
+
+    route = make_route(url)
+    await cache._handle(route)
+    route.fetch.assert_not_called()
+    fulfilled = route.fulfill.call_args.kwargs
+    assert fulfilled["body"] == b"hello"
+    assert "content-encoding" not in fulfilled["headers"]
+    assert cache.stats.hits == 1 and cache.stats.bytes_saved == 5
+
+    # The index survives a restart
+    assert url in AssetCache(str(tmp_path)).entries
+
+@pytest.mark.asyncio
+async def test_sister_sites_share_blobs_but_not_validators(tmp_path):
+    cache = AssetCache(str(tmp_path))
+    await cache._handle(make_route("https://www.mangarpg.com/js/game.js"))
+
+    route = make_route("https://www.comicrpg.com/js/game.js")
+    await cache._handle(route)
+    assert route.fetch.call_args.kwargs == {}
+    assert cache.stats.misses == 2 and cache.stats.revalidations == 0
+    assert cache.stats.stored_bytes == 5
+
+@pytest.mark.asyncio
+async def test_concurrent_stores_of_one_body(tmp_path):
+    cache = AssetCache(str(tmp_path))
+    urls = [f"https://a{i}.com/game.js" for i in range(8)]
+    await asyncio.gather(*(cache._handle(make_route(url)) for url in urls))
+
+    assert list(AssetCache(str(tmp_path)).entries) == list(cache.entries)
+    assert set(cache.entries) == set(urls) and cache.stats.stored_bytes == 5
+    leftovers = [name for _, _, names in os.walk(tmp_path) for name in names if name.endswith(".tmp")]
+    assert leftovers == []
+
+@pytest.mark.asyncio
+async def test_lru_eviction(tmp_path):
+    cache = AssetCache(str(tmp_path), max_bytes=10)
+    await cache._handle(make_route("https://a.com/1.js", body=b"12345", headers={"etag": '"1"'}))
+    await cache._handle(make_route("https://a.com/2.js", body=b"67890", headers={"etag": '"2"'}))
+    # Touch 1.js so 2.js becomes the least recently used entry
+    cache._touch("https://a.com/1.js")
+    await cache._handle(make_route("https://a.com/3.js", body=b"abcde", headers={"etag": '"3"'}))
+
+    assert list(cache.entries) == ["https://a.com/1.js", "https://a.com/3.js"]
+    assert cache.stats.evictions == 1
+    assert cache.stats.stored_bytes == 10
+
+@pytest.mark.asyncio
+async def test_non_get_requests_fall_through(tmp_path):
+    cache = AssetCache(str(tmp_path))
+    route = make_route("https://a.com/1.js")
+    route.request.method = "POST"
+    await cache._handle(route)
+    route.fallback.assert_called_once()
+    route.fetch.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_replaced_body_frees_its_blob(tmp_path):
+    cache = AssetCache(str(tmp_path), max_bytes=100)
+    await cache._handle(make_route("https://a.com/x.js", body=b"a" * 60, headers={"etag": '"1"'}))
+    old_digest = cache.entries["https://a.com/x.js"].digest
+    await cache._handle(make_route("https://a.com/x.js", body=b"b" * 60, headers={"etag": '"2"'}))
+    assert not os.path.exists(cache._blob_path(old_digest))
+
+    await cache._handle(make_route("https://a.com/y.js", body=b"c" * 30, headers={"etag": '"3"'}))
+    assert list(cache.entries) == ["https://a.com/x.js", "https://a.com/y.js"]
+    assert cache.stats.stored_bytes == 90 and cache.stats.evictions == 0
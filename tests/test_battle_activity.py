@@ -30,13 +30,34 @@ async def test_get_energy_failure():
     page = AsyncMock()
     page.url = "http://manga.example.com"
     page.wait_for_selector.side_effect = Exception("Timeout")
-    page.locator.side_effect = Exception("Locator Timeout")
+    # locator() is synchronous in Playwright; an AsyncMock here would hand back an unawaited coroutine
+    page.locator = MagicMock(side_effect=Exception("Locator Timeout"))
 
     energy = await activity.get_energy(page)
     assert energy == 0
-    page.screenshot.assert_called()
+    page.locator.assert_called_once_with('#fight_energy_bar span[energy=""]')
+    page.screenshot.assert_awaited()
 
 @pytest.mark.asyncio
 async def test_battle_activity_path():
     activity = BattleActivity()
     assert activity.path == "/troll-pre-battle.html"
+
+@pytest.mark.asyncio
+async def test_refused_direct_fight_reports_no_energy(monkeypatch):
+    from utils.game_state import GameStateProbe
+    activity = BattleActivity()
+    page = MagicMock()
+    probe = GameStateProbe(page, "manga")
+    probe.install()
+    probe.observe({"energy": 5})
+    try:
+        monkeypatch.setattr(activity, "run_direct", AsyncMock(return_value={"success": False, "error": "no_energy"}))
+        assert await activity.perform_fight(page, troll_id=1) is False
+        assert activity.known_resource(page).current == 0
+
+        monkeypatch.setattr(activity, "run_direct", AsyncMock(return_value={"success": True}))
+        monkeypatch.setattr(activity, "record_fights", MagicMock())
+        assert await activity.perform_fight(page, troll_id=1) is True
+    finally:
+        probe.uninstall()
@@ -0,0 +1,157 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from utils import blocking
+from utils.blocking import BlockingPolicy, BlockingStats, RequestBlocker
+
+def matches(patterns, url):
+    return any(p.search(url) for p in patterns)
+
+def test_policy_from_config_keeps_legacy_block_images():
+    policy = BlockingPolicy.from_config({"performance": {"block_images": True, "blocking": {"resource_types": ["font"]}}})
+    assert policy.resource_types == ["font", "image"]
+    assert "doubleclick.net" in policy.hosts
+
+def test_patterns_match_resource_types_and_hosts():
+    policy = BlockingPolicy(resource_types=["image", "font"], hosts=["google-analytics.com"])
+    patterns = policy.patterns_for()
+
+    assert matches(patterns, "https://www.mangarpg.com/img/hero.png")
+    assert matches(patterns, "https://www.mangarpg.com/img/hero.JPG?v=3")
+    assert matches(patterns, "https://cdn.example.com/fonts/game.woff2")
+    assert matches(patterns, "https://www.google-analytics.com/collect?v=1")
+    assert not matches(patterns, "https://www.mangarpg.com/leagues.html")
+    assert not matches(patterns, "https://www.mangarpg.com/js/game.js")
+    assert not matches(patterns, "https://notgoogle-analytics.com/x.js")
+
+def test_activity_allowlist():
+    policy = BlockingPolicy(
+        resource_types=["image"],
+        hosts=["hotjar.com"],
+        allow={"/season-arena.html": {"resource_types": ["image"], "hosts": ["hotjar.com"]}},
+    )
+    assert policy.patterns_for("/season-arena.html") == []
+    assert matches(policy.patterns_for("/leagues.html"), "https://x.com/a.png")
+
+def test_url_pattern_globs():
+    policy = BlockingPolicy(url_patterns=["**/analytics/**"])
+    patterns = policy.patterns_for()
+    assert matches(patterns, "http://manga.localhost:8000/analytics/collect?n=1")
+    assert not matches(patterns, "http://manga.localhost:8000/home.html")
+
+def test_extensionless_urls_are_decided_by_resource_type():
+    assert blocking.EXTENSIONLESS.search("https://cdn.example.com/img/avatar?id=3")
+    assert blocking.EXTENSIONLESS.search("https://www.mangarpg.com/ajax/league_fight")
+    assert not blocking.EXTENSIONLESS.search("https://www.mangarpg.com/leagues.html")
+    assert not blocking.EXTENSIONLESS.search("https://www.mangarpg.com/js/game.js?v=2")
+    policy = BlockingPolicy(resource_types=["image", "font"], allow={"/season-arena.html": {"resource_types": ["image"]}})
+    assert policy.blocked_types(["/season-arena.html"]) == {"font"}
+
+def test_only_extensionless_asset_paths_reach_python():
+    typed = BlockingPolicy().typed_pattern()
+    assert typed.search("https://cdn.example.com/img/avatar?id=3")
+    assert typed.search("https://www.mangarpg.com/assets/images/hero")
+    assert not typed.search("https://www.mangarpg.com/ajax/league_fight")
+    assert not typed.search("https://www.mangarpg.com/")
+    assert not typed.search("https://www.mangarpg.com/home")
+    assert not typed.search("https://www.mangarpg.com/img/hero.png")
+    assert BlockingPolicy(typed_paths=[]).typed_pattern() is None
+
+def test_stats_count_requests_and_bytes():
+    stats = BlockingStats(max_urls=2)
+    stats.allowed("manga", "/leagues.html", "https://x.com/a.png", "image", 1000)
+    stats.allowed("manga", "/leagues.html", "https://x.com/b.png", "image", 3000)
+    stats.allowed("manga", "/leagues.html", "https://x.com/game.js", "script", 500)
+    # a.png dropped out of the bounded size memory; it is estimated from the image average
+    stats.blocked("manga", "/season-arena.html", "https://x.com/a.png", "image")
+    stats.blocked("manga", "/season-arena.html", "https://x.com/b.png", "image")
+    stats.blocked("manga", "/season-arena.html", "https://x.com/font.woff2", "font")
+    assert stats.as_dict() == {"manga": {
+        "/leagues.html": {"requests_allowed": 3, "bytes_allowed": 4500, "requests_blocked": 0, "bytes_blocked": 0},
+        "/season-arena.html": {"requests_allowed": 0, "bytes_allowed": 0, "requests_blocked": 3, "bytes_blocked": 5000},
+    }}
+
+def test_allowed_responses_are_counted_from_the_context_event(monkeypatch):
+    monkeypatch.setattr(blocking, "stats", BlockingStats())
+    blocker = RequestBlocker(MagicMock(), BlockingPolicy(), "manga")
+    response = MagicMock(url="https://x.com/game.js", headers={"content-length": "1234"})
+    response.request.resource_type = "script"
+    blocker._on_response(response)
+    assert blocking.stats.counters[("manga", "session")].bytes_allowed == 1234
+
+@pytest.mark.asyncio
+async def test_request_blocker_routes_only_blocked_patterns(monkeypatch):
+    monkeypatch.setattr(blocking, "stats", BlockingStats())
+    context = MagicMock()
+    context.route = AsyncMock()
+    context.unroute = AsyncMock()
+    policy = BlockingPolicy(resource_types=["image"], allow={"/season-arena.html": {"resource_types": ["image"]}})
+
+    blocker = RequestBlocker(context, policy, "manga")
+    await blocker.install()
+    assert RequestBlocker.get(context) is blocker
+    # The image extensions, plus the resource type check on extensionless URLs
+    assert [c.args[0] for c in context.route.call_args_list][1] is blocker._typed
+
+    await blocker.set_activity("/season-arena.html")
+    assert context.unroute.call_count == 2
+    assert context.route.call_count == 2
+
+    route = MagicMock()
+    route.request.url = "https://x.com/a.png"
+    route.abort = AsyncMock()
+    await blocker._abort(route)
+    route.abort.assert_called_once_with("blockedbyclient")
+    assert blocking.stats.counters[("manga", "/season-arena.html")].requests_blocked == 1
+    context.on.assert_called_once_with("response", blocker._on_response)
+
+    blocker.uninstall()
+    assert RequestBlocker.get(context) is None
+
+@pytest.mark.asyncio
+async def test_extensionless_requests_blocked_by_resource_type(monkeypatch):
+    monkeypatch.setattr(blocking, "stats", BlockingStats())
+    context = MagicMock()
+    context.route = AsyncMock()
+    blocker = RequestBlocker(context, BlockingPolicy(resource_types=["image"]), "manga")
+    await blocker.install()
+
+    image, xhr = MagicMock(), MagicMock()
+    for route, resource_type in ((image, "image"), (xhr, "xhr")):
+        route.request.resource_type = resource_type
+        route.abort = AsyncMock()
+        route.fallback = AsyncMock()
+        await blocker._abort_by_type(route)
+    image.abort.assert_awaited_once_with("blockedbyclient")
+    xhr.abort.assert_not_awaited()
+    xhr.fallback.assert_awaited_once()
+    assert blocking.stats.counters[("manga", "session")].requests_blocked == 1
+
+@pytest.mark.asyncio
+async def test_concurrent_activities_keep_each_others_allowlists(monkeypatch):
+    monkeypatch.setattr(blocking, "stats", BlockingStats())
+    context = MagicMock()
+    context.route = AsyncMock()
+    context.unroute = AsyncMock()
+    policy = BlockingPolicy(resource_types=["image", "font"], allow={"/season-arena.html": {"resource_types": ["image"]}})
+    blocker = RequestBlocker(context, policy, "manga")
+    await blocker.install()
+
+    await blocker.enter("/leagues.html")
+    await blocker.enter("/season-arena.html")
+    assert matches(blocker._patterns, "https://x.com/a.woff2")
+    assert not matches(blocker._patterns, "https://x.com/a.png")
+    assert blocker.activity == "/season-arena.html"
+
+    await blocker.leave("/season-arena.html")
+    assert matches(blocker._patterns, "https://x.com/a.png")
+    assert blocker.activity == "/leagues.html"
+    await blocker.leave("/leagues.html")
+    assert blocker.activity == "session"
+    blocker.uninstall()
+
+def test_blocked_bytes_are_exported(monkeypatch):
+    from utils import metrics
+    monkeypatch.setattr(blocking, "stats", BlockingStats())
+    blocking.stats.allowed("manga", "/leagues.html", "https://x.com/a.png", "image", 2048)
+    blocking.stats.blocked("manga", "/season-arena.html", "https://x.com/a.png", "image")
+    assert 'gamebot_blocked_bytes_total{domain="manga",activity="/season-arena.html"} 2048' in metrics.registry.render()
@@ -0,0 +1,65 @@
+import asyncio
+import pytest
+from utils import breaker as breaker_module
+from utils.breaker import CLOSED, HALF_OPEN, OPEN, BreakerSettings, CircuitBreaker, probe_url
+
+SETTINGS = BreakerSettings(failure_threshold=2, open_seconds=60, max_open_seconds=100)
+
+@pytest.fixture
+def probe(monkeypatch):
+    results = []
+    monkeypatch.setattr(breaker_module, "probe_url", lambda url, timeout: results.pop(0))
+    return results
+
+def open_breaker():
+    breaker = CircuitBreaker("manga", SETTINGS)
+    assert not breaker.record_failure()
+    assert breaker.record_failure()
+    return breaker
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("manga", SETTINGS)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker = open_breaker()
+    assert breaker.state == OPEN
+    assert 59 < breaker.seconds_until_probe() <= 60
+
+@pytest.mark.asyncio
+async def test_open_breaker_skips_until_probe_succeeds(probe):
+    breaker = open_breaker()
+    assert not await breaker.allow("https://www.mangarpg.com")
+
+    # Probe fails: stay open for twice as long, capped
+    breaker.opened_until = 0
+    probe.append(False)
+    assert not await breaker.allow("https://www.mangarpg.com")
+    assert breaker.open_seconds == 100 and breaker.state == OPEN
+
+    # Probe succeeds: one trial cycle, whose failure reopens at once
+    breaker.opened_until = 0
+    probe.append(True)
+    assert await breaker.allow("https://www.mangarpg.com")
+    assert breaker.state == HALF_OPEN
+    assert breaker.record_failure()
+
+    breaker.opened_until = 0
+    probe.append(True)
+    assert await breaker.allow("https://www.mangarpg.com")
+    breaker.record_success()
+    assert (breaker.state, breaker.failures, breaker.open_seconds) == (CLOSED, 0, 60)
+
+@pytest.mark.asyncio
+async def test_accounts_share_one_probe(probe):
+    breaker = open_breaker()
+    breaker.opened_until = 0
+    probe.append(True)
+    assert await asyncio.gather(breaker.allow("u"), breaker.allow("u")) == [True, True]
+    assert probe == []
+
+def test_unreachable_site_is_down():
+    assert not probe_url("http://127.0.0.1:9/", timeout=1)
+    assert CircuitBreaker.for_domain("manga") is CircuitBreaker.for_domain("manga")
@@ -0,0 +1,104 @@
+import asyncio
+import os
+import pytest
+from utils import config_loader
+from utils.config_loader import ConfigError, ConfigService, validate_config
+
+CONFIG = """
+browser:
+  headless: true
+domains:
+  - name: manga
+    url: https://manga.example
+    activity_order: ["/collect", "/leagues.html"]
+  - name: comic
+    url: https://comic.example
+    enabled: false
+"""
+
+VILLAINS = """
+manga:
+  villains:
+    Dark Lord: 1
+    Ninja Spy: 2
+  priority: ["Ninja Spy", "Dark Lord"]
+"""
+
+def write(path, text, bump=0):
+    path.write_text(text)
+    # mtime resolution can be coarse; make every rewrite visible to the watcher
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + bump))
+
+@pytest.fixture
+def files(tmp_path):
+    config, villains = tmp_path / "config.yaml", tmp_path / "villains.yaml"
+    write(config, CONFIG)
+    write(villains, VILLAINS)
+    return config, villains
+
+def test_parsed_once_and_frozen(files):
+    service = ConfigService(*map(str, files))
+    snapshot = service.snapshot
+    assert service.snapshot is snapshot and service.reload() is None
+    assert [d["name"] for d in snapshot.enabled_domains()] == ["manga"]
+    assert snapshot.data["domains"][0]["activity_order"] == ("/collect", "/leagues.html")
+    with pytest.raises(TypeError):
+        snapshot.data["domains"][0]["enabled"] = False
+    assert snapshot.villains["manga"].priority == ("Ninja Spy", "Dark Lord")
+    assert snapshot.villains["manga"].ids["Ninja Spy"] == 2
+
+def test_reload_swaps_snapshot_on_change(files):
+    config, villains = files
+    service = ConfigService(str(config), str(villains))
+    first = service.snapshot
+    write(villains, VILLAINS.replace('["Ninja Spy", "Dark Lord"]', '["Dark Lord"]'), bump=10)
+
+    second = service.reload()
+    assert second is service.snapshot and second.version == first.version + 1
+    assert second.villains["manga"].priority == ("Dark Lord",)
+    assert first.villains["manga"].priority == ("Ninja Spy", "Dark Lord")
+
+def test_validation():
+    assert validate_config({"browser": {}, "domains": [{"name": "manga", "url": "https://manga.example"}]}) == []
+    problems = validate_config({"domains": [
+        {"name": "manga", "url": "https://manga.example", "disabled_activities": ["leagues.html"]},
+        {"name": "manga", "enabled": "yes"},
+    ]})
+    assert problems == [
+        "browser: missing or not a mapping",
+        "domains[0].disabled_activities: must be a list of paths starting with '/'",
+        "domains[1].name: duplicate domain 'manga'",
+        "domains[1].url: required",
+        "domains[1].enabled: must be true or false",
+    ]
+
+def test_invalid_file_is_rejected(files):
+    config, villains = files
+    write(config, "browser: [")
+    with pytest.raises(ConfigError):
+        ConfigService(str(config), str(villains)).snapshot
+
+@pytest.mark.asyncio
+async def test_watch_keeps_last_good_config(files):
+    config, villains = files
+    service = ConfigService(str(config), str(villains))
+    first = service.snapshot
+    seen = []
+    unsubscribe = service.on_change(seen.append)
+    watcher = asyncio.create_task(service.watch(interval=0.01))
+    try:
+        write(config, CONFIG.replace("url: https://comic.example", "url: 7"), bump=10)
+        await asyncio.sleep(0.1)
+        assert service.snapshot.data is first.data and seen == []
+
+        write(config, CONFIG.replace("enabled: false", "enabled: true"), bump=20)
+        await asyncio.sleep(0.1)
+        assert [s.version for s in seen] == [2]
+        assert [d["name"] for d in service.snapshot.enabled_domains()] == ["manga", "comic"]
+    finally:
+        unsubscribe()
+        watcher.cancel()
+
+def test_load_config_is_cached():
+    assert config_loader.load_config() is config_loader.load_config()
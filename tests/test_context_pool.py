@@ -0,0 +1,141 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from utils.session_manager import AsyncSessionManager
+
+POOL = {"enabled": True, "max_age_seconds": 7200, "max_errors": 2, "max_rss_mb": None}
+
+def make_context():
+    page = MagicMock()
+    page.is_closed.return_value = False
+    page.url = "https://www.mangarpg.com/home.html"
+    page.evaluate = AsyncMock(return_value="complete")
+    context = MagicMock()
+    context.pages = [page]
+    context.route = AsyncMock()
+    context.close = AsyncMock()
+    page.context = context
+    return context
+
+@pytest.fixture
+def browser(monkeypatch):
+    browser = MagicMock()
+    browser.new_context = AsyncMock(side_effect=lambda **kwargs: make_context())
+    monkeypatch.setattr(AsyncSessionManager, "_pool", {})
+    monkeypatch.setattr(AsyncSessionManager, "_open", {})
+    monkeypatch.setattr(AsyncSessionManager, "_limiter", None)
+    monkeypatch.setattr(AsyncSessionManager, "asset_cache", None)
+    monkeypatch.setattr(AsyncSessionManager, "get_browser", AsyncMock(return_value=browser))
+    return browser
+
+def make_session(browser_cfg=None, **overrides):
+    session = AsyncSessionManager()
+    # The loaded config is read-only; each session gets its own variant
+    browser_cfg = {**session.config["browser"], "context_pool": {**POOL, **overrides}, **(browser_cfg or {})}
+    session.config = {**session.config, "browser": browser_cfg}
+    return session
+
+@pytest.mark.asyncio
+async def test_context_is_reused_across_cycles(browser):
+    first = make_session()
+    page = await first.start("manga")
+    assert not first.warm
+    await first.stop()
+
+    second = make_session()
+    assert await second.start("manga") is page
+    assert second.warm
+    assert browser.new_context.call_count == 1
+    await second.stop()
+
+    # Other domains get their own context
+    other = make_session()
+    assert await other.start("comic") is not page
+    assert browser.new_context.call_count == 2
+
+@pytest.mark.asyncio
+async def test_context_recycled_after_errors(browser):
+    for _ in range(2):
+        session = make_session()
+        page = await session.start("manga")
+        await session.stop(failed=True)
+
+    page.context.close.assert_awaited_once()
+    session = make_session()
+    await session.start("manga")
+    assert not session.warm
+    assert browser.new_context.call_count == 2
+
+@pytest.mark.asyncio
+async def test_unhealthy_context_is_replaced(browser):
+    session = make_session()
+    page = await session.start("manga")
+    await session.stop()
+
+    page.url = "about:blank"
+    session = make_session()
+    assert await session.start("manga") is not page
+    assert not session.warm
+    page.context.close.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_disabled_pool_closes_context(browser):
+    session = make_session(enabled=False)
+    page = await session.start("manga")
+    await session.stop()
+    page.context.close.assert_awaited_once()
+    assert AsyncSessionManager._pool == {}
+
+@pytest.mark.asyncio
+async def test_shutdown_closes_pooled_contexts(browser):
+    session = make_session()
+    page = await session.start("manga")
+    await session.stop()
+
+    # Still checked out when the bot stops
+    busy = await make_session().start("comic")
+
+    await AsyncSessionManager.shutdown()
+    page.context.close.assert_awaited_once()
+    busy.context.close.assert_awaited_once()
+    assert AsyncSessionManager._pool == {} and AsyncSessionManager._open == {}
+
+@pytest.mark.asyncio
+async def test_context_cap_waits_and_frees_idle_contexts(browser):
+    def capped():
+        return make_session({"max_contexts": 1})
+
+    first = capped()
+    await first.start("manga")
+    waiter = capped()
+    waiting = asyncio.create_task(waiter.start("comic"))
+    await asyncio.sleep(0.01)
+    assert not waiting.done()
+
+    # With someone waiting, the released context is closed instead of pooled
+    await first.stop()
+    await waiting
+    assert "manga" not in AsyncSessionManager._pool
+    await waiter.stop()
+
+    # An idle pooled context is closed to make room
+    third = capped()
+    await third.start("stars")
+    assert "comic" not in AsyncSessionManager._pool
+    assert AsyncSessionManager._limiter.in_use == 1
+
+@pytest.mark.asyncio
+async def test_persistent_profile_gets_the_stored_session(browser, monkeypatch, tmp_path):
+    from utils import session_manager
+    playwright = MagicMock()
+    context = make_context()
+    context.add_cookies = AsyncMock()
+    playwright.chromium.launch_persistent_context = AsyncMock(return_value=context)
+    monkeypatch.setattr(AsyncSessionManager, "_playwright", playwright)
+    cookies = [{"name": "sid", "value": "1", "domain": "www.mangarpg.com", "path": "/"}]
+    monkeypatch.setattr(session_manager.session_store, "storage_state", lambda domain, account: {"cookies": cookies})
+
+    session = make_session(persistent_profiles_dir=str(tmp_path))
+    await session.start("manga")
+    context.add_cookies.assert_awaited_once_with(cookies)
+    browser.new_context.assert_not_called()
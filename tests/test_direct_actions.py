@@ -0,0 +1,98 @@
+import asyncio
+import pytest
+import pytest_asyncio
+from unittest.mock import MagicMock
+import activities.registry  # Loads the activity modules in dependency order
+from activities.impl.battle import BattleActivity
+from activities.impl.collect import CollectActivity
+from activities.impl.league import LeagueActivity
+from benchmark.fake_server import FakeGame, create_app
+from benchmark.harness import _free_port
+from utils import direct_actions
+from utils.direct_actions import DirectAction, DirectActionSettings, DirectActionStats
+from utils.game_state import GameStateProbe
+
+uvicorn = pytest.importorskip("uvicorn")
+async_api = pytest.importorskip("playwright.async_api")
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch):
+    monkeypatch.setattr(direct_actions, "settings", DirectActionSettings(enabled=True))
+    monkeypatch.setattr(direct_actions, "stats", DirectActionStats())
+
+@pytest_asyncio.fixture
+async def server():
+    game = FakeGame(["127"])
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(create_app(game, asset_kb=1), host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    yield game, f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    await task
+
+@pytest_asyncio.fixture
+async def request_context():
+    async with async_api.async_playwright() as p:
+        context = await p.request.new_context()
+        yield context
+        await context.dispose()
+
+def make_page(request_context, url):
+    """Stands in for a page: only its URL and its context's request client are used."""
+    page = MagicMock()
+    page.url = url
+    page.context.request = request_context
+    return page
+
+@pytest.mark.asyncio
+async def test_direct_fight_shares_login_and_updates_state(server, request_context):
+    game, base = server
+    await request_context.post(f"{base}/auth/login", form={"email": "a@b.c", "password": "x"})
+    page = make_page(request_context, f"{base}/troll-pre-battle.html?id_opponent=1")
+    probe = GameStateProbe(page, "127")
+    probe.install()
+    try:
+        battle = BattleActivity()
+        reply = await battle.run_direct(page, "fight", id_opponent=1)
+        assert reply["success"] and reply["outcome"] == "victory"
+        assert await battle.get_energy(page) == game.domains["127"].energy.current() == 4
+
+        # An ordinary refusal is a valid reply, not a reason to fall back
+        game.domains["127"].energy.spend(4)
+        reply = await battle.run_direct(page, "fight", id_opponent=1)
+        assert reply == {"success": False, "error": "no_energy", "resources": game.domains["127"].resources()}
+        assert probe.state.reading("energy").current == 0
+
+        league = make_page(request_context, f"{base}/leagues.html")
+        reply = await LeagueActivity().run_direct(league, "x3", id_opponent=2, battles=3)
+        assert reply["battles"] == 3 and game.domains["127"].challenge_points.current() == 3
+
+        home = make_page(request_context, f"{base}/home.html")
+        assert (await CollectActivity().run_direct(home, "collect"))["success"]
+        assert (await CollectActivity().run_direct(home, "collect"))["error"] == "nothing_to_collect"
+    finally:
+        probe.uninstall()
+    assert direct_actions.stats.direct["/ajax/troll_fight"] == 2
+    assert not direct_actions.stats.fallbacks
+
+@pytest.mark.asyncio
+async def test_unexpected_replies_fall_back_to_ui(server, request_context):
+    game, base = server
+    page = make_page(request_context, f"{base}/troll-pre-battle.html?id_opponent=1")
+
+    # Not logged in: the game answers 403
+    assert await BattleActivity().run_direct(page, "fight", id_opponent=1) is None
+    # Not an action endpoint
+    assert await direct_actions.perform(page, DirectAction("/home.html")) is None
+    assert direct_actions.stats.fallbacks == {"/ajax/troll_fight": 1, "/home.html": 1}
+    assert game.domains["127"].energy.current() == 5
+
+@pytest.mark.asyncio
+async def test_disabled_or_undeclared_actions_use_ui(monkeypatch):
+    page = MagicMock()
+    assert await BattleActivity().run_direct(page, "collect") is None
+    monkeypatch.setattr(direct_actions, "settings", DirectActionSettings(enabled=False))
+    assert await BattleActivity().run_direct(page, "fight", id_opponent=1) is None
+    assert not direct_actions.stats.direct and not direct_actions.stats.fallbacks
@@ -0,0 +1,60 @@
+import time
+import pytest
+from benchmark.fake_server import Counter, FakeGame, create_app, SESSION_COOKIE
+from benchmark.harness import fake_domain_names
+from utils import procstats
+
+def test_counter_regenerates_and_spends():
+    counter = Counter(value=2, maximum=5, regen_seconds=10, updated_at=time.time() - 25)
+    assert counter.current() == 4
+    assert 0 < counter.seconds_to_next() <= 5
+    assert counter.spend(3)
+    assert counter.current() == 1
+    assert not counter.spend(2)
+
+def test_counter_full_has_no_timer():
+    counter = Counter(value=5, maximum=5, regen_seconds=10)
+    assert counter.seconds_to_next() == 0
+
+def test_fake_game_per_host_state():
+    game = FakeGame(["manga"])
+    assert game.for_host("manga.localhost") is game.domains["manga"]
+    assert game.for_host("comic.localhost").name == "comic"
+    assert len(game.domains["manga"].season_opponents) == 3
+
+def test_fake_domain_names_resolve_villain_keys():
+    assert fake_domain_names(6) == ["manga", "comic", "stars", "hero", "manga1", "comic1"]
+
+def test_procstats_sample_current_process():
+    sample = procstats.sample()
+    assert sample.processes >= 1
+    assert sample.rss_bytes > 0
+
+def test_fake_app_login_and_fight():
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    game = FakeGame(["manga"])
+    client = TestClient(create_app(game, asset_kb=1), base_url="http://manga.localhost")
+
+    home = client.get("/home.html")
+    assert "authentication-iframe" in home.text
+    assert "DarkKnight" not in home.text
+    assert client.get("/troll-pre-battle.html", follow_redirects=False).status_code in (302, 307)
+
+    client.post("/auth/login", data={"email": "a@b.c", "password": "x"})
+    assert SESSION_COOKIE in client.cookies
+    home = client.get("/home.html")
+    assert "title=\"DarkKnight\"" in home.text
+    assert 'id="collect_all"' in home.text
+
+    battle = client.get("/troll-pre-battle.html?id_opponent=1")
+    assert 'span energy="">5<' in battle.text
+    result = client.post("/ajax/troll_fight", json={"id_opponent": 1}).json()
+    assert result["success"] and result["resources"]["energy"] == 4
+
+    result = client.post("/ajax/league_fight", json={"id_opponent": 2, "battles": 3}).json()
+    assert result["resources"]["challenge_points"] == 3
+
+    client.post("/ajax/collect")
+    assert 'id="collect_all"' not in client.get("/home.html").text
@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from activities.impl.league import LeagueActivity
+from utils import game_state
+from utils.game_state import GameState, GameStateProbe, ResourceState, parse_payload
+from utils.scheduler import ResourceReading
+
+def test_parse_fake_server_payload():
+    payload = {"success": True, "outcome": "victory",
+               "resources": {"energy": 4, "kisses": 3, "challenge_points": 6},
+               "energy_regen_seconds": 120}
+    resources = parse_payload(payload)
+    assert resources["energy"].current == 4
+    assert resources["energy"].next_tick_seconds == 120
+    assert resources["kisses"].next_tick_seconds is None
+    assert resources["challenge_points"].current == 6
+
+def test_parse_nested_game_payload():
+    payload = {"hero": {"energies": {"energy_kiss": {"amount": "7", "max_amount": 10, "next_refresh_ts": 900}}}}
+    kisses = parse_payload(payload)["kisses"]
+    assert (kisses.current, kisses.maximum, kisses.next_tick_seconds) == (7, 10, 900)
+    assert parse_payload({"success": True, "html": "<div></div>"}) == {}
+    assert parse_payload([1, 2, 3]) == {}
+
+def test_refresh_timestamps_become_countdowns(monkeypatch):
+    monkeypatch.setattr(game_state.time, "time", lambda: 1_700_000_000)
+    payload = {"energy_fight": {"amount": 3, "next_refresh_ts": 1_700_000_300}}
+    assert parse_payload(payload)["energy"].next_tick_seconds == 300
+    payload = {"energy_fight": {"amount": 3, "next_refresh_ts": 1_700_000_300_000}}
+    assert parse_payload(payload)["energy"].next_tick_seconds == 300
+    # A timestamp already past means the tick is due
+    payload = {"energy_fight": {"amount": 3, "next_refresh_ts": 1_699_999_000}}
+    assert parse_payload(payload)["energy"].next_tick_seconds == 0
+
+def test_reading_expires_when_counter_may_have_ticked():
+    state = GameState(resources={
+        "energy": ResourceState(current=4, maximum=20, next_tick_seconds=100, observed_at=0),
+        "kisses": ResourceState(current=10, maximum=10, next_tick_seconds=0, observed_at=0),
+    })
+    assert state.reading("energy", now=40) == ResourceReading(current=4, maximum=20, next_tick_seconds=60)
+    assert state.reading("energy", now=101) is None
+    # A full counter stays full
+    assert state.reading("kisses", now=10_000).current == 10
+    assert state.reading("challenge_points", now=0) is None
+
+@pytest.mark.asyncio
+async def test_probe_observes_json_responses_only():
+    page = MagicMock()
+    probe = GameStateProbe(page, "manga")
+    probe.install()
+    assert GameStateProbe.get(page) is probe
+
+    response = MagicMock()
+    response.request.resource_type = "fetch"
+    response.headers = {"content-type": "application/json"}
+    response.json = AsyncMock(return_value={"outcome": "victory", "resources": {"energy": 2}})
+
+    waiter = asyncio.create_task(probe.wait_for_update(0))
+    await probe._on_response(response)
+    assert await waiter
+    assert probe.state.reading("energy").current == 2
+    assert probe.state.wins == 1
+
+    document = MagicMock()
+    document.request.resource_type = "document"
+    await probe._on_response(document)
+    document.json.assert_not_called()
+    assert not await probe.wait_for_update(probe.state.version, timeout=0.01)
+
+    probe.uninstall()
+    assert GameStateProbe.get(page) is None
+
+@pytest.mark.asyncio
+async def test_activity_reads_memory_before_dom():
+    activity = LeagueActivity()
+    page = MagicMock()
+    bar = MagicMock()
+    probe = GameStateProbe(page)
+    probe.install()
+    activity.read_resource = AsyncMock(return_value=ResourceReading(current=9))
+    try:
+        assert (await activity.current_resource(page, bar)).current == 9
+        probe.observe({"resources": {"challenge_points": 12}})
+        assert (await activity.current_resource(page, bar)).current == 12
+        activity.read_resource.assert_called_once()
+    finally:
+        probe.uninstall()
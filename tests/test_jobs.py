@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+from utils.jobs import DONE, FAILED, QUEUED, RUNNING, JobQueue
+
+def test_jobs_run_by_priority_then_submission_order():
+    jobs = JobQueue()
+    low = jobs.submit("manga", "/collect")
+    high = jobs.submit("manga", "/leagues.html", priority=10)
+    second_low = jobs.submit("manga", "/season-arena.html")
+    jobs.submit("comic", "/collect")
+
+    assert [jobs.pop("manga").id for _ in range(3)] == [high.id, low.id, second_low.id]
+    assert jobs.pop("manga") is None and jobs.pending("comic") == 1
+    assert high.status == RUNNING and high.started_at is not None
+
+    jobs.finish(high)
+    jobs.finish(low, "boom")
+    assert (jobs.get(high.id).status, jobs.get(low.id).status, jobs.get(low.id).error) == (DONE, FAILED, "boom")
+    assert [j.domain for j in jobs.jobs("comic")] == ["comic"]
+
+def test_fail_pending_and_history():
+    jobs = JobQueue(history=2)
+    first = jobs.submit("manga", "/collect")
+    jobs.fail_pending("manga", "Login failed")
+    assert first.status == FAILED and jobs.pending("manga") == 0
+
+    jobs.submit("manga", "/collect")
+    jobs.submit("manga", "/collect")
+    assert jobs.get(first.id) is None
+    assert all(j.status == QUEUED for j in jobs.jobs())
+
+@pytest.mark.asyncio
+async def test_submission_wakes_the_domain():
+    jobs = JobQueue()
+    sleeper = asyncio.create_task(jobs.wait("manga", 30))
+    await asyncio.sleep(0.01)
+    jobs.submit("comic", "/collect")
+    await asyncio.sleep(0.01)
+    assert not sleeper.done()
+
+    jobs.submit("manga", "/collect")
+    assert await asyncio.wait_for(sleeper, 1)
+    assert not await jobs.wait("stars", 0.01)
+
+def test_preemption_is_seen_through_the_pages_context():
+    jobs = JobQueue()
+    page = MagicMock()
+    jobs.bind(page.context, "manga")
+    assert not jobs.preempt_requested(page)
+    jobs.submit("manga", "/collect")
+    assert jobs.preempt_requested(page)
+    jobs.unbind(page.context)
+    assert not jobs.preempt_requested(page)
+
+def test_stopped_domain_fails_its_queued_jobs():
+    jobs = JobQueue()
+    jobs.serve("manga")
+    job = jobs.submit("manga", "/collect")
+    jobs.unserve("manga")
+    assert "manga" not in jobs.served
+    assert jobs.get(job.id).status == FAILED and jobs.pending("manga") == 0
@@ -0,0 +1,44 @@
+import gzip
+import logging
+import pytest
+import structlog
+from utils import logger as logger_module
+from utils.logger import EventSampler, LogSettings, setup_logger
+
+def test_sampler_drops_and_counts_suppressed_events():
+    sampler = EventSampler({"Checking opponent": 0}, {"Target found": 2})
+    with pytest.raises(structlog.DropEvent):
+        sampler(None, "info", {"event": "Checking opponent"})
+    assert sampler(None, "warning", {"event": "Checking opponent"}) == {"event": "Checking opponent"}
+
+    assert [e for e in (_passes(sampler, "Target found") for _ in range(4)) if e] == [True, True]
+    sampler._buckets["Target found"] = (1, sampler._buckets["Target found"][1])
+    assert sampler(None, "info", {"event": "Target found"}) == {"event": "Target found", "suppressed": 2}
+    assert sampler.total == {"Checking opponent": 1, "Target found": 2}
+
+def _passes(sampler, event):
+    try:
+        sampler(None, "info", {"event": event})
+        return True
+    except structlog.DropEvent:
+        return False
+
+@pytest.fixture
+def restore_logging():
+    yield
+    setup_logger()
+
+def test_background_writer_rotates_and_compresses(tmp_path, restore_logging):
+    console = open(tmp_path / "console.log", "w")
+    setup_logger(LogSettings(directory=str(tmp_path), rotate_mb=0.001, backups=2), stream=console)
+    log = structlog.get_logger()
+    for i in range(50):
+        log.info("Filler record", index=i)
+    logger_module.stop_logging()
+    console.close()
+
+    assert isinstance(logging.getLogger().handlers[0], logger_module.DroppingQueueHandler)
+    backups = sorted(p.name for p in tmp_path.glob("game_bot.log.*"))
+    assert backups == ["game_bot.log.1.gz", "game_bot.log.2.gz"]
+    assert b"Filler record" in gzip.decompress((tmp_path / "game_bot.log.1.gz").read_bytes())
+    assert "Filler record" in (tmp_path / "console.log").read_text()
@@ -0,0 +1,51 @@
+from utils.metrics import Registry
+
+def test_counters_and_gauges_render_per_label():
+    registry = Registry()
+    fights = registry.counter("fights_total", "Fights.", ("domain",))
+    fights.inc("a")
+    fights.inc("a", amount=2)
+    fights.inc('b"x')
+    registry.gauge("pages", "Pages.", collect=lambda: {(): 4})
+
+    assert registry.render().splitlines() == [
+        "# HELP fights_total Fights.",
+        "# TYPE fights_total counter",
+        'fights_total{domain="a"} 3',
+        'fights_total{domain="b\\"x"} 1',
+        "# HELP pages Pages.",
+        "# TYPE pages gauge",
+        "pages 4",
+    ]
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    seconds = registry.histogram("nav_seconds", "Navigations.", ("domain",), buckets=(1, 5))
+    for value in (0.5, 1, 3, 10):
+        seconds.observe(value, "a")
+
+    lines = registry.render().splitlines()[2:]
+    assert lines == [
+        'nav_seconds_bucket{domain="a",le="1"} 2',
+        'nav_seconds_bucket{domain="a",le="5"} 3',
+        'nav_seconds_bucket{domain="a",le="+Inf"} 4',
+        'nav_seconds_sum{domain="a"} 14.5',
+        'nav_seconds_count{domain="a"} 4',
+    ]
+
+def test_samples_from_other_processes_render_with_their_label():
+    worker = Registry()
+    worker.counter("fights_total", "Fights.", ("domain",)).inc("a", amount=2)
+    worker.gauge("pages", "Pages.", collect=lambda: {(): 3})
+    coordinator = Registry()
+    coordinator.counter("fights_total", "Fights.", ("domain",))
+
+    coordinator.merge("1", worker.export())
+    assert coordinator.render().splitlines() == [
+        "# HELP fights_total Fights.",
+        "# TYPE fights_total counter",
+        'fights_total{domain="a",shard="1"} 2',
+        "# HELP pages Pages.",
+        "# TYPE pages gauge",
+        'pages{shard="1"} 3',
+    ]
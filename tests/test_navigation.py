@@ -0,0 +1,46 @@
+import pytest
+from unittest.mock import AsyncMock
+from utils import navigation
+from utils.navigation import NavigationSettings, NavigationStats, navigate
+
+@pytest.fixture(autouse=True)
+def fresh_navigation(monkeypatch):
+    monkeypatch.setattr(navigation, "settings", NavigationSettings())
+    monkeypatch.setattr(navigation, "stats", NavigationStats())
+
+@pytest.mark.asyncio
+async def test_navigate_resolves_on_ready_selector():
+    page = AsyncMock()
+    await navigate(page, "https://example.com/leagues.html", ready=".go_pre_battle")
+
+    page.goto.assert_called_once_with("https://example.com/leagues.html", wait_until="commit", timeout=60000)
+    page.wait_for_selector.assert_called_once_with(".go_pre_battle", state="visible", timeout=15000)
+    page.wait_for_load_state.assert_not_called()
+    assert navigation.stats.count == 1
+    assert navigation.stats.fallbacks == 0
+
+@pytest.mark.asyncio
+async def test_navigate_falls_back_to_networkidle():
+    page = AsyncMock()
+    page.wait_for_selector.side_effect = Exception("Timeout")
+    await navigate(page, "https://example.com/leagues.html", ready=".go_pre_battle")
+
+    page.wait_for_load_state.assert_called_once_with("networkidle", timeout=60000)
+    assert navigation.stats.fallbacks == 1
+
+@pytest.mark.asyncio
+async def test_navigate_without_ready_selector_uses_networkidle():
+    page = AsyncMock()
+    await navigate(page, "https://example.com/", timeout=30000)
+
+    page.goto.assert_called_once_with("https://example.com/", wait_until="networkidle", timeout=30000)
+    page.wait_for_selector.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_networkidle_strategy_ignores_ready_selector(monkeypatch):
+    monkeypatch.setattr(navigation, "settings", NavigationSettings(strategy="networkidle"))
+    page = AsyncMock()
+    await navigate(page, "https://example.com/leagues.html", ready=".go_pre_battle")
+
+    page.goto.assert_called_once_with("https://example.com/leagues.html", wait_until="networkidle", timeout=60000)
+    page.wait_for_selector.assert_not_called()
@@ -0,0 +1,109 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from playwright.async_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+from utils import navigation, retry
+from utils.navigation import NavigationStats, navigate
+from utils.human import HumanUtils
+from utils.retry import RetryPolicy, RetrySettings, RetryStats, is_retryable
+
+FAST = RetrySettings(attempts=3, click_attempts=3, base_delay_seconds=0.01, multiplier=2, max_delay_seconds=0.02, jitter=0)
+
+@pytest.fixture(autouse=True)
+def fresh_stats(monkeypatch):
+    monkeypatch.setattr(retry, "stats", RetryStats())
+    monkeypatch.setattr(navigation, "stats", NavigationStats())
+
+def flaky(failures, error=PlaywrightTimeoutError("Timeout 30000ms exceeded")):
+    calls = []
+
+    async def operation():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise error
+        return "ok"
+    return operation, calls
+
+def test_settings_domain_overrides_global():
+    config = {"performance": {"retry": {"attempts": 4, "budget_per_cycle": 6}}}
+    settings = RetrySettings.from_config(config, {"retry": {"attempts": 2}})
+    assert (settings.attempts, settings.budget_per_cycle) == (2, 6)
+
+def test_classification():
+    assert is_retryable(PlaywrightTimeoutError("Timeout"), "click")
+    assert is_retryable(PlaywrightError("net::ERR_CONNECTION_RESET at https://x"), "navigation")
+    assert not is_retryable(PlaywrightError("net::ERR_CONNECTION_RESET at https://x"), "click")
+    assert not is_retryable(PlaywrightError("Target page, context or browser has been closed"))
+    assert not is_retryable(ValueError("bad selector"))
+
+def test_backoff_grows_and_caps():
+    policy = RetryPolicy(RetrySettings(base_delay_seconds=1, multiplier=3, max_delay_seconds=5, jitter=0))
+    assert [policy.delay(n) for n in (1, 2, 3)] == [1, 3, 5]
+    jittered = RetryPolicy(RetrySettings(base_delay_seconds=1, jitter=0.5))
+    assert all(0.5 <= jittered.delay(1) <= 1 for _ in range(20))
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried_and_recorded():
+    operation, calls = flaky(2)
+    assert await RetryPolicy(FAST).run(operation, "click") == "ok"
+    assert len(calls) == 3
+    assert retry.stats.retries == {"click": 2}
+    assert retry.stats.delay_seconds["click"] == pytest.approx(0.03)
+
+    operation, calls = flaky(5)
+    with pytest.raises(PlaywrightTimeoutError):
+        await RetryPolicy(FAST).run(operation, "click")
+    assert len(calls) == 3 and retry.stats.gave_up == {"click": 1}
+
+@pytest.mark.asyncio
+async def test_clicks_get_fewer_attempts_and_submits_none():
+    operation, calls = flaky(5)
+    with pytest.raises(PlaywrightTimeoutError):
+        await RetryPolicy(RetrySettings(**{**vars(FAST), "click_attempts": 2})).run(operation, "click")
+    assert len(calls) == 2
+
+    page = MagicMock()
+    locator = MagicMock()
+    locator.scroll_into_view_if_needed = AsyncMock(side_effect=PlaywrightTimeoutError("Timeout"))
+    locator.click = AsyncMock(side_effect=PlaywrightTimeoutError("Timeout"))
+    RetryPolicy(FAST, "manga").attach(page.context)
+    try:
+        with pytest.raises(PlaywrightTimeoutError):
+            await HumanUtils.human_click(page, locator, submits=True)
+    finally:
+        RetryPolicy._by_context.clear()
+    # One attempt: the click may have gone through before the timeout
+    assert locator.click.await_count == 1
+    assert locator.click.await_args.kwargs == {"timeout": HumanUtils.click_timeout_ms}
+    assert retry.stats.retries == {"click": 1}  # The first operation's only
+
+@pytest.mark.asyncio
+async def test_fatal_errors_and_spent_budget_fail_fast():
+    operation, calls = flaky(1, ValueError("bug"))
+    with pytest.raises(ValueError):
+        await RetryPolicy(FAST).run(operation)
+    assert len(calls) == 1
+
+    policy = RetryPolicy(RetrySettings(**{**vars(FAST), "budget_per_cycle": 1}))
+    assert await policy.run(flaky(1)[0]) == "ok"
+    operation, calls = flaky(1)
+    with pytest.raises(PlaywrightTimeoutError):
+        await policy.run(operation)
+    assert len(calls) == 1 and retry.stats.budget_exhausted == 1
+
+@pytest.mark.asyncio
+async def test_navigate_uses_the_contexts_policy():
+    page = MagicMock()
+    page.goto = AsyncMock(side_effect=[PlaywrightError("net::ERR_NAME_NOT_RESOLVED"), None])
+    page.wait_for_load_state = AsyncMock()
+    policy = RetryPolicy(FAST, "manga")
+    policy.attach(page.context)
+    try:
+        await navigate(page, "https://example.com/")
+    finally:
+        policy.detach(page.context)
+
+    assert page.goto.call_count == 2
+    assert policy.budget == FAST.budget_per_cycle - 1
+    assert navigation.stats.count == 1 and navigation.stats.in_flight == 0
+    assert RetryPolicy.for_page(page) is not policy
@@ -0,0 +1,43 @@
+from activities.routes import RouteTable, host_key, registered_activities, route_table
+from activities.impl.battle import BattleActivity
+from activities.impl.home import HomeActivity
+from activities.registry import ActivityRegistry
+from utils.config_loader import config_service
+
+DOMAINS = [
+    {"name": "manga", "url": "https://www.mangarpg.com", "disabled_activities": ["/troll-pre-battle.html"]},
+    {"name": "local", "url": "http://d1.localhost:8080", "enabled": False},
+    {"name": "manga-copy", "url": "https://WWW.mangarpg.com/home.html"},
+]
+
+def table():
+    return RouteTable(DOMAINS, registered_activities())
+
+def test_host_key():
+    assert host_key("https://WWW.MangaRPG.com/home.html?x=1") == "www.mangarpg.com"
+    assert host_key("d1.localhost:8080/home") == "d1.localhost:8080"
+
+def test_hosts_resolve_by_exact_or_parent_host():
+    routes = table()
+    assert routes.domain_for("www.mangarpg.com").settings["name"] == "manga"
+    assert routes.domain_for("eu.www.mangarpg.com").settings["name"] == "manga"
+    assert routes.domain_for("d1.localhost:8080").enabled is False
+    assert routes.domain_for("d11.localhost:8080") is None
+    assert routes.domain_for("mangarpg.com") is None
+
+def test_query_strings_and_aliases():
+    routes = table()
+    domain, path, activity = routes.resolve("https://www.mangarpg.com/troll-pre-battle.html?id_opponent=3")
+    assert path == "/troll-pre-battle.html" and isinstance(activity, BattleActivity)
+    assert "/troll-pre-battle.html" in domain.disabled
+    # Aliases share the registered instance rather than making their own
+    assert routes.activity_for("/battle") is ActivityRegistry.get_activity("/troll-pre-battle.html")
+    assert isinstance(routes.activity_for("/home/"), HomeActivity)
+    assert routes.activity_for("/unknown") is None
+
+def test_recompiled_when_config_reloads(monkeypatch):
+    service = config_service()
+    routes = route_table()
+    assert route_table() is routes
+    monkeypatch.setattr(service, "_snapshot", service._read(service.snapshot.version + 1))
+    assert route_table() is not routes
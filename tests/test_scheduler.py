@@ -0,0 +1,111 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from utils.scheduler import ActivityScheduler, ResourceReading, parse_duration
+
+CONFIG = {
+    "min_sleep_seconds": 60,
+    "max_sleep_seconds": 1800,
+    "retry_seconds": 300,
+    "activities": {
+        "/collect": {"interval_seconds": 1800},
+        "/leagues.html": {"cost": 3, "regen_seconds": 2100},
+        "/season-arena.html": {"cost": 1, "regen_seconds": 7200},
+    },
+}
+
+@pytest.fixture
+def scheduler(tmp_path):
+    return ActivityScheduler({**CONFIG, "state_path": str(tmp_path / "schedule.json")})
+
+def test_parse_duration():
+    assert parse_duration("4m 12s") == 252
+    assert parse_duration("1h 05m") == 3900
+    assert parse_duration("12:34") == 754
+    assert parse_duration("01:02:03") == 3723
+    assert parse_duration("") is None
+    assert parse_duration("full") is None
+
+def test_predict_waits_for_cost(scheduler):
+    now = datetime(2026, 1, 1, 12, 0)
+    reading = ResourceReading(current=1, maximum=15, next_tick_seconds=600)
+    # Needs 2 more points: the shown countdown plus one full regeneration
+    assert scheduler.predict("/leagues.html", reading, now) == now + timedelta(seconds=600 + 2100)
+
+def test_predict_due_now_when_resources_available(scheduler):
+    now = datetime(2026, 1, 1, 12, 0)
+    assert scheduler.predict("/season-arena.html", ResourceReading(current=4), now) == now
+
+def test_predict_fixed_interval(scheduler):
+    now = datetime(2026, 1, 1, 12, 0)
+    assert scheduler.predict("/collect", None, now) == now + timedelta(seconds=1800)
+
+def test_record_waits_the_interval_when_resources_were_left_unspent(scheduler):
+    now = datetime(2026, 1, 1, 12, 0)
+    next_due = scheduler.record("manga", "/season-arena.html", ResourceReading(current=4), now=now)
+    assert next_due == now + timedelta(seconds=7200)
+    # No rules and no reading: the max sleep, not a cycle every min_sleep
+    assert scheduler.record("manga", "/home", None, now=now) == now + timedelta(seconds=1800)
+
+def test_record_brings_back_an_activity_that_yielded_to_a_job(scheduler):
+    now = datetime(2026, 1, 1, 12, 0)
+    next_due = scheduler.record("manga", "/season-arena.html", ResourceReading(current=4), now=now, yielded=True)
+    assert next_due == now + timedelta(seconds=60)
+
+def test_record_never_schedules_before_min_sleep(scheduler):
+    now = datetime(2026, 1, 1, 12, 0)
+    reading = ResourceReading(current=0, maximum=15, next_tick_seconds=5)
+    next_due = scheduler.record("manga", "/season-arena.html", reading, now=now)
+    assert next_due == now + timedelta(seconds=60)
+
+def test_due_activities_and_wake(scheduler):
+    now = datetime(2026, 1, 1, 12, 0)
+    order = ["/collect", "/leagues.html"]
+    assert scheduler.due_activities("manga", order, now=now) == order
+
+    scheduler.record("manga", "/collect", None, now=now)
+    scheduler.record("manga", "/leagues.html", ResourceReading(current=0, maximum=15, next_tick_seconds=100), now=now)
+    assert scheduler.due_activities("manga", order, now=now) == []
+    assert scheduler.seconds_until_wake("manga", order, now=now) == 1800
+
+def test_schedule_survives_restart(scheduler, tmp_path):
+    now = datetime(2026, 1, 1, 12, 0)
+    next_due = scheduler.record("comic", "/leagues.html", ResourceReading(current=2, maximum=15), now=now)
+
+    reloaded = ActivityScheduler({**CONFIG, "state_path": str(tmp_path / "schedule.json")})
+    assert reloaded.next_due("comic", "/leagues.html") == next_due
+    assert reloaded.entries["comic"]["/leagues.html"].reading.current == 2
+
+def test_corrupt_state_starts_fresh(tmp_path):
+    path = tmp_path / "schedule.json"
+    path.write_text("{not json")
+    assert ActivityScheduler({"state_path": str(path)}).entries == {}
+
+def test_sharded_schedulers_keep_each_others_domains(tmp_path):
+    now = datetime(2026, 1, 1, 12, 0)
+    config = {**CONFIG, "state_path": str(tmp_path / "schedule.json")}
+    first, second = ActivityScheduler(config), ActivityScheduler(config)
+    first.owned_domains, second.owned_domains = {"comic"}, {"manga"}
+
+    comic_due = first.record("comic", "/collect", None, now=now)
+    manga_due = second.record("manga", "/collect", None, now=now)
+
+    reloaded = ActivityScheduler(config)
+    assert reloaded.next_due("comic", "/collect") == comic_due
+    assert reloaded.next_due("manga", "/collect") == manga_due
+
+@pytest.mark.asyncio
+async def test_saves_on_the_event_loop_are_batched(scheduler, tmp_path, monkeypatch):
+    writes = []
+    write = scheduler._write
+    monkeypatch.setattr(scheduler, "_write", lambda owned: (writes.append(owned), write(owned)))
+    scheduler.save_delay = 0.01
+    now = datetime(2026, 1, 1, 12, 0)
+    scheduler.record("manga", "/collect", None, now=now)
+    scheduler.record("comic", "/collect", None, now=now)
+    assert writes == []
+
+    await asyncio.sleep(0.05)
+    assert len(writes) == 1 and set(writes[0]) == {"manga", "comic"}
+    reloaded = ActivityScheduler({**CONFIG, "state_path": str(tmp_path / "schedule.json")})
+    assert set(reloaded.entries) == {"manga", "comic"}
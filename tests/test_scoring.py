@@ -0,0 +1,35 @@
+import pytest
+from activities.scoring import (
+    HeroStats, OpponentStats, ScorerRegistry, expected_reward, lower_level, win_probability,
+)
+
+HERO = HeroStats(level=30, damage=1200)
+
+def test_win_probability_tracks_damage_and_level():
+    even = win_probability(HERO, OpponentStats(0, 30, 1200))
+    assert even == pytest.approx(0.5)
+    assert win_probability(HERO, OpponentStats(0, 30, 900)) > even
+    assert win_probability(HERO, OpponentStats(0, 35, 1200)) < even
+
+def test_expected_reward_prefers_points_per_kiss():
+    weak_cheap = OpponentStats(0, 25, 1000, reward=10)
+    even_rich = OpponentStats(1, 30, 1200, reward=40)
+    # 40 points at even odds beat 10 points at near-certain odds
+    assert expected_reward(HERO, even_rich) > expected_reward(HERO, weak_cheap)
+    # Without shown rewards the score is the win chance alone
+    assert expected_reward(HERO, OpponentStats(0, 30, 1200)) == pytest.approx(0.5)
+
+def test_lower_level_matches_original_rule():
+    assert lower_level(HERO, OpponentStats(0, 29, 5000)) == 1.0
+    assert lower_level(HERO, OpponentStats(0, 30, 10)) == 0.0
+
+def test_registry():
+    assert ScorerRegistry.get("expected_reward") is expected_reward
+
+    @ScorerRegistry.register("test_highest_damage")
+    def highest_damage(hero, opponent):
+        return opponent.damage
+
+    assert ScorerRegistry.get("test_highest_damage") is highest_damage
+    with pytest.raises(ValueError):
+        ScorerRegistry.get("missing")
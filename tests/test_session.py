@@ -1,5 +1,6 @@
 import pytest
-from utils.session import ensure_authenticated, login
+from unittest.mock import AsyncMock, MagicMock
+from utils.session import LOGGED_OUT_SELECTOR, ensure_authenticated, is_logged_out, login
 from utils.session_manager import AsyncSessionManager
 import os
 
@@ -19,3 +20,15 @@ def test_config_loader():
     config = load_config()
     assert "global_settings" in config
     assert "performance" in config
+
+@pytest.mark.asyncio
+async def test_is_logged_out():
+    page = MagicMock(url="https://www.mangarpg.com/leagues.html")
+    page.is_closed.return_value = False
+    page.locator.return_value.first.is_visible = AsyncMock(return_value=True)
+    assert await is_logged_out(page)
+    page.locator.assert_called_with(LOGGED_OUT_SELECTOR)
+
+    # A page that cannot be inspected is not evidence of a logout
+    page.locator.return_value.first.is_visible = AsyncMock(side_effect=Exception("Target closed"))
+    assert not await is_logged_out(page)
@@ -0,0 +1,73 @@
+import json
+import os
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from utils.session_store import SessionStore, cookie_expiry
+
+def make_context(cookies):
+    context = MagicMock()
+    context.storage_state = AsyncMock(return_value={"cookies": cookies, "origins": []})
+    return context
+
+def cookie(name, expires):
+    return {"name": name, "value": "x", "domain": ".mangarpg.com", "path": "/", "expires": expires}
+
+def test_cookie_expiry_ignores_session_cookies():
+    assert cookie_expiry({"cookies": [cookie("a", -1), cookie("b", 2000), cookie("c", 1000)]}) == 1000
+    assert cookie_expiry({"cookies": [cookie("a", -1)]}) is None
+
+@pytest.mark.asyncio
+async def test_domains_do_not_overwrite_each_other(tmp_path):
+    store = SessionStore(str(tmp_path))
+    await store.save(make_context([cookie("manga", -1)]), "manga")
+    await store.save(make_context([cookie("comic", -1)]), "comic")
+
+    reloaded = SessionStore(str(tmp_path))
+    assert reloaded.storage_state("manga")["cookies"][0]["name"] == "manga"
+    assert reloaded.storage_state("comic")["cookies"][0]["name"] == "comic"
+    assert not [f for f in os.listdir(tmp_path) if f.endswith(".tmp")]
+
+@pytest.mark.asyncio
+async def test_known_good_window_and_cookie_expiry(tmp_path):
+    store = SessionStore(str(tmp_path), validity_seconds=600, expiry_margin_seconds=60)
+    await store.save(make_context([cookie("sid", -1)]), "manga")
+    validated_at = store.get("manga").validated_at
+
+    assert store.is_known_good("manga", now=validated_at + 599)
+    assert not store.is_known_good("manga", now=validated_at + 601)
+
+    await store.save(make_context([cookie("sid", validated_at + 100)]), "comic")
+    assert store.is_known_good("comic", now=validated_at + 30)
+    assert not store.is_known_good("comic", now=validated_at + 50)
+
+    await store.save(make_context([]), "stars", validated=False)
+    assert not store.is_known_good("stars")
+    assert not store.is_known_good("hero")
+
+@pytest.mark.asyncio
+async def test_invalidate_keeps_cookies(tmp_path):
+    store = SessionStore(str(tmp_path))
+    await store.save(make_context([cookie("sid", -1)]), "manga")
+    await store.invalidate("manga")
+
+    reloaded = SessionStore(str(tmp_path))
+    assert not reloaded.is_known_good("manga")
+    assert reloaded.storage_state("manga")["cookies"]
+
+def test_corrupt_file_is_set_aside(tmp_path):
+    store = SessionStore(str(tmp_path))
+    path = store.path_for("manga")
+    with open(path, "w") as f:
+        f.write('{"storage_state": {"cook')
+
+    assert store.storage_state("manga") is None
+    assert os.path.exists(f"{path}.corrupt")
+    assert not os.path.exists(path)
+
+def test_legacy_shared_file_seeds_missing_domains(tmp_path):
+    legacy = tmp_path / "storage_state.json"
+    legacy.write_text(json.dumps({"cookies": [cookie("legacy", -1)], "origins": []}))
+    store = SessionStore(str(tmp_path / "sessions"), legacy_path=str(legacy))
+
+    assert store.storage_state("manga")["cookies"][0]["name"] == "legacy"
+    assert not store.is_known_good("manga")
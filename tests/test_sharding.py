@@ -0,0 +1,142 @@
+import asyncio
+import queue
+import pytest
+from utils import sharding
+from utils.sharding import ShardCoordinator, ShardingSettings, assign_shards, receive_commands
+from utils.jobs import DONE, FAILED, RUNNING, Job, JobQueue
+from utils.metrics import Registry
+from utils.state import DomainStatus, SharedState
+
+@pytest.fixture
+def state(monkeypatch):
+    monkeypatch.setattr(SharedState, "_instance", None)
+    state = SharedState()
+    for name in ("a", "b", "c"):
+        state.register(name)
+    monkeypatch.setattr(sharding, "state_manager", state)
+    return state
+
+def test_assign_shards_round_robin():
+    assert assign_shards(["a", "b", "c", "d", "e"], 2) == [["a", "c", "e"], ["b", "d"]]
+    assert assign_shards(["a"], 4) == [["a"]]
+
+def test_settings_from_config():
+    assert ShardingSettings.from_config({}).workers == 1
+    assert ShardingSettings.from_config({"orchestrator": {"workers": 3}}).workers == 3
+
+@pytest.fixture
+def jobs(monkeypatch):
+    jobs = JobQueue()
+    monkeypatch.setattr(sharding, "job_queue", jobs)
+    return jobs
+
+@pytest.mark.asyncio
+async def test_reports_are_merged_and_jobs_forwarded(state, jobs, monkeypatch):
+    registry = Registry()
+    monkeypatch.setattr(sharding.metrics, "registry", registry)
+    coordinator = ShardCoordinator(print, ["a", "b", "c"], ShardingSettings(workers=2))
+    for shard in coordinator.shards:
+        shard.commands = queue.Queue()
+    coordinator.status_queue = queue.Queue()
+    coordinator.status_queue.put(("status", 1, {"b": DomainStatus(status="Busy")}))
+
+    collector = asyncio.create_task(coordinator._collect_status())
+    forwarder = asyncio.create_task(coordinator._forward_jobs())
+    try:
+        while (await state.get_domain_status("b")).status != "Busy":
+            await asyncio.sleep(0.01)
+
+        job = jobs.submit("b", "/collect", priority=5)
+        kind, forwarded = await asyncio.to_thread(coordinator.shards[1].commands.get, True, 2)
+        assert kind == "job" and forwarded.id == job.id and forwarded.priority == 5
+        assert coordinator.shards[0].commands.empty()
+        assert jobs.pending("b") == 0
+
+        # The worker's report of the job replaces the coordinator's copy
+        coordinator.status_queue.put(("jobs", 1, [Job("b", "/collect", id=job.id, status=DONE)]))
+        while jobs.get(job.id).status != DONE:
+            await asyncio.sleep(0.01)
+
+        coordinator.status_queue.put(("metrics", 1, {"pages": ("gauge", "Pages.", [("", "", 2)])}))
+        while "1" not in registry.remote:
+            await asyncio.sleep(0.01)
+        assert 'pages{shard="1"} 2' in registry.render()
+    finally:
+        coordinator._stopping = True
+        forwarder.cancel()
+        await collector
+
+@pytest.mark.asyncio
+async def test_worker_applies_commands(state, jobs):
+    jobs.serve("a")
+    commands, stopped = queue.Queue(), []
+    commands.put(("job", Job("a", "/leagues.html", priority=2, id="abc")))
+    commands.put(("stop",))
+    await asyncio.wait_for(receive_commands(commands, lambda: stopped.append(True)), 5)
+
+    status = await state.get_domain_status("a")
+    assert status.is_adhoc_pending and status.queued_jobs == 1
+    assert jobs.pop("a").id == "abc"
+    assert stopped == [True]
+
+def test_jobs_of_a_dead_worker_are_resent_or_failed(jobs):
+    coordinator = ShardCoordinator(print, ["a"], ShardingSettings(workers=1))
+    shard = coordinator.shards[0]
+    shard.commands = queue.Queue()
+    queued, running = jobs.submit("a", "/collect"), jobs.submit("a", "/leagues.html")
+    for job in (jobs.pop("a", start=False), jobs.pop("a", start=False)):
+        shard.forwarded[job.id] = job
+    running.status = RUNNING
+
+    coordinator._shard_exited(shard)
+    assert jobs.get(running.id).status == FAILED and list(shard.forwarded) == [queued.id]
+
+    coordinator._resend(shard)
+    assert shard.commands.get_nowait() == ("job", queued)
+
+@pytest.mark.asyncio
+async def test_worker_reports_only_changed_jobs(state, jobs):
+    reports = queue.Queue()
+    job = jobs.submit("a", "/collect")
+    publisher = asyncio.create_task(sharding.publish_status(0, ["a"], reports, 0.01))
+    try:
+        while reports.qsize() < 4:
+            await asyncio.sleep(0.01)
+    finally:
+        publisher.cancel()
+    job_reports = [payload for kind, _, payload in list(reports.queue) if kind == "jobs"]
+    assert [[j.id for j in payload] for payload in job_reports] == [[job.id]]
+    # Metrics go out on their own, slower cadence
+    assert [kind for kind, _, _ in list(reports.queue)].count("metrics") == 1
+
+@pytest.mark.asyncio
+async def test_resent_job_is_not_queued_twice(state, jobs):
+    jobs.serve("a")
+    commands = queue.Queue()
+    job = Job("a", "/collect", id="abc")
+    commands.put(("job", job))
+    commands.put(("job", job))
+    commands.put(("stop",))
+    await asyncio.wait_for(receive_commands(commands, lambda: None), 5)
+    assert jobs.pending("a") == 1
+
+@pytest.mark.asyncio
+async def test_worker_fails_jobs_for_domains_it_no_longer_runs(state, jobs):
+    commands, adopted = queue.Queue(), []
+    commands.put(("job", Job("a", "/collect", id="abc")))
+    commands.put(("adopt", "d"))
+    commands.put(("stop",))
+    await asyncio.wait_for(receive_commands(commands, lambda: None, adopted.append), 5)
+    assert jobs.get("abc").status == FAILED and jobs.pending("a") == 0
+    assert adopted == ["d"]
+
+def test_reload_assigns_new_domains_to_the_least_loaded_shard(state, jobs):
+    coordinator = ShardCoordinator(print, ["a", "b", "c"], ShardingSettings(workers=2))
+    for shard in coordinator.shards:
+        shard.commands = queue.Queue()
+
+    coordinator.sync_domains(["a", "b", "d"])
+    assert coordinator.shards[1].domains == ["b", "d"]
+    assert coordinator.shards[1].commands.get_nowait() == ("adopt", "d")
+    assert jobs.served == {"a", "b", "d"}
+    assert "d" in state.domains
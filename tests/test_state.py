@@ -0,0 +1,93 @@
+import dataclasses
+import pickle
+import pytest
+from utils.state import DomainStatus, SharedState, status_changes
+
+@pytest.fixture
+def state(monkeypatch):
+    monkeypatch.setattr(SharedState, "_instance", None)
+    state = SharedState()
+    for name in ("a", "b"):
+        state.register(name)
+    return state
+
+def test_records_are_immutable_and_slotted():
+    status = DomainStatus()
+    assert not hasattr(status, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        status.status = "Busy"
+
+@pytest.mark.asyncio
+async def test_next_due_is_copied_and_read_only(state):
+    due = {"/collect": None}
+    await state.update_status("a", next_due=due)
+    due["/leagues.html"] = None
+
+    published = state.snapshot().domains["a"]
+    assert published.next_due == {"/collect": None}
+    with pytest.raises(TypeError):
+        published.next_due["/collect"] = None
+    # Shard workers pickle their statuses to the coordinator
+    assert pickle.loads(pickle.dumps(published)) == published
+
+@pytest.mark.asyncio
+async def test_update_publishes_a_new_version(state):
+    before = state.snapshot()
+    await state.update_status("a", status="Busy", not_a_field=1)
+
+    after = state.snapshot()
+    assert after.version == before.version + 1
+    assert after.domains["a"].status == "Busy" and after.domains["a"].version == after.version
+    assert after.domains["b"] is before.domains["b"]
+    # A reader holding the old snapshot still sees the old state
+    assert before.domains["a"].status == "Idle"
+
+@pytest.mark.asyncio
+async def test_batch_updates_are_one_version(state):
+    version = state.snapshot().version
+    await state.update_many({"a": {"queued_jobs": 1}, "b": {"queued_jobs": 2}, "unknown": {"queued_jobs": 3}})
+
+    snapshot = state.snapshot()
+    assert snapshot.version == version + 1
+    assert [snapshot.domains[d].queued_jobs for d in ("a", "b")] == [1, 2]
+    assert "unknown" not in snapshot.domains
+
+@pytest.mark.asyncio
+async def test_adhoc_signal(state):
+    await state.update_status("a", is_adhoc_pending=True)
+    assert state.check_adhoc_requested()
+    await state.clear_adhoc_signal()
+    assert state.check_adhoc_requested()
+
+    await state.update_status("a", is_adhoc_pending=False)
+    await state.clear_adhoc_signal()
+    assert not state.check_adhoc_requested()
+
+@pytest.mark.asyncio
+async def test_replace_statuses(state):
+    await state.replace_statuses({"b": DomainStatus(status="Busy"), "c": DomainStatus()})
+    statuses = await state.get_all_statuses()
+    assert statuses["b"].status == "Busy" and "c" in statuses
+    assert not state.check_adhoc_requested()
+
+@pytest.mark.asyncio
+async def test_status_changes_between_snapshots(state):
+    before = state.snapshot()
+    await state.update_status("a", status="Busy", current_activity="/battle")
+    assert status_changes(before, state.snapshot()) == {
+        "a": {"status": "Busy", "current_activity": "/battle", "version": state.snapshot().version}
+    }
+    assert status_changes(before, state.snapshot(), ["b"]) == {}
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_dropped(state):
+    subscription = state.subscribe(maxsize=2)
+    for i in range(3):
+        await state.update_status("a", queued_jobs=i)
+    assert subscription.dropped
+    assert subscription not in state._subscribers
+
+    subscription = state.subscribe()
+    await state.update_status("b", status="Busy")
+    assert (await subscription.next(1)).domains["b"].status == "Busy"
+    assert await subscription.next(0.01) is None
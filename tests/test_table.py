@@ -0,0 +1,31 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from utils.table import extract_rows, parse_number
+
+def test_parse_number():
+    assert parse_number("1,234,567") == 1234567
+    assert parse_number(" 12 345 ") == 12345
+    assert parse_number("Lv. 42") == 42
+    assert parse_number("") is None
+    assert parse_number(None) is None
+    assert parse_number("n/a") is None
+
+@pytest.mark.asyncio
+async def test_extract_rows_reads_table_in_one_evaluation():
+    page = MagicMock()
+    rows = page.locator.return_value
+    rows.evaluate_all = AsyncMock(return_value=[
+        {"cells": {"power": "12,000", "level": "40"}, "hasAction": True},
+        {"cells": {"power": "9,500", "level": "38"}, "hasAction": False},
+    ])
+    columns = {"power": "[column='power']", "level": "[column='level']"}
+
+    result = await extract_rows(page, ".data-row", columns, action_selector=".go_pre_battle")
+
+    page.locator.assert_called_once_with(".data-row")
+    rows.evaluate_all.assert_called_once()
+    assert rows.evaluate_all.call_args.args[1] == {"columns": columns, "attributes": [], "action": ".go_pre_battle"}
+    assert [r.number("power") for r in result] == [12000, 9500]
+    assert result[1].number("level") == 38
+    assert result[0].action is rows.nth.return_value.locator.return_value.first
+    assert result[1].action is None
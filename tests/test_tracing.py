@@ -0,0 +1,56 @@
+import asyncio
+import json
+import pytest
+from utils import tracing
+
+@pytest.fixture
+def trace(tmp_path, monkeypatch):
+    path = tmp_path / "trace.jsonl"
+    monkeypatch.setattr(tracing, "settings", tracing.TraceSettings(enabled=True, path=str(path), sample_rate=1))
+    monkeypatch.setattr(tracing, "_lanes", {})
+    monkeypatch.setattr(tracing, "_buffer", [])
+    return path
+
+def load(path):
+    tracing.wait()
+    text = path.read_text()
+    assert text.startswith("[\n")
+    # The closing bracket is optional for the trace viewers; add it to parse
+    return json.loads(text.rstrip().rstrip(",") + "]")
+
+@pytest.mark.asyncio
+async def test_sampled_cycle_writes_nested_spans(trace):
+    with tracing.cycle("manga"):
+        with tracing.span("navigate", "navigation", url="/home"):
+            await asyncio.sleep(0.01)
+        with tracing.span("/leagues.html", "graph", lane="manga /leagues.html"):
+            with tracing.span("human click", "human"):
+                pass
+
+    events = load(trace)
+    lanes = {e["args"]["name"]: e["tid"] for e in events if e["ph"] == "M"}
+    spans = {e["name"]: e for e in events if e["ph"] == "X"}
+    assert set(lanes) == {"manga", "manga /leagues.html"}
+    assert spans["navigate"]["tid"] == spans["cycle"]["tid"] == lanes["manga"]
+    assert spans["human click"]["tid"] == lanes["manga /leagues.html"]
+    cycle, navigate = spans["cycle"], spans["navigate"]
+    assert cycle["ts"] <= navigate["ts"] and navigate["ts"] + navigate["dur"] <= cycle["ts"] + cycle["dur"]
+    assert navigate["dur"] >= 10000 and navigate["args"] == {"url": "/home"}
+
+def test_errors_are_recorded(trace):
+    with pytest.raises(ValueError):
+        with tracing.cycle("manga"):
+            with tracing.span("goto", "navigation"):
+                raise ValueError("boom")
+    spans = [e for e in load(trace) if e["ph"] == "X"]
+    assert [s["args"].get("error") for s in spans] == ["ValueError", "ValueError"]
+
+def test_unsampled_cycles_write_nothing(trace):
+    tracing.settings.sample_rate = 0
+    with tracing.cycle("manga"):
+        with tracing.span("navigate", "navigation"):
+            pass
+    with tracing.span("outside any cycle", "test"):
+        pass
+    tracing.wait()
+    assert not trace.exists()
@@ -0,0 +1,111 @@
+import asyncio
+import os
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional, Tuple
+from utils.session_store import DEFAULT_ACCOUNT
+
+@dataclass
+class Account:
+    """One login on one domain; credentials are read from the named environment variables."""
+    domain: str
+    name: str = DEFAULT_ACCOUNT
+    username_env: str = "GAME_USERNAME"
+    password_env: str = "GAME_PASSWORD"
+
+    @property
+    def key(self) -> str:
+        """The name the account runs under in SharedState, the scheduler and the logs."""
+        return self.domain if self.name == DEFAULT_ACCOUNT else f"{self.domain}:{self.name}"
+
+    def credentials(self) -> Tuple[Optional[str], Optional[str]]:
+        return os.getenv(self.username_env), os.getenv(self.password_env)
+
+    @classmethod
+    def of(cls, domain_cfg: dict) -> "Account":
+        """The account a (possibly expanded) domain config runs as."""
+        return cls(
+            domain=domain_cfg.get("domain", domain_cfg["name"]),
+            name=domain_cfg.get("account", DEFAULT_ACCOUNT),
+            username_env=domain_cfg.get("username_env", "GAME_USERNAME"),
+            password_env=domain_cfg.get("password_env", "GAME_PASSWORD"),
+        )
+
+def expand_accounts(domain_cfgs: List[dict]) -> List[dict]:
+    """
+    One config per (domain, account), named by Account.key. A domain without
+    an `accounts` list keeps its single account on the global credentials;
+    keys set on an account override the domain's (e.g. activity_order).
+    """
+    expanded = []
+    for domain_cfg in domain_cfgs:
+        base = {k: v for k, v in domain_cfg.items() if k != "accounts"}
+        for account_cfg in domain_cfg.get("accounts") or [{"name": DEFAULT_ACCOUNT}]:
+            if not account_cfg.get("enabled", True):
+                continue
+            run_cfg = {**base, **{k: v for k, v in account_cfg.items() if k not in ("name", "enabled")}}
+            account = Account(
+                domain=domain_cfg["name"],
+                name=account_cfg["name"],
+                username_env=account_cfg.get("username_env", "GAME_USERNAME"),
+                password_env=account_cfg.get("password_env", "GAME_PASSWORD"),
+            )
+            run_cfg.update(name=account.key, domain=account.domain, account=account.name)
+            expanded.append(run_cfg)
+    return expanded
+
+class ContextLimiter:
+    """
+    Caps how many browser contexts are open at once. Waiters are grouped by
+    domain and served round-robin across domains, first come first served
+    within one, so a domain with many accounts cannot starve the others.
+    A limit of 0 or None means no cap.
+    """
+
+    def __init__(self, limit: Optional[int] = None):
+        self.limit = limit or None
+        self.in_use = 0
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(q) for q in self._waiters.values())
+
+    def available(self) -> bool:
+        return self.limit is None or self.in_use < self.limit
+
+    async def acquire(self, group: str = "default"):
+        if self.available() and not self.waiting:
+            self.in_use += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(group, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as we were cancelled: pass the slot on
+                self.release()
+            else:
+                self._discard(group, future)
+            raise
+
+    def release(self):
+        self.in_use -= 1
+        while self._waiters and self.available():
+            group, queue = next(iter(self._waiters.items()))
+            future = queue.popleft()
+            # The served domain goes to the back of the rotation
+            del self._waiters[group]
+            if queue:
+                self._waiters[group] = queue
+            if not future.done():
+                self.in_use += 1
+                future.set_result(None)
+
+    def _discard(self, group: str, future: asyncio.Future):
+        queue = self._waiters.get(group)
+        if queue and future in queue:
+            queue.remove(future)
+            if not queue:
+                del self._waiters[group]
@@ -0,0 +1,84 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+from utils import navigation, procstats
+from utils.logger import logger
+
+@dataclass
+class AdmissionSettings:
+    min_spacing_seconds: float = 2
+    max_spacing_seconds: float = 5
+    max_cpu_percent: Optional[float] = 85
+    max_rss_mb: Optional[float] = 2048
+    max_inflight_navigations: Optional[int] = 4
+    max_navigation_seconds: Optional[float] = 10
+    poll_seconds: float = 1
+    # Admit anyway after this long, so a stuck signal cannot stall every domain
+    max_wait_seconds: float = 120
+
+    @classmethod
+    def from_config(cls, config: dict) -> "AdmissionSettings":
+        admission_cfg = (config.get("performance", {}) or {}).get("admission", {}) or {}
+        return cls(**{k: v for k, v in admission_cfg.items() if k in cls.__dataclass_fields__})
+
+class AdmissionController:
+    """
+    Lets domain cycles start one at a time: each waits a random spacing
+    after the previous admission (so starts never line up), then until the
+    host is not overloaded. Load is host CPU since the last check, bot +
+    browser RSS, navigations in flight and the recent average navigation
+    time; a limit set to None is not checked.
+    """
+
+    def __init__(self, settings: AdmissionSettings):
+        self.settings = settings
+        self.admitted = 0
+        self._lock = asyncio.Lock()
+        self._last_admission: Optional[float] = None
+        self._cpu_times = procstats.host_cpu_times()
+
+    def overload(self) -> List[str]:
+        """Reasons the host is currently too busy to start another cycle; empty when it is not."""
+        s = self.settings
+        reasons = []
+        cpu_times = procstats.host_cpu_times()
+        cpu = procstats.host_cpu_percent(self._cpu_times, cpu_times)
+        self._cpu_times = cpu_times
+        if s.max_cpu_percent is not None and cpu is not None and cpu > s.max_cpu_percent:
+            reasons.append(f"cpu {cpu:.0f}%")
+        if s.max_rss_mb is not None:
+            rss_mb = procstats.sample().rss_bytes / 2**20
+            if rss_mb > s.max_rss_mb:
+                reasons.append(f"rss {rss_mb:.0f}MB")
+        nav = navigation.stats
+        if s.max_inflight_navigations is not None and nav.in_flight >= s.max_inflight_navigations:
+            reasons.append(f"{nav.in_flight} navigations in flight")
+        if s.max_navigation_seconds is not None and nav.recent_seconds > s.max_navigation_seconds:
+            reasons.append(f"navigations averaging {nav.recent_seconds:.1f}s")
+        return reasons
+
+    async def admit(self, name: str) -> float:
+        """Waits until `name` may start its cycle; returns the seconds waited."""
+        started = time.monotonic()
+        async with self._lock:
+            s = self.settings
+            if self._last_admission is not None:
+                spacing = random.uniform(s.min_spacing_seconds, s.max_spacing_seconds)
+                await asyncio.sleep(max(0.0, self._last_admission + spacing - time.monotonic()))
+
+            while True:
+                reasons = self.overload()
+                waited = time.monotonic() - started
+                if not reasons:
+                    break
+                if waited >= s.max_wait_seconds:
+                    logger.warning("Admitting despite load", domain=name, reasons=reasons, waited=f"{waited:.1f}s")
+                    break
+                logger.info("Holding domain start under load", domain=name, reasons=reasons)
+                await asyncio.sleep(s.poll_seconds)
+
+            self._last_admission = time.monotonic()
+            self.admitted += 1
+            return self._last_admission - started
@@ -1,44 +1,149 @@
-from fastapi import FastAPI
-from utils.state import state_manager
+import json
+from typing import AsyncIterator, List, Optional
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from utils.state import StatusSubscription, state_manager, status_changes
+from utils.jobs import job_queue
+from activities.registry import ActivityRegistry
 from utils.logger import logger
-from datetime import datetime
+from utils import blocking, metrics, retry
+from utils.asset_cache import asset_cache
+# Registers the browser gauges that /metrics reports
+import utils.session_manager  # noqa: F401
+from dataclasses import asdict
 import structlog
 
 app = FastAPI(title="Domain Activity API")
 
+# Snapshots a stream client may fall behind by before it is disconnected
+STREAM_QUEUE_SIZE = 256
+# Idle streams send a comment this often, so dead connections get noticed
+STREAM_KEEPALIVE_SECONDS = 15.0
+
 @app.get("/status")
 async def get_status():
     """Returns the current status of all domains."""
     return await state_manager.get_all_statuses()
 
+def sse_event(event: str, version: int, data) -> str:
+    return f"event: {event}\nid: {version}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+async def status_events(subscription: StatusSubscription, domains: Optional[List[str]] = None,
+                        keepalive: float = STREAM_KEEPALIVE_SECONDS) -> AsyncIterator[str]:
+    """
+    Server-sent events for a status subscription: one `snapshot` event with
+    the full status of the selected domains, then a `status` event with the
+    changed fields of every later version that touches them.
+    """
+    try:
+        previous = subscription.snapshot
+        selected = domains if domains is not None else list(previous.domains)
+        yield sse_event("snapshot", previous.version,
+                        {"version": previous.version,
+                         "domains": {n: previous.domains[n] for n in selected if n in previous.domains}})
+        while True:
+            if subscription.dropped:
+                logger.warning("Status stream client too slow, disconnecting", version=previous.version)
+                yield sse_event("dropped", previous.version, {"version": previous.version})
+                return
+            snapshot = await subscription.next(keepalive)
+            if snapshot is None:
+                yield ": keepalive\n\n"
+                continue
+            changes = status_changes(previous, snapshot, domains)
+            previous = snapshot
+            if changes:
+                yield sse_event("status", snapshot.version, {"version": snapshot.version, "domains": changes})
+    finally:
+        subscription.close()
+
+@app.get("/status/stream")
+async def stream_status(domain: Optional[List[str]] = Query(None)):
+    """
+    Streams status changes as server-sent events, optionally only for the
+    given domains (repeat `domain=`). Clients that fall too far behind are
+    sent a `dropped` event and disconnected; they should reconnect for a
+    fresh snapshot.
+    """
+    unknown = [d for d in domain or () if d not in state_manager.domains]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Unknown domain '{unknown[0]}'")
+    subscription = state_manager.subscribe(STREAM_QUEUE_SIZE)
+    return StreamingResponse(
+        status_events(subscription, domain),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/stats")
+async def get_stats():
+    """Returns asset cache, request blocking and retry counters."""
+    return {
+        "asset_cache": asdict(asset_cache.stats) if asset_cache else None,
+        "blocking": blocking.stats.as_dict(),
+        "retry": retry.stats.as_dict(),
+    }
+
+@app.get("/metrics")
+async def get_metrics():
+    """Returns activity, navigation, retry, blocking and browser metrics in the Prometheus text format."""
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
 @app.get("/trigger/{activity}")
-async def trigger_activity(activity: str):
-    """Triggers an ad-hoc activity on all domains."""
-    logger.info("Triggering activity on all domains", activity_path=activity)
+async def trigger_activity(activity: str, priority: int = 0, domain: Optional[str] = None):
+    """
+    Queues an ad-hoc job for the activity on every running domain, or only on
+    `domain`. Higher priorities run first; idle domains wake at once and
+    running activities yield at their next safe point.
+    """
+    activity_path = activity if activity.startswith("/") else f"/{activity}"
+    if not ActivityRegistry.get_activity(activity_path):
+        raise HTTPException(status_code=404, detail=f"Unknown activity '{activity_path}'")
 
     statuses = await state_manager.get_all_statuses()
-    for domain in statuses:
-        # Update domain status via state manager
-        await state_manager.update_status(
-            domain,
-            current_activity=activity,
-            is_adhoc_pending=True,
-            status="Busy",
-            last_run_time=datetime.now()
-        )
+    if domain is not None and domain not in statuses:
+        raise HTTPException(status_code=404, detail=f"Unknown domain '{domain}'")
+    # A disabled domain, or one no worker runs, would keep its job queued forever
+    if domain is not None and domain not in job_queue.served:
+        raise HTTPException(status_code=409, detail=f"Domain '{domain}' is not running")
+    logger.info("Triggering activity", activity_path=activity_path, domain=domain or "all", priority=priority)
+
+    jobs = {}
+    for name in ([domain] if domain else [n for n in statuses if n in job_queue.served]):
+        job = job_queue.submit(name, activity_path, priority)
+        jobs[name] = job.id
 
         # Log with domain and activity context
         structlog.contextvars.clear_contextvars()
         structlog.contextvars.bind_contextvars(
-            domain_name=domain,
-            activity_path=activity
+            domain_name=name,
+            activity_path=activity_path
         )
-        logger.info(f"Ad-hoc activity '{activity}' scheduled for {domain}")
+        logger.info(f"Ad-hoc activity '{activity_path}' queued for {name}", job_id=job.id)
 
     # Clear context after finishing
     structlog.contextvars.clear_contextvars()
+    # Every domain shows its new job in the same status version
+    await state_manager.update_many(
+        {name: {"is_adhoc_pending": True, "queued_jobs": job_queue.pending(name)} for name in jobs}
+    )
 
     return {
-        "message": f"Activity '{activity}' triggered on all domains",
-        "domains": list(statuses.keys())
+        "message": f"Activity '{activity_path}' queued on {len(jobs)} domain(s)",
+        "domains": list(jobs),
+        "jobs": jobs,
     }
+
+@app.get("/jobs")
+async def list_jobs(domain: Optional[str] = None):
+    """Returns recent ad-hoc jobs, oldest first."""
+    return [asdict(job) for job in job_queue.jobs(domain)]
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Returns one ad-hoc job's status."""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    return asdict(job)
@@ -0,0 +1,290 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+from playwright.async_api import BrowserContext, Route
+from utils.config_loader import load_config
+from utils.logger import logger
+
+# Headers that describe the transfer rather than the content; fulfill() sets its own
+_DROP_HEADERS = {"content-length", "content-encoding", "transfer-encoding", "connection", "keep-alive", "date", "age"}
+
+@dataclass
+class CacheEntry:
+    digest: str
+    size: int
+    headers: Dict[str, str]
+    status: int
+    stored_at: float
+    max_age: Optional[float]  # None: must revalidate before every use
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def is_fresh(self, now: float) -> bool:
+        return self.max_age is not None and now - self.stored_at < self.max_age
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    revalidations: int = 0
+    stores: int = 0
+    evictions: int = 0
+    bytes_saved: int = 0
+    stored_bytes: int = 0
+    entries: int = 0
+
+def parse_cache_control(headers: Dict[str, str]) -> Dict[str, Optional[str]]:
+    directives = {}
+    for part in headers.get("cache-control", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
+
+def freshness_lifetime(headers: Dict[str, str]) -> Optional[float]:
+    """Seconds the response may be served without revalidation, per its cache headers."""
+    directives = parse_cache_control(headers)
+    if "no-cache" in directives:
+        return None
+    for name in ("s-maxage", "max-age"):
+        if directives.get(name):
+            try:
+                return float(directives[name])
+            except ValueError:
+                return None
+    if "expires" in headers:
+        try:
+            return parsedate_to_datetime(headers["expires"]).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return None
+
+def is_storable(status: int, headers: Dict[str, str]) -> bool:
+    if status != 200 or "no-store" in parse_cache_control(headers):
+        return False
+    vary = {v.strip().lower() for v in headers.get("vary", "").split(",") if v.strip()}
+    if vary - {"accept-encoding"}:
+        return False
+    return freshness_lifetime(headers) is not None or "etag" in headers or "last-modified" in headers
+
+class AssetCache:
+    """
+    On-disk, content-addressed cache for static game assets, shared by every
+    browser context and kept across cycles. Installed as a context route for
+    static file extensions only; bodies are stored once per SHA-256 digest, so
+    the sister sites' identical bundles share a blob. Validators (ETag,
+    Last-Modified) are only ever sent for the URL they were received for.
+    """
+
+    def __init__(self, directory: str = ".asset_cache", max_bytes: int = 256 * 2**20,
+                 extensions: Optional[List[str]] = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.extensions = extensions or ["js", "css"]
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.stats = CacheStats()
+        self._blob_sizes: Dict[str, int] = {}  # Includes blobs still being written
+        self._writing: Dict[str, int] = {}  # Digest -> stores between claiming it and adding their entry
+        self._persist_lock = asyncio.Lock()
+        self._load_index()
+
+    @classmethod
+    def from_config(cls, config: dict) -> Optional["AssetCache"]:
+        cache_cfg = (config.get("performance", {}) or {}).get("asset_cache", {}) or {}
+        if not cache_cfg.get("enabled", False):
+            return None
+        return cls(
+            directory=cache_cfg.get("directory", ".asset_cache"),
+            max_bytes=int(cache_cfg.get("max_mb", 256) * 2**20),
+            extensions=cache_cfg.get("extensions"),
+        )
+
+    @property
+    def pattern(self) -> re.Pattern:
+        return re.compile(r"\.(" + "|".join(self.extensions) + r")([?#]|$)", re.IGNORECASE)
+
+    async def install(self, context: BrowserContext):
+        await context.route(self.pattern, self._handle)
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "blobs", digest[:2], digest)
+
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, "index.json")
+
+    @staticmethod
+    def _tmp_path(path: str) -> str:
+        # Unique per writer: stores and index writes overlap in worker threads
+        return f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+
+    async def _handle(self, route: Route):
+        request = route.request
+        if request.method != "GET":
+            await route.fallback()
+            return
+
+        url = request.url
+        entry = self.entries.get(url)
+        now = time.time()
+        try:
+            if entry and entry.is_fresh(now):
+                body = await asyncio.to_thread(self._read_blob, entry.digest)
+                if body is not None:
+                    self._touch(url)
+                    self.stats.hits += 1
+                    self.stats.bytes_saved += entry.size
+                    await route.fulfill(status=entry.status, headers=entry.headers, body=body)
+                    return
+
+            if entry and (entry.etag or entry.last_modified):
+                headers = dict(request.headers)
+                if entry.etag:
+                    headers["if-none-match"] = entry.etag
+                if entry.last_modified:
+                    headers["if-modified-since"] = entry.last_modified
+                response = await route.fetch(headers=headers)
+            else:
+                response = await route.fetch()
+
+            if response.status == 304 and entry:
+                body = await asyncio.to_thread(self._read_blob, entry.digest)
+                if body is not None:
+                    entry.stored_at = now
+                    entry.max_age = freshness_lifetime(response.headers) or entry.max_age
+                    self._touch(url)
+                    self.stats.revalidations += 1
+                    self.stats.bytes_saved += entry.size
+                    await route.fulfill(status=entry.status, headers=entry.headers, body=body)
+                    return
+
+            self.stats.misses += 1
+            body = await response.body()
+            if is_storable(response.status, response.headers):
+                await self._store(url, response.status, response.headers, body)
+            await route.fulfill(response=response, body=body)
+        except Exception as e:
+            logger.debug(f"Asset cache bypassed for {url}: {e}")
+            try:
+                await route.fallback()
+            except Exception:
+                pass
+
+    async def _store(self, url: str, status: int, headers: Dict[str, str], body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        digest = hashlib.sha256(body).hexdigest()
+        self._writing[digest] = self._writing.get(digest, 0) + 1
+        try:
+            if digest not in self._blob_sizes:
+                # Claimed before the write so a concurrent store of the same body skips it
+                self._blob_sizes[digest] = len(body)
+                try:
+                    await asyncio.to_thread(self._write_blob, digest, body)
+                except OSError:
+                    self._blob_sizes.pop(digest, None)
+                    raise
+        finally:
+            self._writing[digest] -= 1
+            if not self._writing[digest]:
+                del self._writing[digest]
+        previous = self.entries.get(url)
+        self.entries[url] = CacheEntry(
+            digest=digest,
+            size=len(body),
+            headers={k: v for k, v in headers.items() if k.lower() not in _DROP_HEADERS},
+            status=status,
+            stored_at=time.time(),
+            max_age=freshness_lifetime(headers),
+            etag=headers.get("etag"),
+            last_modified=headers.get("last-modified"),
+        )
+        self._touch(url)
+        self.stats.stores += 1
+        removed = []
+        # The URL's old body is an orphan unless another URL shares it
+        if previous and previous.digest != digest and self._release(previous.digest):
+            removed.append(previous.digest)
+        removed += self._evict()
+        async with self._persist_lock:
+            # Taken under the lock so the last write always carries the newest index
+            snapshot = {u: asdict(e) for u, e in self.entries.items()}
+            await asyncio.to_thread(self._persist, removed, snapshot)
+
+    def _touch(self, url: str):
+        self.entries.move_to_end(url)
+
+    def _read_blob(self, digest: str) -> Optional[bytes]:
+        try:
+            with open(self._blob_path(digest), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_blob(self, digest: str, body: bytes):
+        path = self._blob_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = self._tmp_path(path)
+        with open(tmp_path, "wb") as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+
+    def _evict(self) -> List[str]:
+        """
+        Drops least recently used URLs until the unique blobs fit the size cap.
+        Returns the digests no URL refers to any more.
+        """
+        removed = []
+        while self.entries and sum(self._blob_sizes.values()) > self.max_bytes:
+            url, entry = self.entries.popitem(last=False)
+            self.stats.evictions += 1
+            if self._release(entry.digest):
+                removed.append(entry.digest)
+        self.stats.stored_bytes = sum(self._blob_sizes.values())
+        self.stats.entries = len(self.entries)
+        return removed
+
+    def _release(self, digest: str) -> bool:
+        """Forgets `digest` if no entry or in-flight store uses it; True when its blob can go."""
+        if digest in self._writing or any(e.digest == digest for e in self.entries.values()):
+            return False
+        return self._blob_sizes.pop(digest, None) is not None
+
+    def _persist(self, removed: List[str], snapshot: dict):
+        for digest in removed:
+            try:
+                os.remove(self._blob_path(digest))
+            except OSError:
+                pass
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._tmp_path(self._index_path())
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self._index_path())
+
+    def _load_index(self):
+        if not os.path.exists(self._index_path()):
+            return
+        try:
+            with open(self._index_path(), "r") as f:
+                raw = json.load(f)
+            for url, entry in raw.items():
+                if os.path.exists(self._blob_path(entry["digest"])):
+                    self.entries[url] = CacheEntry(**entry)
+                    self._blob_sizes[entry["digest"]] = entry["size"]
+        except Exception as e:
+            logger.warning("Asset cache index unreadable, starting empty", path=self._index_path(), error=str(e))
+            self.entries.clear()
+            self._blob_sizes.clear()
+        self.stats.stored_bytes = sum(self._blob_sizes.values())
+        self.stats.entries = len(self.entries)
+
+# Shared by every context; None when disabled in config
+asset_cache = AssetCache.from_config(load_config())
@@ -0,0 +1,272 @@
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Pattern, Tuple
+from playwright.async_api import BrowserContext, Response, Route
+from utils import metrics
+from utils.logger import logger
+
+# Resource types are matched on the URL's file extension so the filter can be
+# handed to Playwright as a plain regex: only matching (blocked) requests are
+# routed to Python, everything else is decided inside the browser.
+RESOURCE_TYPE_EXTENSIONS = {
+    "image": ["png", "jpe?g", "gif", "webp", "svg", "ico", "avif", "bmp"],
+    "font": ["woff2?", "ttf", "otf", "eot"],
+    "media": ["mp4", "webm", "ogg", "mp3", "wav", "m4a"],
+    "stylesheet": ["css"],
+}
+
+# Requests whose last path segment has no extension (/img/avatar?id=3) cannot
+# be told apart by URL. Those under typed_paths are routed to Python and
+# decided on their resource type; everything else stays in the browser.
+EXTENSIONLESS = re.compile(r"^[a-z]+://[^/?#]+(/[^?#]*)?/[^/.?#]*([?#].*)?$", re.IGNORECASE)
+
+DEFAULT_TYPED_PATHS = ["**/img/**", "**/images/**", "**/avatars/**", "**/fonts/**", "**/media/**"]
+
+DEFAULT_BLOCKED_HOSTS = [
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "facebook.net",
+    "hotjar.com",
+]
+
+@dataclass
+class BlockingPolicy:
+    resource_types: List[str] = field(default_factory=list)
+    hosts: List[str] = field(default_factory=list)
+    url_patterns: List[str] = field(default_factory=list)
+    # Asset directories whose extensionless URLs are blocked by resource type
+    typed_paths: List[str] = field(default_factory=lambda: list(DEFAULT_TYPED_PATHS))
+    # activity path -> {"resource_types": [...], "hosts": [...]} that stay allowed
+    allow: Dict[str, dict] = field(default_factory=dict)
+
+    @classmethod
+    def from_config(cls, config: dict) -> "BlockingPolicy":
+        performance = config.get("performance", {}) or {}
+        blocking = performance.get("blocking", {}) or {}
+        resource_types = list(blocking.get("resource_types", []))
+        # Legacy switch
+        if performance.get("block_images") and "image" not in resource_types:
+            resource_types.append("image")
+        return cls(
+            resource_types=resource_types,
+            hosts=list(blocking.get("hosts", DEFAULT_BLOCKED_HOSTS)),
+            url_patterns=list(blocking.get("url_patterns", [])),
+            typed_paths=list(blocking.get("typed_paths", DEFAULT_TYPED_PATHS)),
+            allow=blocking.get("allow", {}) or {},
+        )
+
+    def patterns_for(self, activity: Optional[str] = None) -> List[Pattern]:
+        """Compiles the URL filters in effect while `activity` runs."""
+        return self.patterns_for_all([activity] if activity else [])
+
+    def _allowed(self, activities: List[str], key: str) -> set:
+        allowed = set()
+        for activity in activities:
+            allowed.update(self.allow.get(activity, {}).get(key, []))
+        return allowed
+
+    def blocked_types(self, activities: List[str]) -> FrozenSet[str]:
+        """Resource types blocked while all of `activities` run."""
+        allowed_types = self._allowed(activities, "resource_types")
+        return frozenset(t for t in self.resource_types if t not in allowed_types)
+
+    def typed_pattern(self) -> Optional[Pattern]:
+        """Extensionless URLs under typed_paths; documents and /ajax calls elsewhere never match."""
+        if not self.typed_paths:
+            return None
+        paths = "|".join(_glob_to_regex(glob).pattern for glob in self.typed_paths)
+        return re.compile(f"(?={EXTENSIONLESS.pattern})(?:{paths})", re.IGNORECASE)
+
+    def patterns_for_all(self, activities: List[str]) -> List[Pattern]:
+        """The filters in effect while all of `activities` run: anything one of them allows stays allowed."""
+        extensions = [
+            ext for rtype in sorted(self.blocked_types(activities))
+            for ext in RESOURCE_TYPE_EXTENSIONS.get(rtype, [])
+        ]
+        allowed_hosts = self._allowed(activities, "hosts")
+        hosts = [h for h in self.hosts if h not in allowed_hosts]
+
+        patterns = []
+        if extensions:
+            patterns.append(re.compile(r"\.(" + "|".join(extensions) + r")([?#]|$)", re.IGNORECASE))
+        if hosts:
+            host_group = "|".join(re.escape(h) for h in hosts)
+            patterns.append(re.compile(r"^[a-z]+://([^/?#]*\.)?(" + host_group + r")(:\d+)?([/?#]|$)", re.IGNORECASE))
+        for glob in self.url_patterns:
+            patterns.append(_glob_to_regex(glob))
+        return patterns
+
+def _glob_to_regex(glob: str) -> Pattern:
+    """Translates a '**/analytics/**' style glob into a regex Playwright can match in the browser."""
+    regex = ""
+    i = 0
+    while i < len(glob):
+        if glob.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif glob[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        else:
+            regex += re.escape(glob[i])
+            i += 1
+    return re.compile("^" + regex + "$")
+
+@dataclass
+class TrafficCounters:
+    requests_allowed: int = 0
+    bytes_allowed: int = 0
+    requests_blocked: int = 0
+    bytes_blocked: int = 0  # Estimated: a blocked request is never downloaded
+
+class BlockingStats:
+    """
+    Allowed vs. blocked requests and bytes per (domain, activity). Allowed
+    sizes come from the Content-Length of responses; a blocked request is
+    estimated at the size last seen for its URL, else the average allowed
+    size of its resource type. Both lookups are bounded.
+    """
+
+    def __init__(self, max_urls: int = 4096):
+        self.counters: Dict[Tuple[str, str], TrafficCounters] = {}
+        self.max_urls = max_urls
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+        self._type_sizes: Dict[str, Tuple[int, int]] = {}  # resource type -> (bytes, responses)
+
+    def get(self, domain: str, activity: str) -> TrafficCounters:
+        key = (domain, activity)
+        if key not in self.counters:
+            self.counters[key] = TrafficCounters()
+        return self.counters[key]
+
+    def allowed(self, domain: str, activity: str, url: str, resource_type: str, size: int):
+        counters = self.get(domain, activity)
+        counters.requests_allowed += 1
+        counters.bytes_allowed += size
+        if size:
+            self._sizes[url] = size
+            self._sizes.move_to_end(url)
+            if len(self._sizes) > self.max_urls:
+                self._sizes.popitem(last=False)
+            total, count = self._type_sizes.get(resource_type, (0, 0))
+            self._type_sizes[resource_type] = (total + size, count + 1)
+
+    def blocked(self, domain: str, activity: str, url: str = "", resource_type: str = ""):
+        counters = self.get(domain, activity)
+        counters.requests_blocked += 1
+        counters.bytes_blocked += self.estimate(url, resource_type)
+
+    def estimate(self, url: str, resource_type: str) -> int:
+        if url in self._sizes:
+            return self._sizes[url]
+        total, count = self._type_sizes.get(resource_type, (0, 0))
+        return total // count if count else 0
+
+    def as_dict(self) -> Dict[str, Dict[str, dict]]:
+        result: Dict[str, Dict[str, dict]] = {}
+        for (domain, activity), counters in self.counters.items():
+            result.setdefault(domain, {})[activity] = vars(counters).copy()
+        return result
+
+class RequestBlocker:
+    """
+    Installs a BlockingPolicy on a browser context as URL-matched routes and
+    switches the filters when the running activity changes.
+    """
+    _by_context: Dict[int, "RequestBlocker"] = {}
+
+    def __init__(self, context: BrowserContext, policy: BlockingPolicy, domain: str = "default"):
+        self.context = context
+        self.policy = policy
+        self.domain = domain
+        self.activity = "session"
+        self._active: List[str] = []  # Activities running right now, oldest first
+        self._patterns: List[Pattern] = []
+        self._types: FrozenSet[str] = frozenset()  # Decided by resource type on extensionless URLs
+        self._typed = policy.typed_pattern()
+
+    @classmethod
+    def get(cls, context: BrowserContext) -> Optional["RequestBlocker"]:
+        return cls._by_context.get(id(context))
+
+    async def install(self):
+        RequestBlocker._by_context[id(self.context)] = self
+        # An event, not a route: allowed requests are never held up by Python
+        self.context.on("response", self._on_response)
+        await self._route(self.policy.patterns_for_all([]), self.policy.blocked_types([]))
+
+    async def set_activity(self, activity: Optional[str]):
+        """Counts traffic against `activity` and applies its allowlist."""
+        self._active = [activity] if activity else []
+        await self._apply()
+
+    async def enter(self, activity: str):
+        """Adds a concurrently running activity; its allowlist applies until leave()."""
+        self._active.append(activity)
+        await self._apply()
+
+    async def leave(self, activity: str):
+        if activity in self._active:
+            self._active.remove(activity)
+        await self._apply()
+
+    async def _apply(self):
+        # Traffic is counted against the latest activity; a filter stays only if every running activity blocks it
+        self.activity = self._active[-1] if self._active else "session"
+        patterns = self.policy.patterns_for_all(self._active)
+        types = self.policy.blocked_types(self._active)
+        if [p.pattern for p in patterns] != [p.pattern for p in self._patterns] or types != self._types:
+            for pattern in self._patterns:
+                await self.context.unroute(pattern, self._abort)
+            if self._types and self._typed:
+                await self.context.unroute(self._typed, self._abort_by_type)
+            await self._route(patterns, types)
+
+    def uninstall(self):
+        RequestBlocker._by_context.pop(id(self.context), None)
+        try:
+            self.context.remove_listener("response", self._on_response)
+        except Exception:
+            pass
+
+    async def _route(self, patterns: List[Pattern], types: FrozenSet[str]):
+        for pattern in patterns:
+            await self.context.route(pattern, self._abort)
+        if types and self._typed:
+            await self.context.route(self._typed, self._abort_by_type)
+        self._patterns = patterns
+        self._types = types
+
+    async def _abort(self, route: Route):
+        stats.blocked(self.domain, self.activity, route.request.url, route.request.resource_type)
+        try:
+            await route.abort("blockedbyclient")
+        except Exception as e:
+            logger.debug(f"Route abort failed: {e}")
+
+    async def _abort_by_type(self, route: Route):
+        if route.request.resource_type in self._types:
+            await self._abort(route)
+            return
+        try:
+            # On to the routes registered before this one (the asset cache), or the network
+            await route.fallback()
+        except Exception as e:
+            logger.debug(f"Route fallback failed: {e}")
+
+    def _on_response(self, response: Response):
+        try:
+            size = int(response.headers.get("content-length", 0))
+        except (TypeError, ValueError):
+            size = 0
+        stats.allowed(self.domain, self.activity, response.url, response.request.resource_type, size)
+
+stats = BlockingStats()
+
+metrics.registry.counter("gamebot_blocked_requests_total", "Requests blocked by the request filters.", ("domain", "activity"),
+                         collect=lambda: {key: c.requests_blocked for key, c in stats.counters.items()})
+metrics.registry.counter("gamebot_blocked_bytes_total", "Estimated bytes not downloaded because requests were blocked.",
+                         ("domain", "activity"), collect=lambda: {key: c.bytes_blocked for key, c in stats.counters.items()})
@@ -0,0 +1,105 @@
+import asyncio
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from typing import Dict, Optional
+from utils.config_loader import load_config
+from utils.logger import logger
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+@dataclass
+class BreakerSettings:
+    failure_threshold: int = 3  # Consecutive failed cycles that open the breaker
+    open_seconds: float = 120  # First wait before probing; doubles after each failed probe
+    max_open_seconds: float = 1800
+    probe_timeout_seconds: float = 10
+
+    @classmethod
+    def from_config(cls, config: dict) -> "BreakerSettings":
+        breaker_cfg = (config.get("orchestrator", {}) or {}).get("circuit_breaker", {}) or {}
+        return cls(**{k: v for k, v in breaker_cfg.items() if k in cls.__dataclass_fields__})
+
+def probe_url(url: str, timeout: float) -> bool:
+    """A site is up if it answers at all below 500; no browser involved."""
+    request = urllib.request.Request(url, method="HEAD", headers={"User-Agent": "Mozilla/5.0"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status < 500
+    except urllib.error.HTTPError as e:
+        return e.code < 500
+    except (urllib.error.URLError, OSError, ValueError):
+        return False
+
+class CircuitBreaker:
+    """
+    Tracks one game site (shared by all its accounts). After
+    failure_threshold consecutive failed cycles it opens: cycles are skipped
+    without touching the browser until the open period ends, then a plain
+    HTTP probe decides whether to let a trial cycle through (half-open) or
+    to stay open for twice as long. A successful cycle closes it.
+    """
+    _by_domain: Dict[str, "CircuitBreaker"] = {}
+
+    def __init__(self, domain: str, settings: BreakerSettings):
+        self.domain = domain
+        self.settings = settings
+        self.state = CLOSED
+        self.failures = 0
+        self.open_seconds = settings.open_seconds
+        self.opened_until: Optional[float] = None  # time.time() when the next probe is due
+        self._probe_lock = asyncio.Lock()
+
+    @classmethod
+    def for_domain(cls, domain: str) -> "CircuitBreaker":
+        if domain not in cls._by_domain:
+            cls._by_domain[domain] = cls(domain, settings)
+        return cls._by_domain[domain]
+
+    def seconds_until_probe(self, now: Optional[float] = None) -> float:
+        if self.state != OPEN or self.opened_until is None:
+            return 0.0
+        return max(0.0, self.opened_until - (time.time() if now is None else now))
+
+    async def allow(self, url: str) -> bool:
+        """Whether a cycle may run now; probes the site once the open period is over."""
+        if self.state != OPEN:
+            return True
+        async with self._probe_lock:
+            # Another account of the domain may have probed while we waited
+            if self.state != OPEN:
+                return True
+            if self.seconds_until_probe() > 0:
+                return False
+            if await asyncio.to_thread(probe_url, url, self.settings.probe_timeout_seconds):
+                logger.info("Circuit breaker probe succeeded, allowing a trial cycle", domain=self.domain)
+                self.state = HALF_OPEN
+                return True
+            self.open_seconds = min(self.open_seconds * 2, self.settings.max_open_seconds)
+            self._open()
+            return False
+
+    def record_success(self):
+        if self.state != CLOSED:
+            logger.info("Circuit breaker closed", domain=self.domain)
+        self.state = CLOSED
+        self.failures = 0
+        self.open_seconds = self.settings.open_seconds
+        self.opened_until = None
+
+    def record_failure(self) -> bool:
+        """Counts a failed cycle; True if this opened the breaker."""
+        self.failures += 1
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.settings.failure_threshold):
+            self._open()
+            return True
+        return False
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_until = time.time() + self.open_seconds
+        logger.warning("Circuit breaker open, skipping domain", domain=self.domain,
+                       failures=self.failures, probe_in=f"{self.open_seconds:.0f}s")
+
+settings = BreakerSettings.from_config(load_config())
@@ -1,19 +1,191 @@
+import asyncio
 import yaml
 import os
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-def load_config(config_path="config/config.yaml"):
+CONFIG_PATH = "config/config.yaml"
+VILLAINS_PATH = "config/villains.yaml"
+
+class ConfigError(ValueError):
+    """config.yaml or villains.yaml is unreadable or fails validation."""
+
+def freeze(value: Any) -> Any:
+    """A read-only copy: mappings become MappingProxyType and lists tuples, recursively."""
+    if isinstance(value, Mapping):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+@dataclass(frozen=True)
+class Villains:
+    """One domain's entry in villains.yaml."""
+    ids: Mapping[str, int]  # villain name -> troll id
+    priority: Tuple[str, ...]
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """config.yaml and villains.yaml as parsed and validated together; never modified."""
+    version: int
+    data: Mapping[str, Any]
+    villains: Mapping[str, Villains]
+    mtimes: Tuple[Optional[float], Optional[float]]
+
+    def enabled_domains(self) -> Tuple[Mapping[str, Any], ...]:
+        return tuple(d for d in self.data.get("domains", ()) if d.get("enabled", True))
+
+def validate_config(data: Any) -> List[str]:
+    """Problems that would break the orchestrator; empty if the config is usable."""
+    if not isinstance(data, Mapping):
+        return ["config.yaml must be a mapping"]
+    problems = []
+    if not isinstance(data.get("browser"), Mapping):
+        problems.append("browser: missing or not a mapping")
+    domains = data.get("domains", [])
+    if not isinstance(domains, (list, tuple)):
+        return problems + ["domains: must be a list"]
+    names = set()
+    for i, domain in enumerate(domains):
+        where = f"domains[{i}]"
+        if not isinstance(domain, Mapping):
+            problems.append(f"{where}: must be a mapping")
+            continue
+        name = domain.get("name")
+        if not isinstance(name, str) or not name:
+            problems.append(f"{where}.name: required")
+        elif name in names:
+            problems.append(f"{where}.name: duplicate domain '{name}'")
+        names.add(name)
+        if not isinstance(domain.get("url"), str):
+            problems.append(f"{where}.url: required")
+        if not isinstance(domain.get("enabled", True), bool):
+            problems.append(f"{where}.enabled: must be true or false")
+        for key in ("activity_order", "disabled_activities"):
+            paths = domain.get(key)
+            if paths is not None and (not isinstance(paths, (list, tuple))
+                                      or not all(isinstance(p, str) and p.startswith("/") for p in paths)):
+                problems.append(f"{where}.{key}: must be a list of paths starting with '/'")
+    return problems
+
+def parse_villains(data: Any) -> Dict[str, Villains]:
+    if data is None:
+        return {}
+    if not isinstance(data, Mapping):
+        raise ConfigError("villains.yaml must be a mapping")
+    villains = {}
+    for domain, entry in data.items():
+        ids = (entry or {}).get("villains") or {}
+        priority = (entry or {}).get("priority") or []
+        if not isinstance(ids, Mapping) or not all(isinstance(v, int) for v in ids.values()):
+            raise ConfigError(f"villains.yaml {domain}.villains: must map names to troll ids")
+        if not isinstance(priority, (list, tuple)) or not all(isinstance(p, str) for p in priority):
+            raise ConfigError(f"villains.yaml {domain}.priority: must be a list of villain names")
+        villains[domain] = Villains(ids=MappingProxyType(dict(ids)), priority=tuple(priority))
+    return villains
+
+def _mtime(path: str) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+class ConfigService:
     """
-    Loads configuration from a YAML file. Defaults to config/config.yaml.
+    Parses config.yaml and villains.yaml once and hands out the same frozen
+    snapshot until one of the files changes. watch() polls their mtimes from
+    a thread and swaps in a new snapshot when a change validates; a change
+    that does not keeps the previous one and logs why. Listeners registered
+    with on_change() run on the event loop after each swap.
     """
+
+    def __init__(self, config_path: str, villains_path: str):
+        self.config_path = config_path
+        self.villains_path = villains_path
+        self._snapshot: Optional[ConfigSnapshot] = None
+        self._listeners: List[Callable[[ConfigSnapshot], None]] = []
+
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        if self._snapshot is None:
+            self._snapshot = self._read(1)
+        return self._snapshot
+
+    def _read(self, version: int) -> ConfigSnapshot:
+        mtimes = (_mtime(self.config_path), _mtime(self.villains_path))
+        try:
+            with open(self.config_path, "r") as f:
+                data = yaml.safe_load(f)
+            villains = {}
+            if mtimes[1] is not None:
+                with open(self.villains_path, "r") as f:
+                    villains = parse_villains(yaml.safe_load(f))
+        except (OSError, yaml.YAMLError) as e:
+            raise ConfigError(str(e)) from e
+        problems = validate_config(data)
+        if problems:
+            raise ConfigError("; ".join(problems))
+        return ConfigSnapshot(version, freeze(data), MappingProxyType(villains), mtimes)
+
+    def changed(self) -> bool:
+        return (_mtime(self.config_path), _mtime(self.villains_path)) != self.snapshot.mtimes
+
+    def reload(self) -> Optional[ConfigSnapshot]:
+        """Re-reads the files if they changed; returns the new snapshot, or None if nothing was swapped."""
+        if not self.changed():
+            return None
+        self._snapshot = self._read(self.snapshot.version + 1)
+        return self._snapshot
+
+    def on_change(self, listener: Callable[[ConfigSnapshot], None]) -> Callable[[], None]:
+        """Calls `listener` after each reload; returns a function that unregisters it."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    async def watch(self, interval: float = 5.0):
+        """Hot-reloads changed files until cancelled; file access runs in a thread."""
+        from utils.logger import logger  # utils.logger reads its settings through this module
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                snapshot = await asyncio.to_thread(self.reload)
+            except ConfigError as e:
+                # Stay on the last good config; the next edit gets another chance
+                logger.error("Config reload rejected", error=str(e))
+                self._snapshot = replace(self.snapshot, mtimes=(_mtime(self.config_path), _mtime(self.villains_path)))
+                continue
+            if snapshot is None:
+                continue
+            logger.info("Config reloaded", version=snapshot.version)
+            for listener in self._listeners:
+                listener(snapshot)
+
+_services: Dict[Tuple[str, str], ConfigService] = {}
+
+def config_service(config_path: str = CONFIG_PATH, villains_path: str = VILLAINS_PATH) -> ConfigService:
+    """The service for these files, one per absolute path (the benchmark works from its own directory)."""
     if not os.path.exists(config_path):
         # Fallback to settings.yaml if config.yaml doesn't exist
         alt_path = "config/settings.yaml"
         if os.path.exists(alt_path):
             config_path = alt_path
+    key = (os.path.abspath(config_path), os.path.abspath(villains_path))
+    if key not in _services:
+        _services[key] = ConfigService(*key)
+    return _services[key]
+
+def load_config(config_path=CONFIG_PATH):
+    """
+    Returns the configuration from a YAML file, read-only. Defaults to
+    config/config.yaml. Parsed once; see ConfigService for reloading.
+    """
+    return config_service(config_path).snapshot.data
 
-    with open(config_path, "r") as f:
-        return yaml.safe_load(f)
+def load_villains() -> Mapping[str, Villains]:
+    """villains.yaml by domain key."""
+    return config_service().snapshot.villains
@@ -0,0 +1,77 @@
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+from playwright.async_api import Page
+from utils.config_loader import load_config
+from utils.game_state import GameStateProbe
+from utils.logger import logger
+
+@dataclass(frozen=True)
+class DirectAction:
+    """
+    An action request the game's own page script sends, e.g. the POST behind
+    the Fight! button. Activities declare the ones they can run directly.
+    """
+    path: str
+    # Refusals the game answers with for an ordinary reason ("no_energy"); any other reply falls back to the UI
+    expected_errors: Tuple[str, ...] = ()
+    form: bool = False  # Send form fields instead of a JSON body
+
+@dataclass
+class DirectActionSettings:
+    enabled: bool = False
+    timeout_ms: float = 15000
+
+    @classmethod
+    def from_config(cls, config: dict) -> "DirectActionSettings":
+        direct_cfg = (config.get("performance", {}) or {}).get("direct_actions", {}) or {}
+        return cls(
+            enabled=direct_cfg.get("enabled", False),
+            timeout_ms=direct_cfg.get("timeout_ms", 15000),
+        )
+
+@dataclass
+class DirectActionStats:
+    direct: Dict[str, int] = field(default_factory=dict)
+    fallbacks: Dict[str, int] = field(default_factory=dict)
+
+    def record(self, path: str, ok: bool):
+        counters = self.direct if ok else self.fallbacks
+        counters[path] = counters.get(path, 0) + 1
+
+async def perform(page: Page, action: DirectAction, **params) -> Optional[dict]:
+    """
+    Sends `action` through the page's context request client, which shares
+    the context's cookies, and feeds the reply to the page's GameStateProbe.
+    Returns the JSON reply, or None if the reply was not one the game gives
+    for this action; the caller then falls back to the UI.
+    """
+    base_url = "/".join(page.url.split("/")[:3])
+    request_kwargs = {"form": params} if action.form else {"data": params}
+    try:
+        response = await page.context.request.post(
+            f"{base_url}{action.path}",
+            headers={"X-Requested-With": "XMLHttpRequest", "Referer": page.url},
+            timeout=settings.timeout_ms,
+            fail_on_status_code=False,
+            **request_kwargs,
+        )
+        if response.status != 200 or "json" not in response.headers.get("content-type", ""):
+            raise ValueError(f"HTTP {response.status} {response.headers.get('content-type', '')}")
+        payload = await response.json()
+        if not isinstance(payload, dict) or not isinstance(payload.get("success"), bool):
+            raise ValueError("reply has no success flag")
+        if not payload["success"] and payload.get("error") not in action.expected_errors:
+            raise ValueError(f"refused: {payload.get('error')}")
+    except Exception as e:
+        logger.warning("Direct action failed, falling back to the UI", action=action.path, error=str(e))
+        stats.record(action.path, ok=False)
+        return None
+
+    probe = GameStateProbe.get(page)
+    if probe:
+        probe.observe(payload)
+    stats.record(action.path, ok=True)
+    return payload
+
+settings = DirectActionSettings.from_config(load_config())
+stats = DirectActionStats()
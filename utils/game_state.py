@@ -0,0 +1,196 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional
+from playwright.async_api import Page, Response
+from utils.logger import logger
+from utils.scheduler import ResourceReading
+
+# Names the game uses for each counter in its JSON payloads
+RESOURCE_ALIASES = {
+    "energy": ("energy", "energy_fight"),
+    "kisses": ("kisses", "energy_kiss"),
+    "challenge_points": ("challenge_points", "energy_challenge"),
+}
+
+# A reading with no regeneration timer is trusted for this long
+UNTIMED_MAX_AGE_SECONDS = 30
+
+@dataclass
+class ResourceState:
+    current: int
+    maximum: Optional[int] = None
+    next_tick_seconds: Optional[float] = None
+    observed_at: float = field(default_factory=time.monotonic)
+
+    def is_current(self, now: float) -> bool:
+        """True while the counter cannot have changed without the game telling us."""
+        if self.maximum is not None and self.current >= self.maximum:
+            return True
+        if self.next_tick_seconds:
+            return now - self.observed_at < self.next_tick_seconds
+        return now - self.observed_at < UNTIMED_MAX_AGE_SECONDS
+
+    def reading(self, now: float) -> ResourceReading:
+        next_tick = None
+        if self.next_tick_seconds is not None:
+            next_tick = max(self.next_tick_seconds - (now - self.observed_at), 0)
+        return ResourceReading(current=self.current, maximum=self.maximum, next_tick_seconds=next_tick)
+
+@dataclass
+class GameState:
+    """What the game last reported for one domain."""
+    resources: Dict[str, ResourceState] = field(default_factory=dict)
+    last_outcome: Optional[str] = None
+    wins: int = 0
+    losses: int = 0
+    version: int = 0  # Bumped on every payload that changed something
+
+    def reading(self, resource: str, now: Optional[float] = None) -> Optional[ResourceReading]:
+        """The counter from memory, or None if it is unknown or may have regenerated since."""
+        state = self.resources.get(resource)
+        now = time.monotonic() if now is None else now
+        if state is None or not state.is_current(now):
+            return None
+        return state.reading(now)
+
+def _dicts(payload, depth: int = 3) -> Iterator[dict]:
+    """The payload and the objects nested in it, breadth first."""
+    level = [payload]
+    for _ in range(depth):
+        nested = []
+        for item in level:
+            if isinstance(item, dict):
+                yield item
+                nested.extend(v for v in item.values() if isinstance(v, (dict, list)))
+            elif isinstance(item, list):
+                nested.extend(v for v in item if isinstance(v, (dict, list)))
+        level = nested
+
+def _number(value) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value.replace(",", ""))
+        except ValueError:
+            return None
+    return None
+
+# Larger "_ts" values are Unix timestamps (seconds, or milliseconds past 1e12), not countdowns
+_EPOCH_THRESHOLD = 1e9
+
+def _seconds_until(ts: Optional[float], now: Optional[float] = None) -> Optional[float]:
+    """A `_ts` field as seconds from now: timestamps are converted, small values are already countdowns."""
+    if ts is None or ts < _EPOCH_THRESHOLD:
+        return ts
+    if ts >= _EPOCH_THRESHOLD * 1000:
+        ts /= 1000
+    return max(ts - (time.time() if now is None else now), 0)
+
+def parse_payload(payload) -> Dict[str, ResourceState]:
+    """Extracts every resource counter a game JSON payload reports."""
+    found: Dict[str, ResourceState] = {}
+    # Countdowns may sit next to the counter or elsewhere in the payload, e.g. "energy_regen_seconds"
+    regens = {
+        key[:-len("_regen_seconds")]: value
+        for obj in _dicts(payload) for key, value in obj.items() if key.endswith("_regen_seconds")
+    }
+    for obj in _dicts(payload):
+        for resource, aliases in RESOURCE_ALIASES.items():
+            if resource in found:
+                continue
+            for alias in aliases:
+                value = obj.get(alias)
+                if isinstance(value, dict):
+                    current = _number(value.get("amount", value.get("current")))
+                    maximum = _number(value.get("max_amount", value.get("max")))
+                    regen = _seconds_until(_number(value.get("next_refresh_ts")))
+                    if regen is None:
+                        regen = _number(value.get("regen_seconds"))
+                else:
+                    current = _number(value)
+                    maximum = _number(obj.get(f"{alias}_max", obj.get(f"max_{alias}")))
+                    regen = None
+                if current is None:
+                    continue
+                if regen is None:
+                    regen = next((_number(regens[a]) for a in aliases if a in regens), None)
+                found[resource] = ResourceState(
+                    current=int(current),
+                    maximum=int(maximum) if maximum is not None else None,
+                    next_tick_seconds=regen,
+                )
+                break
+    return found
+
+class GameStateProbe:
+    """
+    Listens to a page's XHR/fetch JSON responses and keeps the GameState they
+    describe, so activities read counters from memory instead of the DOM.
+    Further pages of the same domain can be attached and share that state.
+    """
+    _by_page: Dict[int, "GameStateProbe"] = {}
+
+    def __init__(self, page: Page, domain: str = "default"):
+        self.page = page
+        self.domain = domain
+        self.state = GameState()
+        self._updated = asyncio.Event()
+
+    @classmethod
+    def get(cls, page: Page) -> Optional["GameStateProbe"]:
+        return cls._by_page.get(id(page))
+
+    def install(self):
+        self.attach(self.page)
+
+    def attach(self, page: Page):
+        GameStateProbe._by_page[id(page)] = self
+        page.on("response", self._on_response)
+
+    def detach(self, page: Page):
+        if GameStateProbe._by_page.get(id(page)) is self:
+            del GameStateProbe._by_page[id(page)]
+
+    def uninstall(self):
+        for key in [k for k, probe in GameStateProbe._by_page.items() if probe is self]:
+            del GameStateProbe._by_page[key]
+
+    def observe(self, payload):
+        resources = parse_payload(payload)
+        outcome = payload.get("outcome") if isinstance(payload, dict) else None
+        if not resources and not outcome:
+            return
+        self.state.resources.update(resources)
+        if outcome:
+            self.state.last_outcome = outcome
+            if outcome == "victory":
+                self.state.wins += 1
+            else:
+                self.state.losses += 1
+        self.state.version += 1
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+    async def wait_for_update(self, since_version: int, timeout: float = 2.0) -> bool:
+        """Waits until a payload newer than since_version arrives. Returns False on timeout."""
+        if self.state.version > since_version:
+            return True
+        try:
+            await asyncio.wait_for(self._updated.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return self.state.version > since_version
+
+    async def _on_response(self, response: Response):
+        try:
+            if response.request.resource_type not in ("xhr", "fetch"):
+                return
+            if "json" not in response.headers.get("content-type", ""):
+                return
+            self.observe(await response.json())
+        except Exception as e:
+            logger.debug(f"Game state probe skipped response: {e}")
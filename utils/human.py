@@ -1,15 +1,23 @@
 import asyncio
 import random
 from playwright.async_api import Page
+from utils import tracing
+from utils.retry import RetryPolicy
 
 class HumanUtils:
+    # Multiplier applied to every human-like delay. Only the benchmark lowers it.
+    time_scale: float = 1.0
+    # A click waits this long for its element instead of the page's 60 s default
+    click_timeout_ms: float = 10000
+
     @staticmethod
     async def random_sleep(min_sec: float = 1.5, max_sec: float = 4.0):
         """
         Sleeps for a random duration between min_sec and max_sec to simulate human behavior.
         """
-        duration = random.uniform(min_sec, max_sec)
-        await asyncio.sleep(duration)
+        duration = random.uniform(min_sec, max_sec) * HumanUtils.time_scale
+        with tracing.span("human sleep", "human"):
+            await asyncio.sleep(duration)
 
     @staticmethod
     async def random_jitter(min_sec: float = 1.5, max_sec: float = 4.5):
@@ -19,24 +27,34 @@ class HumanUtils:
         await HumanUtils.random_sleep(min_sec, max_sec)
 
     @staticmethod
-    async def human_click(page: Page, locator):
+    async def human_click(page: Page, locator, submits: bool = False):
         """
         Clicks an element with a slight random offset to simulate human inaccuracy.
+        A click that times out is retried under the page's RetryPolicy, unless it
+        `submits` an action (a fight, a collect): after a timeout that click may
+        already have gone through, and a second one would spend resources again.
         """
         if isinstance(locator, str):
             locator = page.locator(locator)
+        with tracing.span("human click", "human", submits=submits):
+            if submits:
+                await HumanUtils._click(page, locator)
+            else:
+                await RetryPolicy.for_page(page).run(lambda: HumanUtils._click(page, locator), "click")
 
+    @staticmethod
+    async def _click(page: Page, locator):
         try:
             # Ensure element is visible and scrolled into view
-            await locator.scroll_into_view_if_needed()
-            box = await locator.bounding_box()
+            await locator.scroll_into_view_if_needed(timeout=HumanUtils.click_timeout_ms)
+            box = await locator.bounding_box(timeout=HumanUtils.click_timeout_ms)
             if box:
                 # Click at a random point within the inner 80% of the element
                 x = box['x'] + box['width'] * random.uniform(0.1, 0.9)
                 y = box['y'] + box['height'] * random.uniform(0.1, 0.9)
                 await page.mouse.click(x, y)
             else:
-                await locator.click()
+                await locator.click(timeout=HumanUtils.click_timeout_ms)
         except Exception:
             # Fallback to standard click if something goes wrong
-            await locator.click()
+            await locator.click(timeout=HumanUtils.click_timeout_ms)
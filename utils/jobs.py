@@ -0,0 +1,170 @@
+import asyncio
+import heapq
+import itertools
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+from playwright.async_api import BrowserContext, Page
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+@dataclass
+class Job:
+    domain: str
+    activity: str
+    priority: int = 0  # Higher runs first; equal priorities run in submission order
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    status: str = QUEUED
+    created_at: datetime = field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+class JobQueue:
+    """
+    Ad-hoc jobs, one priority queue per domain. Submitting a job wakes the
+    domain's worker (wait() returns) and asks activities running on that
+    domain to yield at their next safe point (preempt_requested). Finished
+    jobs are kept for lookup up to `history` of them.
+    """
+
+    def __init__(self, history: int = 500):
+        self.history = history
+        self._queues: Dict[str, List[Tuple[int, int, Job]]] = {}
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._seq = itertools.count()
+        self._wakeups: Dict[str, asyncio.Event] = {}
+        # Set on every submission; the sharding coordinator forwards new jobs on it
+        self.submitted = asyncio.Event()
+        # Which domain a browser context is currently running a cycle for
+        self._domain_by_context: Dict[int, str] = {}
+        # Domains with a running worker (or, in the sharding coordinator, a shard that owns them)
+        self.served: Set[str] = set()
+        # Pages whose activity stopped early to let a job run, until take_yielded()
+        self._yielded: Set[int] = set()
+        # Jobs whose state changed since the last take_changes()
+        self._changed: "OrderedDict[str, None]" = OrderedDict()
+
+    def submit(self, domain: str, activity: str, priority: int = 0, job_id: Optional[str] = None) -> Job:
+        job = Job(domain=domain, activity=activity, priority=priority)
+        if job_id:
+            job.id = job_id
+        heapq.heappush(self._queues.setdefault(domain, []), (-priority, next(self._seq), job))
+        self._remember(job)
+        self._wakeup(domain).set()
+        self.submitted.set()
+        return job
+
+    def serve(self, domain: str):
+        """Marks the domain as having a worker that will run its jobs."""
+        self.served.add(domain)
+
+    def unserve(self, domain: str, error: str = "Domain stopped"):
+        """The domain's worker stopped; its queued jobs would never run, so they fail."""
+        self.served.discard(domain)
+        self.fail_pending(domain, error)
+
+    def pop(self, domain: str, start: bool = True) -> Optional[Job]:
+        """Takes the domain's highest-priority queued job; with start, marks it running."""
+        queue = self._queues.get(domain)
+        if not queue:
+            return None
+        _, _, job = heapq.heappop(queue)
+        if start:
+            job.status = RUNNING
+            job.started_at = datetime.now()
+            self._changed[job.id] = None
+        return job
+
+    def fail_pending(self, domain: str, error: str):
+        """Fails every queued job of the domain, e.g. when its cycle could not log in."""
+        while True:
+            job = self.pop(domain)
+            if job is None:
+                return
+            self.finish(job, error)
+
+    def finish(self, job: Job, error: Optional[str] = None):
+        job.status = FAILED if error else DONE
+        job.error = error
+        job.finished_at = datetime.now()
+        self._changed[job.id] = None
+
+    def pending(self, domain: str) -> int:
+        return len(self._queues.get(domain, ()))
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def jobs(self, domain: Optional[str] = None) -> List[Job]:
+        return [j for j in self._jobs.values() if domain is None or j.domain == domain]
+
+    def take_changes(self) -> List[Job]:
+        """Jobs submitted, started or finished since the last call."""
+        changed = [self._jobs[job_id] for job_id in self._changed if job_id in self._jobs]
+        self._changed.clear()
+        return changed
+
+    def update(self, job: Job):
+        """Installs a job's state as reported by the process that ran it."""
+        self._remember(job)
+
+    async def wait(self, domain: str, timeout: float) -> bool:
+        """Sleeps up to `timeout` seconds; returns True early when a job is queued for the domain."""
+        wakeup = self._wakeup(domain)
+        if self.pending(domain):
+            return True
+        wakeup.clear()
+        try:
+            await asyncio.wait_for(wakeup.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def bind(self, context: BrowserContext, domain: str):
+        """Marks the context as running `domain`'s cycle, so its activities can see preemption requests."""
+        self._domain_by_context[id(context)] = domain
+
+    def unbind(self, context: BrowserContext):
+        self._domain_by_context.pop(id(context), None)
+
+    def domain_of(self, page: Page) -> Optional[str]:
+        """The domain whose cycle this page is running, if bound."""
+        return self._domain_by_context.get(id(page.context))
+
+    def preempt_requested(self, page: Page) -> bool:
+        """True when a job is waiting for the domain this page's cycle runs."""
+        domain = self.domain_of(page)
+        return domain is not None and self.pending(domain) > 0
+
+    def note_yield(self, page: Page):
+        """Records that the activity running on `page` stopped early for a queued job."""
+        self._yielded.add(id(page))
+
+    def take_yielded(self, page: Page) -> bool:
+        """True, once, if the activity on `page` stopped early for a queued job."""
+        if id(page) in self._yielded:
+            self._yielded.discard(id(page))
+            return True
+        return False
+
+    def _wakeup(self, domain: str) -> asyncio.Event:
+        if domain not in self._wakeups:
+            self._wakeups[domain] = asyncio.Event()
+        return self._wakeups[domain]
+
+    def _remember(self, job: Job):
+        self._jobs[job.id] = job
+        self._jobs.move_to_end(job.id)
+        self._changed[job.id] = None
+        while len(self._jobs) > self.history:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if oldest.status in (QUEUED, RUNNING):
+                break
+            del self._jobs[oldest_id]
+            self._changed.pop(oldest_id, None)
+
+# Singleton instance
+job_queue = JobQueue()
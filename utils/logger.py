@@ -1,7 +1,39 @@
+import atexit
+import gzip
 import logging
+import logging.handlers
+import os
+import queue
+import random
+import shutil
 import structlog
 import sys
-import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, TextIO
+from utils import metrics
+from utils.config_loader import load_config
+
+@dataclass
+class LogSettings:
+    directory: str = "logs"
+    file: str = "game_bot.log"
+    # Records go through a queue to a background thread; the event loop never waits on a disk or a pipe
+    background: bool = True
+    queue_size: int = 10000  # Records beyond this backlog are dropped and counted
+    rotate_mb: float = 50  # Rotate by size; 0 keeps one growing file unless rotate_when is set
+    rotate_when: Optional[str] = None  # Rotate by time instead ("midnight", "h", ...; see TimedRotatingFileHandler)
+    backups: int = 7
+    compress: bool = True  # gzip rotated files
+    # event -> share of INFO/DEBUG records kept, e.g. {"Checking opponent": 0.1}
+    sampling: Dict[str, float] = field(default_factory=dict)
+    # event -> most INFO/DEBUG records per second
+    rate_limits: Dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def from_config(cls, config: dict) -> "LogSettings":
+        log_cfg = config.get("logging", {}) or {}
+        return cls(**{k: v for k, v in log_cfg.items() if k in cls.__dataclass_fields__})
 
 def add_domain(logger, method_name, event_dict):
     """
@@ -11,16 +43,103 @@ def add_domain(logger, method_name, event_dict):
         event_dict["domain"] = "default"
     return event_dict
 
-def setup_logger():
-    # Ensure logs directory exists
-    log_dir = "logs"
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
+class EventSampler:
+    """
+    Drops noisy INFO/DEBUG events (matched on the event text) before they
+    are rendered: a random share per `sampling`, anything over the
+    per-second rate per `rate_limits`. The next record of that event that
+    gets through carries how many were suppressed. Warnings and errors
+    always pass.
+    """
+
+    def __init__(self, sampling: Dict[str, float], rate_limits: Dict[str, float]):
+        self.sampling = sampling
+        self.rate_limits = rate_limits
+        self.suppressed: Dict[str, int] = {}  # Since the event last got through
+        self.total: Dict[str, int] = {}
+        # event -> (tokens, time.monotonic() of the last refill)
+        self._buckets: Dict[str, tuple] = {}
+
+    def __call__(self, logger, method_name, event_dict):
+        event = event_dict.get("event")
+        if method_name not in ("info", "debug") or not isinstance(event, str):
+            return event_dict
+        if not self._keep(event):
+            self.suppressed[event] = self.suppressed.get(event, 0) + 1
+            self.total[event] = self.total.get(event, 0) + 1
+            raise structlog.DropEvent
+        if self.suppressed.get(event):
+            event_dict["suppressed"] = self.suppressed.pop(event)
+        return event_dict
+
+    def _keep(self, event: str) -> bool:
+        rate = self.sampling.get(event)
+        if rate is not None and random.random() >= rate:
+            return False
+        limit = self.rate_limits.get(event)
+        if limit is None:
+            return True
+        now = time.monotonic()
+        tokens, refilled = self._buckets.get(event, (limit, now))
+        tokens = min(limit, tokens + (now - refilled) * limit)
+        if tokens < 1:
+            self._buckets[event] = (tokens, now)
+            return False
+        self._buckets[event] = (tokens - 1, now)
+        return True
 
-    log_file = os.path.join(log_dir, "game_bot.log")
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Never blocks the caller: a record that finds the queue full is counted and dropped."""
+    dropped = 0
 
-    # Configure processors
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def _gzip_rotator(source: str, dest: str):
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+def _file_handler(settings: LogSettings) -> logging.Handler:
+    path = os.path.join(settings.directory, settings.file)
+    if settings.rotate_when:
+        handler = logging.handlers.TimedRotatingFileHandler(path, when=settings.rotate_when,
+                                                            backupCount=settings.backups)
+    elif settings.rotate_mb:
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=int(settings.rotate_mb * 2**20),
+                                                       backupCount=settings.backups)
+    else:
+        return logging.FileHandler(path)
+    if settings.compress:
+        handler.namer = lambda name: name + ".gz"
+        handler.rotator = _gzip_rotator
+    return handler
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[DroppingQueueHandler] = None
+_sampler: Optional[EventSampler] = None
+
+def stop_logging():
+    """Writes out queued records and stops the background writer."""
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
+
+def setup_logger(settings: Optional[LogSettings] = None, stream: TextIO = None):
+    global _listener, _queue_handler, _sampler
+    settings = settings or LogSettings.from_config(load_config())
+    # Ensure logs directory exists
+    if not os.path.exists(settings.directory):
+        os.makedirs(settings.directory)
+
+    # Configure processors; sampling runs first so dropped events cost nothing more
+    _sampler = EventSampler(settings.sampling, settings.rate_limits)
     processors = [
+        _sampler,
         structlog.contextvars.merge_contextvars,
         structlog.processors.add_log_level,
         structlog.processors.StackInfoRenderer(),
@@ -30,20 +149,29 @@ def setup_logger():
         structlog.processors.JSONRenderer(),
     ]
 
-    # Standard logging configuration for multi-output (console and file)
     # Since we use JSONRenderer, structlog will pass a JSON string as the message to logging.
-    logging.basicConfig(
-        format="%(message)s",
-        stream=sys.stdout,
-        level=logging.INFO,
-        force=True
-    )
+    formatter = logging.Formatter("%(message)s")
+    console_handler = logging.StreamHandler(stream or sys.stdout)
+    file_handler = _file_handler(settings)
+    for handler in (console_handler, file_handler):
+        handler.setFormatter(formatter)
 
+    stop_logging()
     root_logger = logging.getLogger()
-    # Add file handler
-    file_handler = logging.FileHandler(log_file)
-    file_handler.setFormatter(logging.Formatter("%(message)s"))
-    root_logger.addHandler(file_handler)
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+        handler.close()
+    root_logger.setLevel(logging.INFO)
+    _queue_handler = None
+    if settings.background:
+        records = queue.Queue(settings.queue_size)
+        _queue_handler = DroppingQueueHandler(records)
+        root_logger.addHandler(_queue_handler)
+        _listener = logging.handlers.QueueListener(records, console_handler, file_handler)
+        _listener.start()
+    else:
+        root_logger.addHandler(console_handler)
+        root_logger.addHandler(file_handler)
 
     structlog.configure(
         processors=processors,
@@ -54,5 +182,12 @@ def setup_logger():
 
     return structlog.get_logger()
 
+atexit.register(stop_logging)
+
+metrics.registry.counter("gamebot_log_records_dropped_total", "Log records dropped because the writer fell behind.",
+                         collect=lambda: {(): _queue_handler.dropped if _queue_handler else 0})
+metrics.registry.counter("gamebot_log_events_suppressed_total", "INFO/DEBUG events dropped by sampling or rate limits.",
+                         ("event",), collect=lambda: {(e,): n for e, n in (_sampler.total if _sampler else {}).items()})
+
 # Initialize the logger
 logger = setup_logger()
@@ -0,0 +1,159 @@
+import bisect
+import math
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Prometheus-style instruments. Recording is a dict lookup and an addition,
+# so they are cheap enough for every activity and navigation; the text
+# exposition format is only built when /metrics is scraped.
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        """(name suffix, rendered labels, value) for every series."""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{self.name}{suffix}{labels} {_number(value)}" for suffix, labels, value in self.samples())
+        return lines
+
+class _Series(Metric):
+    """One value per label combination, kept here or read from `collect` at scrape time."""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 collect: Optional[Callable[[], Dict[LabelValues, float]]] = None):
+        super().__init__(name, help, labels)
+        self.values: Dict[LabelValues, float] = {}
+        self.collect = collect
+
+    def samples(self):
+        values = self.collect() if self.collect else self.values
+        for label_values, value in values.items():
+            yield "", _labels(self.labels, label_values), value
+
+class Counter(_Series):
+    kind = "counter"
+
+    def inc(self, *label_values: str, amount: float = 1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+class Gauge(_Series):
+    kind = "gauge"
+
+    def set(self, value: float, *label_values: str):
+        self.values[label_values] = value
+
+# Seconds; navigations and activities both fall inside this range
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (count per bucket, non-cumulative with +Inf last; [sum])
+        self.series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *label_values: str):
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = ([0] * (len(self.buckets) + 1), [0.0])
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+
+    def samples(self):
+        for values, (counts, total) in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield "_bucket", _labels(self.labels, values, f'le="{_number(bound)}"'), cumulative
+            yield "_sum", _labels(self.labels, values), total[0]
+            yield "_count", _labels(self.labels, values), cumulative
+
+# name -> (kind, help, samples); plain data, so it can be sent between processes
+Exported = Dict[str, Tuple[str, str, List[Tuple[str, str, float]]]]
+
+def _with_label(labels: str, extra: str) -> str:
+    return "{" + extra + "}" if not labels else labels[:-1] + "," + extra + "}"
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+        # Samples reported by other processes (shard workers), by their label value
+        self.remote: Dict[str, Exported] = {}
+        self.remote_label = "shard"
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = (), collect=None) -> Counter:
+        return self.register(Counter(name, help, labels, collect))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = (), collect=None) -> Gauge:
+        return self.register(Gauge(name, help, labels, collect))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def export(self) -> Exported:
+        """Every metric's current samples, for another process to merge."""
+        return {name: (m.kind, m.help, list(m.samples())) for name, m in self.metrics.items()}
+
+    def merge(self, source: str, exported: Exported):
+        """Replaces the samples last reported by `source`; they render with a remote_label="source" label."""
+        self.remote[source] = exported
+
+    def render(self) -> str:
+        """The text exposition format (version 0.0.4)."""
+        lines = []
+        names = list(self.metrics)
+        names += [n for exported in self.remote.values() for n in exported if n not in names]
+        for name in names:
+            metric = self.metrics.get(name)
+            remote = [(source, exported[name]) for source, exported in self.remote.items() if name in exported]
+            if metric:
+                lines.extend(metric.render())
+            else:
+                _, (kind, help, _) = remote[0]
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+            for source, (_, _, samples) in remote:
+                extra = f'{self.remote_label}="{_escape(source)}"'
+                lines.extend(f"{name}{suffix}{_with_label(labels, extra)} {_number(value)}" for suffix, labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+registry = Registry()
+
+activity_seconds = registry.histogram(
+    "gamebot_activity_duration_seconds", "Time to navigate to and run an activity.", ("domain", "activity", "outcome"))
+navigation_seconds = registry.histogram(
+    "gamebot_navigation_duration_seconds", "Time until a navigated page was ready, retries included.")
+fights = registry.counter(
+    "gamebot_fights_total", "Fights performed.", ("domain", "activity"))
+resources_spent = registry.counter(
+    "gamebot_resources_spent_total", "Game resources spent on fights.", ("domain", "resource"))
@@ -0,0 +1,99 @@
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+from playwright.async_api import Page
+from utils import metrics, tracing
+from utils.config_loader import load_config
+from utils.logger import logger
+from utils.retry import RetryPolicy
+
+@dataclass
+class NavigationSettings:
+    # "ready": resolve as soon as the page's readiness selector is visible.
+    # "networkidle": always wait for the network to settle (legacy behaviour).
+    strategy: str = "ready"
+    ready_timeout_ms: float = 15000
+
+    @classmethod
+    def from_config(cls, config: dict) -> "NavigationSettings":
+        performance = config.get("performance", {}) or {}
+        return cls(
+            strategy=performance.get("wait_strategy", cls.strategy),
+            ready_timeout_ms=performance.get("ready_timeout_ms", cls.ready_timeout_ms),
+        )
+
+@dataclass
+class NavigationStats:
+    count: int = 0
+    total_seconds: float = 0.0
+    fallbacks: int = 0
+    in_flight: int = 0
+    # (time.monotonic() at the end, duration) of the latest navigations
+    recent: deque = field(default_factory=lambda: deque(maxlen=20))
+    recent_window_seconds: float = 60  # Older navigations no longer count towards recent_seconds
+
+    def record(self, seconds: float, fell_back: bool):
+        self.count += 1
+        self.total_seconds += seconds
+        self.recent.append((time.monotonic(), seconds))
+        if fell_back:
+            self.fallbacks += 1
+
+    @property
+    def average_seconds(self) -> float:
+        return self.total_seconds / self.count if self.count else 0.0
+
+    @property
+    def recent_seconds(self) -> float:
+        """Average duration of the navigations within the window; 0 once none are (so the load reading decays)."""
+        cutoff = time.monotonic() - self.recent_window_seconds
+        durations = [seconds for ended, seconds in self.recent if ended >= cutoff]
+        return sum(durations) / len(durations) if durations else 0.0
+
+async def wait_ready(page: Page, ready: Optional[str], timeout: float = 60000) -> bool:
+    """
+    Waits for the readiness selector to be visible, falling back to networkidle
+    when there is none or it does not show up in time. Returns True on fallback.
+    """
+    if ready and settings.strategy != "networkidle":
+        try:
+            with tracing.span("wait for selector", "wait", selector=ready):
+                await page.wait_for_selector(ready, state="visible", timeout=settings.ready_timeout_ms)
+            return False
+        except Exception:
+            logger.warning("Readiness condition not met, falling back to networkidle", url=page.url, ready=ready)
+    with tracing.span("wait for networkidle", "wait"):
+        await page.wait_for_load_state("networkidle", timeout=timeout)
+    return bool(ready)
+
+async def _navigate_once(page: Page, url: str, ready: Optional[str], timeout: float) -> bool:
+    if ready and settings.strategy != "networkidle":
+        with tracing.span("goto", "navigation", wait_until="commit"):
+            await page.goto(url, wait_until="commit", timeout=timeout)
+        return await wait_ready(page, ready, timeout)
+    with tracing.span("goto", "navigation", wait_until="networkidle"):
+        await page.goto(url, wait_until="networkidle", timeout=timeout)
+    return False
+
+async def navigate(page: Page, url: str, ready: Optional[str] = None, timeout: float = 60000):
+    """
+    Navigates to url and resolves once the page is ready (see wait_ready).
+    Transient failures are retried under the page's RetryPolicy.
+    """
+    started = time.perf_counter()
+    counted = stats  # The benchmark swaps the module's stats between runs
+    counted.in_flight += 1
+    try:
+        with tracing.span("navigate", "navigation", url=url):
+            fell_back = await RetryPolicy.for_page(page).run(
+                lambda: _navigate_once(page, url, ready, timeout), "navigation", url=url
+            )
+    finally:
+        counted.in_flight -= 1
+    seconds = time.perf_counter() - started
+    counted.record(seconds, fell_back)
+    metrics.navigation_seconds.observe(seconds)
+
+settings = NavigationSettings.from_config(load_config())
+stats = NavigationStats()
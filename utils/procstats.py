@@ -0,0 +1,83 @@
+import os
+import resource
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+_PROC = "/proc"
+
+@dataclass
+class ProcSample:
+    cpu_seconds: float = 0.0
+    rss_bytes: int = 0
+    processes: int = 0
+
+def _read_stat(pid: int) -> Optional[List[str]]:
+    """Returns the fields of /proc/<pid>/stat that follow the command name."""
+    try:
+        with open(os.path.join(_PROC, str(pid), "stat"), "r") as f:
+            data = f.read()
+    except OSError:
+        return None
+    # The command name may contain spaces, so split after the closing paren
+    return data[data.rfind(")") + 2:].split()
+
+def process_tree(root_pid: int) -> List[int]:
+    """
+    Returns root_pid and all of its descendants (e.g. the browser processes
+    Playwright spawns for us).
+    """
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir(_PROC):
+        if not entry.isdigit():
+            continue
+        fields = _read_stat(int(entry))
+        if fields:
+            children.setdefault(int(fields[1]), []).append(int(entry))
+
+    tree, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, []))
+    return tree
+
+def sample(root_pid: Optional[int] = None) -> ProcSample:
+    """
+    Sums CPU time and resident memory over a process and its descendants.
+    Falls back to the current process' rusage where /proc is unavailable.
+    """
+    root_pid = root_pid or os.getpid()
+    if not os.path.isdir(_PROC):
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        # ru_maxrss is a peak value in KiB on Linux; good enough as a fallback
+        return ProcSample(usage.ru_utime + usage.ru_stime, usage.ru_maxrss * 1024, 1)
+
+    ticks = os.sysconf("SC_CLK_TCK")
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    result = ProcSample()
+    for pid in process_tree(root_pid):
+        fields = _read_stat(pid)
+        if not fields:
+            continue
+        result.cpu_seconds += (int(fields[11]) + int(fields[12])) / ticks
+        result.rss_bytes += int(fields[21]) * page_size
+        result.processes += 1
+    return result
+
+def host_cpu_times() -> Optional[Tuple[float, float]]:
+    """(busy, total) CPU ticks of the whole host since boot, from /proc/stat; None if unavailable."""
+    try:
+        with open(os.path.join(_PROC, "stat"), "r") as f:
+            fields = [float(v) for v in f.readline().split()[1:]]
+    except (OSError, ValueError):
+        return None
+    # user nice system idle iowait irq softirq steal ...; idle and iowait count as not busy
+    idle = fields[3] + (fields[4] if len(fields) > 4 else 0)
+    total = sum(fields[:8])
+    return total - idle, total
+
+def host_cpu_percent(previous: Optional[Tuple[float, float]], current: Optional[Tuple[float, float]]) -> Optional[float]:
+    """Host CPU use between two host_cpu_times() readings."""
+    if not previous or not current or current[1] <= previous[1]:
+        return None
+    return 100.0 * (current[0] - previous[0]) / (current[1] - previous[1])
@@ -0,0 +1,140 @@
+import asyncio
+import random
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+from playwright.async_api import BrowserContext, Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+from utils import metrics, tracing
+from utils.config_loader import load_config
+from utils.logger import logger
+
+T = TypeVar("T")
+
+# Errors after which another attempt on the same page cannot succeed
+FATAL_MARKERS = ("has been closed", "Target closed", "crashed")
+
+@dataclass
+class RetrySettings:
+    attempts: int = 5  # Including the first
+    click_attempts: int = 2  # Clicks fail fast; the activity's own loop decides what to do next
+    base_delay_seconds: float = 1.0
+    multiplier: float = 2.5
+    max_delay_seconds: float = 30.0
+    jitter: float = 0.5  # Each delay is shortened by a random fraction of up to this much
+    budget_per_cycle: int = 12  # Retries one domain cycle may spend across all its operations
+
+    @classmethod
+    def from_config(cls, config: dict, domain_cfg: Optional[dict] = None) -> "RetrySettings":
+        """performance.retry, overridden key by key by the domain's own `retry` section."""
+        retry_cfg = {
+            **((config.get("performance", {}) or {}).get("retry", {}) or {}),
+            **((domain_cfg or {}).get("retry", {}) or {}),
+        }
+        return cls(**{k: v for k, v in retry_cfg.items() if k in cls.__dataclass_fields__})
+
+@dataclass
+class RetryStats:
+    """Counters per operation kind ("navigation", "click")."""
+    retries: Dict[str, int] = field(default_factory=dict)
+    delay_seconds: Dict[str, float] = field(default_factory=dict)
+    gave_up: Dict[str, int] = field(default_factory=dict)
+    budget_exhausted: int = 0
+
+    def record_retry(self, kind: str, delay: float):
+        self.retries[kind] = self.retries.get(kind, 0) + 1
+        self.delay_seconds[kind] = self.delay_seconds.get(kind, 0.0) + delay
+
+    def record_gave_up(self, kind: str):
+        self.gave_up[kind] = self.gave_up.get(kind, 0) + 1
+
+    def as_dict(self) -> dict:
+        return {
+            "retries": dict(self.retries),
+            "delay_seconds": {k: round(v, 3) for k, v in self.delay_seconds.items()},
+            "gave_up": dict(self.gave_up),
+            "budget_exhausted": self.budget_exhausted,
+        }
+
+def is_retryable(error: BaseException, kind: str = "navigation") -> bool:
+    """
+    Timeouts and dropped connections are worth another attempt; a closed or
+    crashed page and errors raised by our own code are not. Other Playwright
+    errors are retried for navigations only (net::ERR_*), since a click that
+    failed for any reason but a timeout may already have been delivered.
+    """
+    if isinstance(error, PlaywrightError) and any(m in str(error) for m in FATAL_MARKERS):
+        return False
+    if isinstance(error, (PlaywrightTimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    if isinstance(error, PlaywrightError):
+        return kind == "navigation" and "net::ERR_" in str(error)
+    return False
+
+class RetryPolicy:
+    """
+    Exponential backoff with jitter for one domain cycle. All operations of
+    the cycle draw on one retry budget, so a domain that is down gives up
+    after budget_per_cycle retries instead of paying every call site's full
+    back-off. run_domain_sequence attaches the cycle's policy to its browser
+    context; navigate() and HumanUtils.human_click look it up from the page.
+    """
+    _by_context: Dict[int, "RetryPolicy"] = {}
+
+    def __init__(self, settings: RetrySettings, name: str = "default"):
+        self.settings = settings
+        self.name = name
+        self.budget = settings.budget_per_cycle
+
+    @classmethod
+    def for_page(cls, page) -> "RetryPolicy":
+        """The policy attached to the page's context, or one built from the global settings."""
+        policy = cls._by_context.get(id(page.context))
+        return policy or cls(settings)
+
+    def attach(self, context: BrowserContext):
+        RetryPolicy._by_context[id(context)] = self
+
+    def detach(self, context: BrowserContext):
+        if RetryPolicy._by_context.get(id(context)) is self:
+            del RetryPolicy._by_context[id(context)]
+
+    def delay(self, retry: int) -> float:
+        """Seconds to wait before the `retry`-th retry (1-based)."""
+        s = self.settings
+        delay = min(s.max_delay_seconds, s.base_delay_seconds * s.multiplier ** (retry - 1))
+        return delay * (1 - random.uniform(0, s.jitter))
+
+    async def run(self, operation: Callable[[], Awaitable[T]], kind: str = "navigation", **log_context) -> T:
+        """Awaits operation(), retrying retryable errors while attempts and budget last."""
+        attempts = self.settings.click_attempts if kind == "click" else self.settings.attempts
+        attempt = 1
+        while True:
+            try:
+                return await operation()
+            except Exception as e:
+                if not is_retryable(e, kind):
+                    raise
+                if attempt >= attempts:
+                    stats.record_gave_up(kind)
+                    logger.warning("Giving up after retries", kind=kind, attempts=attempt, error=str(e), **log_context)
+                    raise
+                if self.budget <= 0:
+                    stats.budget_exhausted += 1
+                    stats.record_gave_up(kind)
+                    logger.warning("Retry budget exhausted", kind=kind, domain=self.name, error=str(e), **log_context)
+                    raise
+                self.budget -= 1
+                delay = self.delay(attempt)
+                stats.record_retry(kind, delay)
+                logger.warning("Retrying after transient error", kind=kind, attempt=attempt,
+                               delay=f"{delay:.1f}s", error=str(e), **log_context)
+                with tracing.span("retry backoff", "retry", kind=kind, attempt=attempt):
+                    await asyncio.sleep(delay)
+                attempt += 1
+
+settings = RetrySettings.from_config(load_config())
+stats = RetryStats()
+
+metrics.registry.counter("gamebot_retries_total", "Retries after transient errors.", ("kind",),
+                         collect=lambda: {(kind,): n for kind, n in stats.retries.items()})
+metrics.registry.counter("gamebot_retries_gave_up_total", "Operations that failed after retrying.", ("kind",),
+                         collect=lambda: {(kind,): n for kind, n in stats.gave_up.items()})
@@ -0,0 +1,230 @@
+import asyncio
+import json
+import os
+import re
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+from utils.config_loader import load_config
+from utils.logger import logger
+
+DEFAULT_MIN_SLEEP = 60
+DEFAULT_MAX_SLEEP = 1800
+DEFAULT_RETRY = 300
+
+_DURATION_PART = re.compile(r"(\d+)\s*([dhms])")
+
+def parse_duration(text: str) -> Optional[int]:
+    """
+    Parses the game's countdown text ("4m 12s", "1h 05m", "12:34", "01:02:03") into seconds.
+    """
+    text = (text or "").strip().lower()
+    if not text:
+        return None
+    if ":" in text:
+        try:
+            parts = [int(p) for p in text.split(":")]
+        except ValueError:
+            return None
+        seconds = 0
+        for part in parts:
+            seconds = seconds * 60 + part
+        return seconds
+    parts = _DURATION_PART.findall(text)
+    if not parts:
+        return None
+    unit = {"d": 86400, "h": 3600, "m": 60, "s": 1}
+    return sum(int(value) * unit[suffix] for value, suffix in parts)
+
+@dataclass
+class ResourceReading:
+    """A resource counter as shown by the game at the end of an activity."""
+    current: int
+    maximum: Optional[int] = None
+    next_tick_seconds: Optional[int] = None  # Countdown until the next point regenerates
+
+@dataclass
+class ScheduleEntry:
+    next_due: datetime
+    last_run: Optional[datetime] = None
+    reading: Optional[ResourceReading] = None
+
+class ActivityScheduler:
+    """
+    Predicts when each (domain, activity) pair next has something to spend,
+    based on the resource counters and regeneration timers the activities read.
+    The schedule is persisted so it survives restarts.
+    """
+
+    def __init__(self, config: Optional[dict] = None):
+        config = config or {}
+        self.state_path = config.get("state_path", "schedule_state.json")
+        self.min_sleep = config.get("min_sleep_seconds", DEFAULT_MIN_SLEEP)
+        self.max_sleep = config.get("max_sleep_seconds", DEFAULT_MAX_SLEEP)
+        self.retry_seconds = config.get("retry_seconds", DEFAULT_RETRY)
+        # Records within this many seconds of each other share one file write
+        self.save_delay = config.get("save_delay_seconds", 1.0)
+        self.activities: Dict[str, dict] = config.get("activities", {})
+        self.entries: Dict[str, Dict[str, ScheduleEntry]] = {}
+        # Set in a shard worker: only these domains are written back, the rest of the file belongs to other shards
+        self.owned_domains: Optional[Set[str]] = None
+        self._pending_save: Optional[asyncio.TimerHandle] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._flush_task: Optional[asyncio.Future] = None
+        self.load()
+
+    def interval(self, activity: str) -> float:
+        """The activity's configured interval: interval_seconds, else the time to regenerate one run's cost."""
+        rules = self.activities.get(activity, {})
+        return rules.get("interval_seconds", rules.get("regen_seconds", self.max_sleep) * rules.get("cost", 1))
+
+    def predict(self, activity: str, reading: Optional[ResourceReading], now: datetime) -> datetime:
+        """Returns the earliest time the activity can spend its resource again."""
+        rules = self.activities.get(activity, {})
+        if "interval_seconds" in rules or reading is None:
+            return now + timedelta(seconds=self.interval(activity))
+
+        cost = rules.get("cost", 1)
+        regen = rules.get("regen_seconds", self.max_sleep)
+        threshold = min(cost, reading.maximum) if reading.maximum else cost
+        missing = threshold - reading.current
+        if missing <= 0:
+            return now
+        first_tick = reading.next_tick_seconds if reading.next_tick_seconds else regen
+        return now + timedelta(seconds=first_tick + (missing - 1) * regen)
+
+    def record(self, domain: str, activity: str, reading: Optional[ResourceReading] = None,
+               now: Optional[datetime] = None, yielded: bool = False) -> datetime:
+        """
+        Records the counter observed after an activity ran and returns its next due time.
+        An activity that ended with resources it could not spend (e.g. no suitable
+        opponent) gives no hint when that changes and waits its configured interval;
+        one that stopped early for an ad-hoc job (`yielded`) comes back after min_sleep.
+        Never schedules sooner than min_sleep.
+        """
+        now = now or datetime.now()
+        predicted = self.predict(activity, reading, now)
+        if yielded:
+            predicted = now
+        elif predicted <= now:
+            predicted = now + timedelta(seconds=self.interval(activity))
+        next_due = max(predicted, now + timedelta(seconds=self.min_sleep))
+        self.entries.setdefault(domain, {})[activity] = ScheduleEntry(next_due, now, reading)
+        logger.info("Activity scheduled", domain=domain, activity=activity,
+                    next_due=next_due.isoformat(), reading=asdict(reading) if reading else None)
+        self.save()
+        return next_due
+
+    def record_failure(self, domain: str, activity: str, now: Optional[datetime] = None) -> datetime:
+        now = now or datetime.now()
+        entry = self.entries.setdefault(domain, {}).get(activity)
+        next_due = now + timedelta(seconds=self.retry_seconds)
+        self.entries[domain][activity] = ScheduleEntry(next_due, now, entry.reading if entry else None)
+        self.save()
+        return next_due
+
+    def next_due(self, domain: str, activity: str) -> Optional[datetime]:
+        """None means the activity has never run and is due immediately."""
+        entry = self.entries.get(domain, {}).get(activity)
+        return entry.next_due if entry else None
+
+    def due_activities(self, domain: str, order: List[str], now: Optional[datetime] = None) -> List[str]:
+        now = now or datetime.now()
+        return [a for a in order if (self.next_due(domain, a) or now) <= now]
+
+    def schedule_for(self, domain: str, order: List[str]) -> Dict[str, Optional[datetime]]:
+        return {a: self.next_due(domain, a) for a in order}
+
+    def seconds_until_wake(self, domain: str, order: List[str], now: Optional[datetime] = None) -> float:
+        """Seconds until the earliest due activity, clamped to [min_sleep, max_sleep]."""
+        now = now or datetime.now()
+        dues = [self.next_due(domain, a) or now for a in order]
+        if not dues:
+            return self.max_sleep
+        delay = (min(dues) - now).total_seconds()
+        return min(max(delay, self.min_sleep), self.max_sleep)
+
+    def load(self):
+        if not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, "r") as f:
+                raw = json.load(f)
+            for domain, activities in raw.items():
+                for activity, entry in activities.items():
+                    reading = entry.get("reading")
+                    self.entries.setdefault(domain, {})[activity] = ScheduleEntry(
+                        next_due=datetime.fromisoformat(entry["next_due"]),
+                        last_run=datetime.fromisoformat(entry["last_run"]) if entry.get("last_run") else None,
+                        reading=ResourceReading(**reading) if reading else None,
+                    )
+        except Exception as e:
+            logger.warning("Failed to load schedule state, starting fresh", path=self.state_path, error=str(e))
+            self.entries = {}
+
+    def _read_other_domains(self) -> dict:
+        try:
+            with open(self.state_path, "r") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {domain: activities for domain, activities in raw.items() if domain not in self.owned_domains}
+
+    def _owned_entries(self) -> dict:
+        return {
+            domain: {
+                activity: {
+                    "next_due": entry.next_due.isoformat(),
+                    "last_run": entry.last_run.isoformat() if entry.last_run else None,
+                    "reading": asdict(entry.reading) if entry.reading else None,
+                }
+                for activity, entry in activities.items()
+            }
+            for domain, activities in self.entries.items()
+            if self.owned_domains is None or domain in self.owned_domains
+        }
+
+    def save(self):
+        """
+        Persists the schedule. On the event loop the write is deferred by
+        save_delay, so every domain's records in that window share one write,
+        and runs in a thread; without a loop it happens right away.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write(self._owned_entries())
+            return
+        if self._pending_save is None:
+            self._pending_save = loop.call_later(self.save_delay, self._flush_later)
+
+    def _flush_later(self):
+        self._pending_save = None
+        # Referenced so the task is not collected mid-write
+        self._flush_task = asyncio.ensure_future(self.flush())
+
+    async def flush(self):
+        """Writes the schedule now, in a thread; writes run one at a time, in order."""
+        if self._pending_save is not None:
+            self._pending_save.cancel()
+            self._pending_save = None
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+        # Taken on the loop, so the write never sees entries mid-update
+        owned = self._owned_entries()
+        async with self._write_lock:
+            await asyncio.to_thread(self._write, owned)
+
+    def _write(self, owned: dict):
+        raw = {} if self.owned_domains is None else self._read_other_domains()
+        raw.update(owned)
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(raw, f, indent=2)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            logger.warning("Failed to persist schedule state", path=self.state_path, error=str(e))
+
+# Singleton instance
+scheduler = ActivityScheduler(load_config().get("scheduler", {}))
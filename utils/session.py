@@ -4,6 +4,26 @@ import asyncio
 from playwright.async_api import async_playwright
 from utils.logger import logger
 from utils.config_loader import load_config
+from utils.navigation import navigate
+from utils.blocking import BlockingPolicy, RequestBlocker
+from utils.session_store import session_store
+
+# Visible once home.html has rendered either the logged-in hero or the Login link
+AUTH_READY_SELECTOR = "div[title='DarkKnight'], a:has-text('Login')"
+# Only the logged-out site shows these: the Login link or the login form
+LOGGED_OUT_SELECTOR = "a:has-text('Login'), #authentication-iframe"
+
+async def is_logged_out(page) -> bool:
+    """
+    True if the page is showing the logged-out site, e.g. after the game
+    redirected an expired session to login. Never raises.
+    """
+    try:
+        if page.is_closed() or page.url == "about:blank":
+            return False
+        return await page.locator(LOGGED_OUT_SELECTOR).first.is_visible()
+    except Exception:
+        return False
 
 async def handle_age_gate(page):
     """Detects and accepts age verification popups."""
@@ -30,12 +50,6 @@ async def handle_age_gate(page):
     except Exception as e:
         logger.debug(f"Age gate check skipped or failed: {e}")
 
-async def block_images(route):
-    if route.request.resource_type == "image":
-        await route.abort()
-    else:
-        await route.continue_()
-
 async def ensure_authenticated():
     config = load_config()
     storage_state_path = config["global_settings"]["storage_state_path"]
@@ -48,7 +62,7 @@ async def ensure_authenticated():
             page = await context.new_page()
             try:
                 # Test navigation to verify session
-                await page.goto(config["global_settings"]["login_url"], wait_until='networkidle', timeout=30000)
+                await navigate(page, config["global_settings"]["login_url"], ready=AUTH_READY_SELECTOR, timeout=30000)
                 # If we land on about:blank or the authenticated element is missing, session is invalid
                 if page.url == "about:blank" or not await page.locator("//div[@title='DarkKnight']").is_visible(timeout=5000):
                     logger.warning("Session invalid or landed on about:blank, deleting storage state.")
@@ -69,11 +83,9 @@ async def ensure_authenticated():
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=config["browser"]["headless"])
         context = await browser.new_context()
+        await RequestBlocker(context, BlockingPolicy.from_config(config)).install()
         page = await context.new_page()
 
-        if config["performance"]["block_images"]:
-            await page.route("**/*", block_images)
-
         # 1. Initial Navigation
         login_url = config["global_settings"]["login_url"]
         logger.info("Navigating to login URL", url=login_url)
@@ -150,9 +162,11 @@ async def ensure_authenticated():
         await browser.close()
     return True
 
-async def login(page, domain_url):
+async def login(page, domain_url, domain_name=None, account=None):
     """
     Performs login for a specific domain.
+    With domain_name, the session is saved to that domain's entry in the session store.
+    With an Account, its credentials are used and the session is saved under it.
     """
     logger.info("Starting login process", domain_url=domain_url)
     try:
@@ -174,10 +188,14 @@ async def login(page, domain_url):
         # Wait Strategy
         await auth_frame.get_by_role("textbox", name="E-mail").wait_for(state="visible", timeout=10000)
 
+        if account:
+            username, password = account.credentials()
+        else:
+            username, password = os.getenv('GAME_USERNAME'), os.getenv('GAME_PASSWORD')
         await auth_frame.get_by_role("textbox", name="E-mail").click()
-        await auth_frame.get_by_role("textbox", name="E-mail").fill(os.getenv('GAME_USERNAME'))
+        await auth_frame.get_by_role("textbox", name="E-mail").fill(username)
         # Using specific CSS selector for password field as requested for Manga fix
-        await auth_frame.locator('input[name="password"]').fill(os.getenv('GAME_PASSWORD') or "")
+        await auth_frame.locator('input[name="password"]').fill(password or "")
         await auth_frame.get_by_role("button", name="Play Now").click()
 
         # Verification
@@ -186,9 +204,14 @@ async def login(page, domain_url):
             logger.info("Login successful", domain_url=domain_url)
 
             # Save storage state after successful login
-            config = load_config()
-            storage_state_path = config["global_settings"]["storage_state_path"]
-            await page.context.storage_state(path=storage_state_path)
+            if account:
+                await session_store.save(page.context, account.domain, account.name)
+            elif domain_name:
+                await session_store.save(page.context, domain_name)
+            else:
+                config = load_config()
+                storage_state_path = config["global_settings"]["storage_state_path"]
+                await page.context.storage_state(path=storage_state_path)
 
             return True
         except Exception:
@@ -1,24 +1,58 @@
 import os
 import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
 from playwright.async_api import async_playwright
 from playwright.sync_api import sync_playwright
+from utils import metrics, procstats
 from utils.config_loader import load_config
+from utils.logger import logger
+from utils.blocking import BlockingPolicy, RequestBlocker
+from utils.game_state import GameStateProbe
+from utils.asset_cache import asset_cache as shared_asset_cache
+from utils.session_store import session_store
+from utils.accounts import Account, ContextLimiter
 
-async def block_images(route):
-    if route.request.resource_type == "image":
-        await route.abort()
-    else:
-        await route.continue_()
+@dataclass
+class PooledContext:
+    """A browser context (and its page) kept warm between cycles."""
+    context: object
+    page: object
+    blocker: Optional[RequestBlocker]
+    probe: Optional[GameStateProbe] = None
+    limiter: Optional[ContextLimiter] = None  # Holds one of its slots until closed
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    uses: int = 0
+    errors: int = 0
 
 class AsyncSessionManager:
     _playwright = None
     _browser = None
     _lock = asyncio.Lock()
+    # Shared by every context so assets fetched by one domain or cycle serve the rest
+    asset_cache = shared_asset_cache
+    # Idle warm contexts keyed by domain; a context is removed while checked out
+    _pool: Dict[str, PooledContext] = {}
+    # Every open context (checked out or pooled), keyed by id(context)
+    _open: Dict[int, PooledContext] = {}
+    # Caps open contexts (checked out or pooled) across every domain and account
+    _limiter: Optional[ContextLimiter] = None
 
     def __init__(self):
         self.context = None
+        self.blocker = None
+        self.entry: Optional[PooledContext] = None
+        self.key = None
+        # True when start() handed out a context that already ran a previous cycle
+        self.warm = False
         self.config = load_config()
 
+    @property
+    def pool_config(self) -> dict:
+        return self.config["browser"].get("context_pool", {}) or {}
+
     @classmethod
     async def get_browser(cls, config):
         async with cls._lock:
@@ -30,41 +64,197 @@ class AsyncSessionManager:
                 )
         return cls._browser
 
-    async def start(self):
-        browser = await self.get_browser(self.config)
+    @classmethod
+    def limiter(cls, config: dict) -> ContextLimiter:
+        if cls._limiter is None:
+            cls._limiter = ContextLimiter(config["browser"].get("max_contexts"))
+        return cls._limiter
+
+    async def start(self, domain_name: str = "default", account: Optional[Account] = None):
+        """
+        Opens (or reuses) the context for `domain_name`, the account's key.
+        When max_contexts are already open this waits for a slot.
+        """
+        account = account or Account(domain_name)
+        self.key = domain_name
+        if self.pool_config.get("enabled", False):
+            entry = self._pool.pop(domain_name, None)
+            if entry and await self._is_reusable(entry):
+                entry.uses += 1
+                entry.last_used = time.monotonic()
+                self._checkout(entry)
+                self.warm = True
+                logger.info("Reusing warm browser context", domain=domain_name, uses=entry.uses)
+                return entry.page
+            if entry:
+                await self._close(entry)
+            await self._evict_under_pressure()
 
-        # Load storage state if it exists
-        storage_state_path = self.config["global_settings"]["storage_state_path"]
+        limiter = await self._acquire_slot(account.domain)
         try:
-            if os.path.exists(storage_state_path):
-                self.context = await browser.new_context(storage_state=storage_state_path)
-            else:
-                self.context = await browser.new_context()
-        except Exception:
-            # If storage_state.json is invalid or corrupted, fallback to standard context
-            self.context = await browser.new_context()
+            entry = await self._create(domain_name, account)
+        except BaseException:
+            limiter.release()
+            raise
+        entry.limiter = limiter
+        self._open[id(entry.context)] = entry
+        self._checkout(entry)
+        self.warm = False
+        return entry.page
+
+    async def stop(self, failed: bool = False):
+        entry, self.entry = self.entry, None
+        self.context = None
+        self.blocker = None
+        if not entry:
+            return
+        if failed:
+            entry.errors += 1
+        # A context waiting for a slot takes precedence over keeping this one warm
+        waiting = self.limiter(self.config).waiting
+        if self.pool_config.get("enabled", False) and self._within_limits(entry) and not waiting:
+            entry.last_used = time.monotonic()
+            self._pool[self.key] = entry
+        else:
+            await self._close(entry)
+
+    def _checkout(self, entry: PooledContext):
+        self.entry = entry
+        self.context = entry.context
+        self.blocker = entry.blocker
+
+    async def _acquire_slot(self, group: str) -> ContextLimiter:
+        """Takes a context slot, closing idle pooled contexts (least recently used first) to free one."""
+        limiter = self.limiter(self.config)
+        while not limiter.available() and self._pool:
+            key = min(self._pool, key=lambda k: self._pool[k].last_used)
+            logger.info("Closing idle browser context to free a slot", domain=key)
+            await self._close(self._pool.pop(key))
+        if not limiter.available():
+            logger.info("Waiting for a browser context slot", domain=self.key,
+                        open=limiter.in_use, waiting=limiter.waiting)
+        await limiter.acquire(group)
+        return limiter
+
+    async def _create(self, domain_name: str, account: Account) -> PooledContext:
+        profiles_dir = self.pool_config.get("persistent_profiles_dir")
+        # Load this account's stored session if there is one
+        storage_state = session_store.storage_state(account.domain, account.name)
+        if profiles_dir:
+            # A persistent profile keeps cookies and the HTTP cache on disk across restarts.
+            # It cannot be opened with a storage state, so the stored session's cookies are
+            # added on top; they win over whatever the profile kept from an older login.
+            await self.get_browser(self.config)
+            context = await self._playwright.chromium.launch_persistent_context(
+                os.path.join(profiles_dir, domain_name),
+                headless=self.config["browser"]["headless"],
+            )
+            if storage_state and storage_state.get("cookies"):
+                try:
+                    await context.add_cookies(storage_state["cookies"])
+                except Exception as e:
+                    logger.warning("Stored session rejected, keeping the profile's cookies", domain=domain_name, error=str(e))
+        else:
+            browser = await self.get_browser(self.config)
+            try:
+                if storage_state:
+                    context = await browser.new_context(storage_state=storage_state)
+                else:
+                    context = await browser.new_context()
+            except Exception as e:
+                logger.warning("Stored session rejected, starting a blank context", domain=domain_name, error=str(e))
+                context = await browser.new_context()
+
+        # Routes registered later take precedence, so blocking filters win over the cache
+        if self.asset_cache:
+            await self.asset_cache.install(context)
 
-        page = await self.context.new_page()
+        # Request filters live on the context; only blocked requests and extensionless asset URLs reach Python
+        blocker = RequestBlocker(context, BlockingPolicy.from_config(self.config), domain_name)
+        await blocker.install()
 
-        if self.config["performance"]["block_images"]:
-            await page.route("**/*", block_images)
+        page = context.pages[0] if context.pages else await context.new_page()
+        # Game counters are read from the game's own JSON responses; the DOM is the fallback
+        probe = GameStateProbe(page, domain_name)
+        probe.install()
+        return PooledContext(context=context, page=page, blocker=blocker, probe=probe)
 
-        return page
+    def _within_limits(self, entry: PooledContext) -> bool:
+        max_age = self.pool_config.get("max_age_seconds", 7200)
+        max_errors = self.pool_config.get("max_errors", 3)
+        return time.monotonic() - entry.created_at < max_age and entry.errors < max_errors
 
-    async def stop(self):
-        if self.context:
-            await self.context.close()
-            self.context = None
+    async def _is_reusable(self, entry: PooledContext) -> bool:
+        """Health check: within age/error limits, page open, responsive and on a real URL."""
+        if not self._within_limits(entry) or entry.page.is_closed():
+            return False
+        try:
+            await asyncio.wait_for(entry.page.evaluate("document.readyState"), timeout=5)
+        except Exception:
+            return False
+        return not entry.page.url.startswith("about:")
+
+    async def _evict_under_pressure(self):
+        """Closes idle contexts, least recently used first, while bot + browser RSS is over the cap."""
+        max_rss_mb = self.pool_config.get("max_rss_mb")
+        if not max_rss_mb:
+            return
+        while self._pool and procstats.sample().rss_bytes > max_rss_mb * 2**20:
+            key = min(self._pool, key=lambda k: self._pool[k].last_used)
+            logger.info("Evicting idle browser context under memory pressure", domain=key)
+            await self._close(self._pool.pop(key))
+
+    @staticmethod
+    async def _close(entry: PooledContext):
+        AsyncSessionManager._open.pop(id(entry.context), None)
+        if entry.limiter:
+            entry.limiter.release()
+            entry.limiter = None
+        if entry.blocker:
+            entry.blocker.uninstall()
+        if entry.probe:
+            entry.probe.uninstall()
+        try:
+            await entry.context.close()
+        except Exception as e:
+            logger.debug(f"Closing browser context failed: {e}")
+
+    @classmethod
+    async def discard(cls, domain_name: str):
+        """Closes the domain's idle pooled context, if any."""
+        entry = cls._pool.pop(domain_name, None)
+        if entry:
+            await cls._close(entry)
 
     @classmethod
     async def shutdown(cls):
+        """
+        Closes every open context, pooled or checked out (persistent profiles
+        are not owned by the browser, so closing it would leave them open),
+        then the browser.
+        """
         async with cls._lock:
+            cls._pool.clear()
+            for entry in list(cls._open.values()):
+                await cls._close(entry)
             if cls._browser:
                 await cls._browser.close()
                 cls._browser = None
             if cls._playwright:
                 await cls._playwright.stop()
                 cls._playwright = None
+            cls._limiter = None
+
+    @classmethod
+    def open_pages(cls) -> int:
+        return sum(len(entry.context.pages) for entry in cls._open.values())
+
+metrics.registry.gauge("gamebot_browser_contexts", "Open browser contexts, in use or pooled.",
+                       collect=lambda: {(): len(AsyncSessionManager._open)})
+metrics.registry.gauge("gamebot_browser_pages", "Open pages across all browser contexts.",
+                       collect=lambda: {(): AsyncSessionManager.open_pages()})
+metrics.registry.gauge("gamebot_process_rss_bytes", "Resident memory of the bot and its browser processes.",
+                       collect=lambda: {(): procstats.sample().rss_bytes})
 
 class SessionManager:
     """Original Sync Session Manager"""
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from playwright.async_api import BrowserContext
+from utils.config_loader import load_config
+from utils.logger import logger
+
+DEFAULT_ACCOUNT = "default"
+
+@dataclass
+class SessionRecord:
+    storage_state: dict
+    saved_at: float
+    validated_at: Optional[float] = None  # Last time the logged-in hero was seen with these cookies
+    expires_at: Optional[float] = None  # Earliest persistent cookie expiry; None if only session cookies
+
+def cookie_expiry(storage_state: dict) -> Optional[float]:
+    """Earliest expiry among the persistent cookies (session cookies report -1)."""
+    expiries = [c["expires"] for c in storage_state.get("cookies", []) if c.get("expires", -1) > 0]
+    return min(expiries) if expiries else None
+
+class SessionStore:
+    """
+    Storage state per (domain, account), one JSON file each, so one domain's
+    login never overwrites another's cookies. Files are written to a unique
+    temp name and swapped in with os.replace, so a crash or a concurrent
+    writer never leaves a half-written file behind.
+
+    A session counts as known-good for validity_seconds after the logged-in
+    page was last seen, as long as none of its cookies has expired; while it
+    is, run_domain_sequence skips the home.html authentication check.
+    """
+
+    def __init__(self, directory: str = "sessions", validity_seconds: float = 1800,
+                 expiry_margin_seconds: float = 300, legacy_path: Optional[str] = None):
+        self.directory = directory
+        self.validity_seconds = validity_seconds
+        self.expiry_margin_seconds = expiry_margin_seconds
+        # Shared storage_state.json from before the per-domain store; used to seed domains with no file yet
+        self.legacy_path = legacy_path
+        self.records: Dict[Tuple[str, str], SessionRecord] = {}
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+
+    @classmethod
+    def from_config(cls, config: dict) -> "SessionStore":
+        global_settings = config.get("global_settings", {})
+        store_cfg = global_settings.get("session_store", {}) or {}
+        return cls(
+            directory=store_cfg.get("directory", "sessions"),
+            validity_seconds=store_cfg.get("validity_seconds", 1800),
+            expiry_margin_seconds=store_cfg.get("expiry_margin_seconds", 300),
+            legacy_path=global_settings.get("storage_state_path"),
+        )
+
+    def path_for(self, domain: str, account: str = DEFAULT_ACCOUNT) -> str:
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", f"{domain}__{account}")
+        return os.path.join(self.directory, f"{safe}.json")
+
+    def get(self, domain: str, account: str = DEFAULT_ACCOUNT) -> Optional[SessionRecord]:
+        key = (domain, account)
+        if key not in self.records:
+            record = self._read(self.path_for(domain, account))
+            if record:
+                self.records[key] = record
+        return self.records.get(key)
+
+    def storage_state(self, domain: str, account: str = DEFAULT_ACCOUNT) -> Optional[dict]:
+        """The storage state to open a context with, falling back to the legacy shared file."""
+        record = self.get(domain, account)
+        if record:
+            return record.storage_state
+        if self.legacy_path and os.path.exists(self.legacy_path):
+            try:
+                with open(self.legacy_path, "r") as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning("Legacy storage state unreadable, ignoring it", path=self.legacy_path, error=str(e))
+        return None
+
+    def is_known_good(self, domain: str, account: str = DEFAULT_ACCOUNT, now: Optional[float] = None) -> bool:
+        record = self.get(domain, account)
+        if not record or record.validated_at is None:
+            return False
+        now = time.time() if now is None else now
+        if now - record.validated_at > self.validity_seconds:
+            return False
+        return record.expires_at is None or record.expires_at - self.expiry_margin_seconds > now
+
+    async def save(self, context: BrowserContext, domain: str, account: str = DEFAULT_ACCOUNT,
+                   validated: bool = True):
+        """Captures the context's cookies and local storage; validated marks them known-good now."""
+        storage_state = await context.storage_state()
+        now = time.time()
+        record = SessionRecord(
+            storage_state=storage_state,
+            saved_at=now,
+            validated_at=now if validated else None,
+            expires_at=cookie_expiry(storage_state),
+        )
+        key = (domain, account)
+        async with self._lock(key):
+            self.records[key] = record
+            await asyncio.to_thread(self._write, self.path_for(domain, account), record)
+
+    async def invalidate(self, domain: str, account: str = DEFAULT_ACCOUNT):
+        """Forgets that the session was known-good; the cookies stay for the next login check."""
+        record = self.get(domain, account)
+        if not record or record.validated_at is None:
+            return
+        key = (domain, account)
+        async with self._lock(key):
+            record.validated_at = None
+            await asyncio.to_thread(self._write, self.path_for(domain, account), record)
+
+    def _lock(self, key: Tuple[str, str]) -> asyncio.Lock:
+        if key not in self._locks:
+            self._locks[key] = asyncio.Lock()
+        return self._locks[key]
+
+    def _write(self, path: str, record: SessionRecord):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(vars(record), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Failed to persist session", path=path, error=str(e))
+
+    def _read(self, path: str) -> Optional[SessionRecord]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                return SessionRecord(**json.load(f))
+        except (OSError, ValueError, TypeError) as e:
+            # Keep the file for inspection but never load it again
+            logger.warning("Session file unreadable, starting a blank session", path=path, error=str(e))
+            try:
+                os.replace(path, f"{path}.corrupt")
+            except OSError:
+                pass
+            return None
+
+# Singleton instance
+session_store = SessionStore.from_config(load_config())
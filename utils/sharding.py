@@ -0,0 +1,250 @@
+import asyncio
+import multiprocessing
+import queue
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from utils import metrics
+from utils.logger import logger
+from utils.jobs import DONE, FAILED, RUNNING, Job, job_queue
+from utils.state import state_manager
+
+@dataclass
+class ShardingSettings:
+    workers: int = 1
+    restart_delay_seconds: float = 10
+    status_interval_seconds: float = 1
+    metrics_interval_seconds: float = 5
+
+    @classmethod
+    def from_config(cls, config: dict) -> "ShardingSettings":
+        orchestrator_cfg = config.get("orchestrator", {}) or {}
+        return cls(
+            workers=orchestrator_cfg.get("workers", 1),
+            restart_delay_seconds=orchestrator_cfg.get("restart_delay_seconds", 10),
+            status_interval_seconds=orchestrator_cfg.get("status_interval_seconds", 1),
+            metrics_interval_seconds=orchestrator_cfg.get("metrics_interval_seconds", 5),
+        )
+
+def assign_shards(domain_names: List[str], workers: int) -> List[List[str]]:
+    """Round-robin, so a shard's domains stay the same across restarts with the same config."""
+    shards = [domain_names[i::workers] for i in range(min(workers, len(domain_names)))]
+    return [s for s in shards if s]
+
+@dataclass
+class Shard:
+    shard_id: int
+    domains: List[str]
+    commands: object  # multiprocessing.Queue of commands for the worker
+    process: Optional[multiprocessing.process.BaseProcess] = None
+    started_at: float = 0.0
+    restarts: int = 0
+    # Jobs handed to the worker that it has not reported finished, by id
+    forwarded: Dict[str, Job] = field(default_factory=dict)
+
+class ShardCoordinator:
+    """
+    Runs each shard of domains in its own worker process with its own event
+    loop and browser. Workers report their domains' status and their metrics
+    on a shared queue, which the coordinator merges into its SharedState and
+    metrics registry so /status and /metrics keep working; ad-hoc jobs queued through /trigger are forwarded to the worker
+    that owns the domain, and their progress comes back the same way. A
+    worker that dies is restarted on its own after a delay; the jobs it had
+    not started are sent to the new worker, the ones it was running fail.
+    Domains enabled by a config reload are handed to the least loaded shard
+    (sync_domains).
+
+    `target(shard_id, domains, status_queue, command_queue, settings)` is the
+    worker entry point; it must be importable from a fresh interpreter.
+    """
+
+    def __init__(self, target: Callable, domain_names: List[str], settings: ShardingSettings):
+        self.target = target
+        self.settings = settings
+        # Playwright does not survive fork; every worker starts from a clean interpreter
+        self._mp = multiprocessing.get_context("spawn")
+        self.status_queue = self._mp.Queue()
+        self.shards = [
+            Shard(shard_id=i, domains=domains, commands=self._mp.Queue())
+            for i, domains in enumerate(assign_shards(domain_names, settings.workers))
+        ]
+        self._owner: Dict[str, Shard] = {d: s for s in self.shards for d in s.domains}
+        self._stopping = False
+
+    def start_shard(self, shard: Shard):
+        shard.process = self._mp.Process(
+            target=self.target,
+            args=(shard.shard_id, shard.domains, self.status_queue, shard.commands, self.settings),
+            name=f"shard-{shard.shard_id}",
+            daemon=True,
+        )
+        shard.process.start()
+        shard.started_at = time.monotonic()
+        logger.info("Shard worker started", shard=shard.shard_id, domains=shard.domains, pid=shard.process.pid)
+
+    async def run(self):
+        for shard in self.shards:
+            for domain in shard.domains:
+                job_queue.serve(domain)
+            self.start_shard(shard)
+        try:
+            await asyncio.gather(self._supervise(), self._collect_status(), self._forward_jobs())
+        finally:
+            await self.stop()
+
+    async def _supervise(self):
+        while not self._stopping:
+            for shard in self.shards:
+                if shard.process and not shard.process.is_alive():
+                    logger.error("Shard worker exited, restarting", shard=shard.shard_id,
+                                 exitcode=shard.process.exitcode, restarts=shard.restarts,
+                                 delay=self.settings.restart_delay_seconds)
+                    shard.process = None
+                    shard.restarts += 1
+                    self._shard_exited(shard)
+                    asyncio.get_running_loop().call_later(self.settings.restart_delay_seconds, self._restart, shard)
+            await asyncio.sleep(1)
+
+    def _restart(self, shard: Shard):
+        if not self._stopping and shard.process is None:
+            self.start_shard(shard)
+            self._resend(shard)
+
+    def sync_domains(self, enabled: List[str]):
+        """
+        Applies a reloaded config's enabled domains: each new one goes to the
+        shard with the fewest domains, which starts a worker for it; disabled
+        ones stop taking jobs here (their shard stops its worker on the same reload).
+        """
+        for domain in enabled:
+            if domain not in self._owner:
+                state_manager.register(domain)
+                if self.shards:
+                    shard = min(self.shards, key=lambda s: len(s.domains))
+                    # A worker restarted later is spawned with the updated list
+                    shard.domains.append(domain)
+                    shard.commands.put(("adopt", domain))
+                else:
+                    shard = Shard(shard_id=0, domains=[domain], commands=self._mp.Queue())
+                    self.shards.append(shard)
+                    self.start_shard(shard)
+                self._owner[domain] = shard
+                logger.info("Domain enabled in config, assigned to shard", domain=domain, shard=shard.shard_id)
+            job_queue.serve(domain)
+        for domain in set(self._owner) - set(enabled):
+            if domain in job_queue.served:
+                job_queue.unserve(domain, "Domain disabled")
+
+    def _shard_exited(self, shard: Shard):
+        """Fails the jobs the dead worker was running; they may have half run, so they are not retried."""
+        for job_id, job in list(shard.forwarded.items()):
+            if job.status == RUNNING:
+                del shard.forwarded[job_id]
+                job_queue.finish(job_queue.get(job_id) or job, "Shard worker exited")
+
+    def _resend(self, shard: Shard):
+        """Hands the jobs the previous worker never started to the new one."""
+        for job in shard.forwarded.values():
+            shard.commands.put(("job", job))
+        if shard.forwarded:
+            logger.info("Jobs re-sent to restarted shard", shard=shard.shard_id, jobs=len(shard.forwarded))
+
+    async def _collect_status(self):
+        while not self._stopping:
+            try:
+                message = await asyncio.to_thread(self.status_queue.get, True, 1)
+            except queue.Empty:
+                continue
+            kind, shard_id, payload = message
+            if kind == "status":
+                await state_manager.replace_statuses(payload)
+            elif kind == "metrics":
+                metrics.registry.merge(str(shard_id), payload)
+            elif kind == "jobs":
+                forwarded = self.shards[shard_id].forwarded
+                for job in payload:
+                    # Reports for jobs already settled here (failed when the worker died) are stale
+                    if job.id not in forwarded:
+                        continue
+                    if job.status in (DONE, FAILED):
+                        del forwarded[job.id]
+                    else:
+                        forwarded[job.id] = job
+                    job_queue.update(job)
+
+    async def _forward_jobs(self):
+        """Hands jobs queued through /trigger in this process to the worker that owns their domain."""
+        while not self._stopping:
+            await job_queue.submitted.wait()
+            job_queue.submitted.clear()
+            for domain, shard in self._owner.items():
+                while True:
+                    job = job_queue.pop(domain, start=False)
+                    if job is None:
+                        break
+                    # Kept until the worker reports it finished, so a crash cannot lose it
+                    shard.forwarded[job.id] = job
+                    shard.commands.put(("job", job))
+
+    async def stop(self):
+        self._stopping = True
+        for shard in self.shards:
+            if shard.process and shard.process.is_alive():
+                shard.commands.put(("stop",))
+        deadline = time.monotonic() + 15
+        for shard in self.shards:
+            if shard.process:
+                await asyncio.to_thread(shard.process.join, max(deadline - time.monotonic(), 0.1))
+                if shard.process.is_alive():
+                    logger.warning("Shard worker did not stop, terminating", shard=shard.shard_id)
+                    shard.process.terminate()
+
+async def publish_status(shard_id: int, domains: List[str], status_queue, interval: float,
+                         metrics_interval: float = 5):
+    """
+    Worker side: sends the shard's domain statuses to the coordinator every
+    `interval` seconds, along with the jobs that changed since the last report,
+    and its metrics every `metrics_interval` seconds.
+    """
+    metrics_due = 0.0
+    while True:
+        statuses = await state_manager.get_all_statuses()
+        status_queue.put(("status", shard_id, {d: statuses[d] for d in domains if d in statuses}))
+        changed = job_queue.take_changes()
+        if changed:
+            status_queue.put(("jobs", shard_id, changed))
+        if time.monotonic() >= metrics_due:
+            status_queue.put(("metrics", shard_id, metrics.registry.export()))
+            metrics_due = time.monotonic() + metrics_interval
+        await asyncio.sleep(interval)
+
+async def receive_commands(command_queue, on_stop: Callable[[], None],
+                           on_adopt: Optional[Callable[[str], None]] = None):
+    """Worker side: applies the coordinator's commands until told to stop."""
+    while True:
+        # Poll, so the worker thread never outlives the event loop
+        try:
+            command = await asyncio.to_thread(command_queue.get, True, 1)
+        except queue.Empty:
+            continue
+        if command[0] == "stop":
+            on_stop()
+            return
+        if command[0] == "adopt":
+            logger.info("Domain assigned by coordinator", domain=command[1])
+            if on_adopt:
+                on_adopt(command[1])
+            continue
+        if command[0] == "job":
+            job = command[1]
+            if job_queue.get(job.id) is not None:
+                # Re-sent after a restart while the original was still queued
+                continue
+            if job.domain not in job_queue.served:
+                # Disabled here before the coordinator saw the reload; reported back as failed
+                job_queue.update(job)
+                job_queue.finish(job, "Domain not running")
+                continue
+            logger.info("Ad-hoc job forwarded by coordinator", domain=job.domain, activity_path=job.activity, job_id=job.id)
+            job_queue.submit(job.domain, job.activity, job.priority, job_id=job.id)
+            await state_manager.update_status(job.domain, is_adhoc_pending=True, queued_jobs=job_queue.pending(job.domain))
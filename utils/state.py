@@ -1,20 +1,114 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields, replace
 from datetime import datetime
-from typing import Dict, Optional
+from types import MappingProxyType
+from typing import Dict, Iterable, Mapping, Optional, Set
 import asyncio
 from utils.config_loader import load_config
+from utils.accounts import expand_accounts
 
-@dataclass
+class ReadOnlyDict(dict):
+    """
+    A dict that refuses changes. Unlike MappingProxyType it still pickles
+    (shard workers send statuses to the coordinator) and serializes as a dict.
+    """
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("status records are read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return ReadOnlyDict, (dict(self),)
+
+@dataclass(frozen=True, slots=True)
 class DomainStatus:
+    """
+    One domain's status at one version. Records are never changed in place:
+    every update publishes a new one, so a reader can keep a record for as
+    long as it likes.
+    """
     current_activity: Optional[str] = None
     last_run_time: Optional[datetime] = None
     status: str = "Idle"  # Idle, Busy, Error
-    is_adhoc_pending: bool = False
+    is_adhoc_pending: bool = False  # True while queued_jobs > 0
+    queued_jobs: int = 0  # Ad-hoc jobs waiting in utils.jobs.job_queue
     is_authenticated: bool = False
+    next_due: Mapping[str, Optional[datetime]] = field(default_factory=ReadOnlyDict)  # activity -> next scheduled run
+    breaker: str = "closed"  # Circuit breaker of the domain's site: closed, open, half_open
+    breaker_probe_at: Optional[datetime] = None  # When an open breaker next probes the site
+    version: int = 0  # SharedState version that published this record
+
+    def __post_init__(self):
+        # Keep a private copy, so neither the caller's dict nor a reader can change a published record
+        if type(self.next_due) is not ReadOnlyDict:
+            object.__setattr__(self, "next_due", ReadOnlyDict(self.next_due))
+
+STATUS_FIELDS = frozenset(f.name for f in fields(DomainStatus)) - {"version"}
+
+@dataclass(frozen=True, slots=True)
+class StateSnapshot:
+    """Every domain's status as of one version; taken in one read, never torn."""
+    version: int
+    domains: Mapping[str, DomainStatus]
+
+def status_changes(old: StateSnapshot, new: StateSnapshot, domains: Optional[Iterable[str]] = None) -> Dict[str, dict]:
+    """
+    The fields that differ between two snapshots, per domain (optionally only
+    `domains`). Untouched records are shared between snapshots, so unchanged
+    domains cost an identity check.
+    """
+    changes = {}
+    for name in (new.domains if domains is None else domains):
+        status = new.domains.get(name)
+        before = old.domains.get(name)
+        if status is None or status is before:
+            continue
+        changes[name] = {
+            f.name: getattr(status, f.name) for f in fields(DomainStatus)
+            if before is None or getattr(status, f.name) != getattr(before, f.name)
+        }
+    return changes
+
+class StatusSubscription:
+    """
+    Receives every snapshot SharedState publishes, through a bounded queue.
+    A subscriber that falls `maxsize` snapshots behind is dropped instead of
+    buffering more; `dropped` tells it to resynchronize or disconnect.
+    """
+
+    def __init__(self, snapshot: StateSnapshot, maxsize: int, subscribers: Set["StatusSubscription"]):
+        self.snapshot = snapshot  # The snapshot current when subscribing
+        self.dropped = False
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._subscribers = subscribers
+
+    def offer(self, snapshot: StateSnapshot):
+        try:
+            self._queue.put_nowait(snapshot)
+        except asyncio.QueueFull:
+            self.dropped = True
+            self.close()
+
+    async def next(self, timeout: float) -> Optional[StateSnapshot]:
+        """The next published snapshot, or None if none arrives within `timeout` seconds."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self._subscribers.discard(self)
 
 class SharedState:
+    """
+    Domain statuses as an immutable snapshot that writers replace whole
+    (copy-on-write). Readers take the current snapshot without waiting for
+    anything, and a batch of updates to several domains becomes visible at
+    once. Writes never await between reading and publishing the snapshot,
+    so on the event loop they need no lock either.
+    """
     _instance = None
-    _lock = asyncio.Lock()
 
     def __new__(cls):
         if cls._instance is None:
@@ -26,42 +120,97 @@ class SharedState:
         if self._initialized:
             return
 
-        self.domains: Dict[str, DomainStatus] = {}
+        self._snapshot = StateSnapshot(0, MappingProxyType({}))
+        self._subscribers: Set[StatusSubscription] = set()
         self.adhoc_event = asyncio.Event()
         self._initialize_from_config()
         self._initialized = True
 
     def _initialize_from_config(self):
         config = load_config()
-        domains_config = config.get("domains", [])
+        domains_config = expand_accounts(config.get("domains", []))
         for domain in domains_config:
             name = domain.get("name")
             if name:
-                self.domains[name] = DomainStatus()
+                self.register(name)
+
+    @property
+    def domains(self) -> Mapping[str, DomainStatus]:
+        return self._snapshot.domains
+
+    def snapshot(self) -> StateSnapshot:
+        return self._snapshot
+
+    def subscribe(self, maxsize: int = 256) -> StatusSubscription:
+        """Starts delivering every new snapshot to the returned subscription until it is closed."""
+        subscription = StatusSubscription(self._snapshot, maxsize, self._subscribers)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def register(self, domain_name: str):
+        """Adds a domain with a fresh status if it is not known yet."""
+        if domain_name not in self._snapshot.domains:
+            self.publish({domain_name: DomainStatus()})
+
+    def apply(self, updates: Dict[str, dict]) -> StateSnapshot:
+        """
+        Applies field updates to several domains in one new version. Unknown
+        domains and fields are ignored.
+        """
+        current = self._snapshot.domains
+        changed = {}
+        for domain_name, changes in updates.items():
+            if domain_name in current:
+                changed[domain_name] = replace(
+                    current[domain_name], **{k: v for k, v in changes.items() if k in STATUS_FIELDS}
+                )
+        snapshot = self.publish(changed)
+
+        # If we are setting an adhoc as pending, trigger the event
+        if any(changes.get("is_adhoc_pending") for changes in updates.values()):
+            self.adhoc_event.set()
+        return snapshot
+
+    def publish(self, statuses: Dict[str, DomainStatus]) -> StateSnapshot:
+        """Installs whole records (stamped with the new version) in one step."""
+        if not statuses:
+            return self._snapshot
+        version = self._snapshot.version + 1
+        domains = dict(self._snapshot.domains)
+        for domain_name, status in statuses.items():
+            domains[domain_name] = replace(status, version=version)
+        self._snapshot = StateSnapshot(version, MappingProxyType(domains))
+        for subscription in list(self._subscribers):
+            subscription.offer(self._snapshot)
+        return self._snapshot
 
     async def update_status(self, domain_name: str, **kwargs):
         """
-        Thread-safe (async-safe) method to update the status of a domain.
+        Updates some fields of a domain's status.
+        """
+        self.apply({domain_name: kwargs})
+
+    async def update_many(self, updates: Dict[str, dict]):
+        """Updates several domains atomically: readers see all of the changes or none."""
+        self.apply(updates)
+
+    async def replace_status(self, domain_name: str, status: DomainStatus):
+        """
+        Installs a status reported by the process that runs the domain.
+        Unlike update_status this never raises the ad-hoc signal.
         """
-        async with self._lock:
-            if domain_name in self.domains:
-                status_obj = self.domains[domain_name]
-                for key, value in kwargs.items():
-                    if hasattr(status_obj, key):
-                        setattr(status_obj, key, value)
+        self.publish({domain_name: status})
 
-                # If we are setting an adhoc as pending, trigger the event
-                if kwargs.get("is_adhoc_pending"):
-                    self.adhoc_event.set()
+    async def replace_statuses(self, statuses: Dict[str, DomainStatus]):
+        """replace_status for several domains in one version."""
+        self.publish(statuses)
 
     async def get_domain_status(self, domain_name: str) -> Optional[DomainStatus]:
-        async with self._lock:
-            return self.domains.get(domain_name)
+        return self._snapshot.domains.get(domain_name)
 
     async def get_all_statuses(self) -> Dict[str, DomainStatus]:
-        async with self._lock:
-            # Return a copy to prevent external mutation
-            return {k: v for k, v in self.domains.items()}
+        # The records are immutable; only the mapping is copied
+        return dict(self._snapshot.domains)
 
     def check_adhoc_requested(self) -> bool:
         """
@@ -73,11 +222,10 @@ class SharedState:
         """
         Clears the ad-hoc signal after workers have acknowledged it.
         """
-        async with self._lock:
-            # Check if any domain still has is_adhoc_pending=True
-            still_pending = any(d.is_adhoc_pending for d in self.domains.values())
-            if not still_pending:
-                self.adhoc_event.clear()
+        # Check if any domain still has is_adhoc_pending=True
+        still_pending = any(d.is_adhoc_pending for d in self._snapshot.domains.values())
+        if not still_pending:
+            self.adhoc_event.clear()
 
 # Singleton instance
 state_manager = SharedState()
@@ -0,0 +1,62 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Union
+from playwright.async_api import Locator, Page
+
+# Runs in the page: reads every row's cells in a single evaluation
+_EXTRACT_JS = """
+(rows, {columns, attributes, action}) => rows.map(row => {
+    const cells = {};
+    for (const [name, selector] of Object.entries(columns)) {
+        const cell = row.querySelector(selector);
+        cells[name] = cell ? cell.innerText.trim() : null;
+    }
+    const attrs = Object.fromEntries(attributes.map(name => [name, row.getAttribute(name)]));
+    return {cells, attrs, hasAction: action ? row.querySelector(action) !== null : false};
+})
+"""
+
+def parse_number(text: Optional[str]) -> Optional[int]:
+    """Parses a game number such as '1,234 567'; None if there are no digits."""
+    if not text:
+        return None
+    digits = re.sub(r"[^\d-]", "", text)
+    try:
+        return int(digits)
+    except ValueError:
+        return None
+
+@dataclass
+class TableRow:
+    index: int
+    cells: Dict[str, Optional[str]]
+    row: Locator
+    # Lazy locator for the row's action button; None if the row has none
+    action: Optional[Locator] = None
+    attributes: Dict[str, Optional[str]] = field(default_factory=dict)
+
+    def number(self, column: str) -> Optional[int]:
+        return parse_number(self.cells.get(column))
+
+async def extract_rows(scope: Union[Page, Locator], row_selector: str, columns: Dict[str, str],
+                       action_selector: Optional[str] = None, attributes: Sequence[str] = ()) -> List[TableRow]:
+    """
+    Reads a table in one round trip. `columns` maps a name to a cell selector
+    relative to the row and `attributes` names row attributes to read; the
+    returned rows carry those values and locators for the row and its action
+    button, which cost nothing until used.
+    """
+    rows = scope.locator(row_selector)
+    raw = await rows.evaluate_all(
+        _EXTRACT_JS, {"columns": columns, "attributes": list(attributes), "action": action_selector}
+    )
+    return [
+        TableRow(
+            index=i,
+            cells=item["cells"],
+            row=rows.nth(i),
+            action=rows.nth(i).locator(action_selector).first if item["hasAction"] else None,
+            attributes=item.get("attrs", {}),
+        )
+        for i, item in enumerate(raw)
+    ]
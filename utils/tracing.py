@@ -0,0 +1,150 @@
+import atexit
+import json
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from utils.config_loader import load_config
+
+# Timing spans in the Chrome trace event format. A sampled domain cycle
+# records every span opened inside it (activities, navigations, waits,
+# clicks, sleeps, retry back-offs) as a complete ("X") event; spans outside
+# a sampled cycle cost one context variable lookup. Events are written to
+# disk by a background thread, never on the event loop.
+
+@dataclass
+class TraceSettings:
+    enabled: bool = False
+    path: str = "logs/trace.jsonl"
+    sample_rate: float = 0.1  # Share of domain cycles traced
+    max_mb: float = 100  # The file is rotated to <path>.1 past this size
+    flush_events: int = 1000  # Buffered events written early by long cycles
+
+    @classmethod
+    def from_config(cls, config: dict) -> "TraceSettings":
+        trace_cfg = (config.get("performance", {}) or {}).get("tracing", {}) or {}
+        return cls(**{k: v for k, v in trace_cfg.items() if k in cls.__dataclass_fields__})
+
+# The trace viewer row ("thread") spans are drawn on; None outside a sampled cycle
+_lane: ContextVar[Optional[int]] = ContextVar("trace_lane", default=None)
+_lanes: Dict[str, int] = {}
+_buffer: List[str] = []
+
+def _lane_event(name: str, tid: int) -> str:
+    return json.dumps({"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}})
+
+def _lane_id(name: str) -> int:
+    if name not in _lanes:
+        _lanes[name] = len(_lanes) + 1
+        _buffer.append(_lane_event(name, _lanes[name]))
+    return _lanes[name]
+
+@contextmanager
+def cycle(domain: str):
+    """Root span of one domain cycle; decides whether the cycle is sampled."""
+    if not settings.enabled or _lane.get() is not None or random.random() >= settings.sample_rate:
+        yield
+        return
+    token = _lane.set(_lane_id(domain))
+    try:
+        with span("cycle", "cycle", domain=domain):
+            yield
+    finally:
+        _lane.reset(token)
+        flush()
+
+@contextmanager
+def span(name: str, category: str, lane: Optional[str] = None, **args):
+    """
+    Times the block if the current cycle is sampled. With `lane`, the span
+    and everything inside it go on their own row, for work that runs
+    concurrently with its siblings (activities on separate pages).
+    """
+    if _lane.get() is None:
+        yield
+        return
+    token = _lane.set(_lane_id(lane)) if lane else None
+    start = time.time_ns() // 1000
+    try:
+        yield
+    except BaseException as e:
+        args["error"] = type(e).__name__
+        raise
+    finally:
+        _buffer.append(json.dumps({
+            "name": name, "cat": category, "ph": "X", "ts": start, "dur": time.time_ns() // 1000 - start,
+            "pid": os.getpid(), "tid": _lane.get(), "args": args,
+        }, default=str))
+        if token:
+            _lane.reset(token)
+        if len(_buffer) >= settings.flush_events:
+            flush()
+
+_writes: "queue.Queue[Optional[str]]" = queue.Queue()
+_writer: Optional[threading.Thread] = None
+
+def flush():
+    """Hands buffered events to the writer thread; returns at once."""
+    global _writer
+    if not _buffer:
+        return
+    lines = "".join(event + ",\n" for event in _buffer)
+    _buffer.clear()
+    if _writer is None or not _writer.is_alive():
+        _writer = threading.Thread(target=_write_loop, name="trace-writer", daemon=True)
+        _writer.start()
+    _writes.put(lines)
+
+def wait():
+    """Blocks until everything flushed so far is on disk."""
+    _writes.join()
+
+def shutdown():
+    """Writes out buffered events and stops the writer thread."""
+    global _writer
+    flush()
+    if _writer and _writer.is_alive():
+        _writes.put(None)
+        _writer.join(timeout=10)
+    _writer = None
+
+def _write_loop():
+    while True:
+        lines = _writes.get()
+        try:
+            if lines is None:
+                return
+            _write(lines)
+        finally:
+            _writes.task_done()
+
+def _write(lines: str):
+    """
+    Appends events to the trace file, one per line. The file is a JSON array
+    without its closing bracket, which chrome://tracing and Perfetto accept
+    as is.
+    """
+    try:
+        directory = os.path.dirname(settings.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(settings.path) and os.path.getsize(settings.path) > settings.max_mb * 2**20:
+            os.replace(settings.path, settings.path + ".1")
+            # Row names are metadata events; the new file needs them again
+            lines = "".join(_lane_event(name, tid) + ",\n" for name, tid in tuple(_lanes.items())) + lines
+        with open(settings.path, "a") as f:
+            if f.tell() == 0:
+                lines = "[\n" + lines
+            f.write(lines)
+    except OSError:
+        # Tracing never takes the bot down
+        pass
+
+atexit.register(shutdown)
+
+settings = TraceSettings.from_config(load_config())